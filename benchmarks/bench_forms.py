@@ -0,0 +1,165 @@
+# -----------------------------------------------------------------
+# BENCHMARK: Form extraction (forms.py) vs. BeautifulSoup trees
+# -----------------------------------------------------------------
+# Builds synthetic pages shaped like the portal's (results, details,
+# JS-redirect status page, journal listing) and extracts what the
+# searcher and downloader need from each, once with the BeautifulSoup
+# code they used before and once with src/forms.py. Checks that both
+# return the same values, then compares time and peak memory per page.
+#
+# BeautifulSoup is no longer a dependency. Without it, only the
+# forms.py numbers are printed.
+#
+#   python -m benchmarks.bench_forms
+#   python -m benchmarks.bench_forms 200     (repeat count)
+# -----------------------------------------------------------------
+
+import statistics
+import sys
+import time
+import tracemalloc
+
+from src import forms
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+# --- Synthetic pages ---
+
+def _chrome(body):
+    # Navigation, scripts and styles that every portal page carries
+    nav = "".join(f'<li><a href="/PublicSearch/Page{i}">Menu item {i}</a></li>' for i in range(80))
+    script = "<script>" + "var x = 1;\n" * 400 + "</script>"
+    return (f"<html><head><title>Public Search</title>{script}"
+            f"<style>{'td { padding: 1px; }' * 200}</style></head>"
+            f"<body><ul>{nav}</ul>{body}<footer>{'&copy; Patent Office ' * 50}</footer></body></html>")
+
+def results_page():
+    rows = "".join(
+        f"<tr><td>{i}</td><td>Title of publication {i} &amp; more</td><td>15/09/2025</td></tr>"
+        for i in range(150)
+    )
+    return _chrome(
+        f"<p>Total Document(s): 1</p><table>{rows}</table>"
+        '<form action="/PublicSearch/PublicationSearch/PatentDetails" method="post">'
+        '<input type="hidden" name="ConnectionName" value="PubSearchConn">'
+        '<button type="submit" name="ApplicationNumber" value=" 202511087359 ">202511087359</button>'
+        "</form>"
+    )
+
+def details_page():
+    fields = "".join(f"<tr><th>Field {i}</th><td>Value number {i}</td></tr>" for i in range(120))
+    return _chrome(
+        f"<table>{fields}</table>"
+        '<form action="/PublicSearch/PublicationSearch/GetApplicationStatus" method="post">'
+        '<input type="hidden" name="ApplicationNumber" value="202511087359">'
+        '<input type="submit" name="submit" value="View Application Status"></form>'
+    )
+
+def status_page():
+    return ('<html><body onload="document.form.submit()">'
+            '<form name="form" method="post" action="https://iprsearch.ipindia.gov.in/RQStatus/">'
+            '<input type="hidden" name="AppNumber" value="202511087359">'
+            '<input type="hidden" name="OTP" value="a1b2c3"></form></body></html>')
+
+def journal_page(count=400):
+    rows = "".join(
+        f"<tr><td>{i}</td><td>{44 - i % 40}/{2025 - i // 40}</td><td>01/01/2025</td><td>"
+        f'<form method="post" action="/IPOJournal/Journal/ViewJournal"><input type="hidden" name="FileName" value="J{i}_P1.pdf">'
+        f'<button type="submit"> Part I </button></form>'
+        f'<form method="post" action="/IPOJournal/Journal/ViewJournal"><input type="hidden" name="FileName" value="J{i}_P2.pdf">'
+        f'<button type="submit"> Part II </button></form></td></tr>'
+        for i in range(count)
+    )
+    return _chrome(f"<table><tr><th>#</th><th>Journal No.</th><th>Date</th><th>Download</th></tr>{rows}</table>")
+
+# --- Extraction, before (BeautifulSoup) and after (forms.py) ---
+
+def soup_results(html):
+    form = BeautifulSoup(html, 'html.parser').find('form', {'action': '/PublicSearch/PublicationSearch/PatentDetails'})
+    return (form['action'], form.find('input', {'name': 'ConnectionName'})['value'],
+            form.find('button', {'name': 'ApplicationNumber'})['value'].strip())
+
+def forms_results(html):
+    form = forms.find_form(html, action='/PublicSearch/PublicationSearch/PatentDetails')
+    return form.action, form.get('ConnectionName'), form.get('ApplicationNumber').strip()
+
+def soup_details(html):
+    form = BeautifulSoup(html, 'html.parser').find('form', {'action': '/PublicSearch/PublicationSearch/GetApplicationStatus'})
+    return form['action'], form.find('input', {'name': 'ApplicationNumber'})['value']
+
+def forms_details(html):
+    form = forms.find_form(html, action='/PublicSearch/PublicationSearch/GetApplicationStatus')
+    return form.action, form.get('ApplicationNumber')
+
+def soup_status(html):
+    form = BeautifulSoup(html, 'html.parser').find('form', {'name': 'form'})
+    return (form['action'], form.find('input', {'name': 'AppNumber'})['value'],
+            form.find('input', {'name': 'OTP'})['value'])
+
+def forms_status(html):
+    form = forms.find_form(html, name='form')
+    return form.action, form.get('AppNumber'), form.get('OTP')
+
+def soup_journals(html):
+    found = []
+    for row in BeautifulSoup(html, 'html.parser').find('table').find_all('tr')[1:]:
+        cols = row.find_all('td')
+        for form in cols[-1].find_all('form'):
+            button = form.find('button')
+            filename = form.find('input', {'type': 'hidden', 'name': 'FileName'})
+            found.append((cols[1].text.strip(), button.get_text(" ", strip=True).lower(), filename.get('value', '')))
+    return found
+
+def forms_journals(html):
+    found = []
+    for cols in forms.parse_table(html)[1:]:
+        for form in cols[-1].forms:
+            found.append((cols[1].text.strip(), form.buttons[0][2].lower(), form.find_input('FileName', 'hidden')))
+    return found
+
+PAGES = [
+    ("results", results_page, soup_results, forms_results),
+    ("details", details_page, soup_details, forms_details),
+    ("status redirect", status_page, soup_status, forms_status),
+    ("journal listing", journal_page, soup_journals, forms_journals),
+]
+
+def _measure(func, html, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html)
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(samples) * 1000, peak / 1024
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"--- Form extraction benchmark ({repeat} runs per page, median) ---")
+    if BeautifulSoup is None:
+        print("  (bs4 not installed: showing forms.py only)")
+
+    print(f"\n  {'page':<16} {'size':>7} {'BeautifulSoup':>22} {'forms.py':>22}")
+    for label, build, soup_func, forms_func in PAGES:
+        html = build()
+        forms_ms, forms_kb = _measure(forms_func, html, repeat)
+        if BeautifulSoup is None:
+            soup_column = "n/a"
+        else:
+            if soup_func(html) != forms_func(html):
+                print(f"  MISMATCH on {label}: {soup_func(html)!r} != {forms_func(html)!r}")
+                return
+            soup_ms, soup_kb = _measure(soup_func, html, repeat)
+            soup_column = f"{soup_ms:7.2f} ms {soup_kb:7.0f} KiB"
+        print(f"  {label:<16} {len(html) // 1024:>4} KiB {soup_column:>22} "
+              f"{forms_ms:7.2f} ms {forms_kb:7.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
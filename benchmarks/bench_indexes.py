@@ -0,0 +1,155 @@
+# -----------------------------------------------------------------
+# BENCHMARK: Status/IPC indexes and the 'patent_ipc' table (database.py)
+# -----------------------------------------------------------------
+# Loads and classifies synthetic patents in a throwaway database, adds
+# a small 'newly_extracted' backlog, then times the lookups with and
+# without the indexes:
+#   - the filter's work queue (status = 'newly_extracted'), and
+#   - "every patent in IPC subclass X": a LIKE scan over the JSON in
+#     patents.ipc_codes vs. database.get_patents_by_ipc(), for a common
+#     subclass (G06Q) and the rarest one in the data, and
+#   - "published in a 4-week window": rearranging the DD/MM/YYYY text
+#     in SQL (a full scan) vs. a range on publication_date_iso. The
+#     synthetic patents are spread over a year of weekly journals.
+#
+#   python -m benchmarks.bench_indexes
+#   python -m benchmarks.bench_indexes 100000
+# -----------------------------------------------------------------
+
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import config
+from src import database, filter
+from benchmarks.bench_ingest import make_patents
+
+BACKLOG = 200
+
+WEEKS = 52
+WINDOW = ("2025-03-01", "2025-03-28")
+
+# How ranges had to be written before the ISO columns
+TEXT_DATE_SQL = (
+    "substr(publication_date, 7, 4) || '-' || substr(publication_date, 4, 2) "
+    "|| '-' || substr(publication_date, 1, 2)"
+)
+
+DROP_INDEXES_SQL = """
+DROP INDEX idx_patents_status;
+DROP INDEX idx_journals_status;
+"""
+
+
+def _time(func, repeat=10):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def queue_lookup():
+    conn = database.get_db_connection()
+    return len(conn.execute(
+        "SELECT application_no, ipc_codes FROM patents WHERE status = 'newly_extracted' "
+        "AND application_no > '' ORDER BY application_no LIMIT ?",
+        (config.FILTER_BATCH_SIZE,)
+    ).fetchall())
+
+
+def ipc_like_scan(subclass):
+    """
+    The pre-'patent_ipc' way: LIKE over the JSON, then decode each hit.
+    """
+    conn = database.get_db_connection()
+    rows = conn.execute(
+        "SELECT application_no, title, publication_date, patent_type, ipc_codes FROM patents "
+        "WHERE status = 'classified' AND ipc_codes LIKE ?",
+        (f'%"{subclass}%',)
+    ).fetchall()
+    return len([
+        row for row in rows
+        if any(code.upper().startswith(subclass) for code in json.loads(row['ipc_codes']))
+    ])
+
+
+def ipc_index_seek(subclass):
+    return len(database.get_patents_by_ipc(subclass))
+
+
+def date_range_text():
+    conn = database.get_db_connection()
+    return len(conn.execute(
+        f"SELECT application_no FROM patents WHERE {TEXT_DATE_SQL} BETWEEN ? AND ?", WINDOW
+    ).fetchall())
+
+
+def date_range_iso():
+    conn = database.get_db_connection()
+    return len(conn.execute(
+        "SELECT application_no FROM patents WHERE publication_date_iso BETWEEN ? AND ?", WINDOW
+    ).fetchall())
+
+
+def _rarest_subclass():
+    conn = database.get_db_connection()
+    return conn.execute(
+        "SELECT subclass FROM patent_ipc GROUP BY subclass ORDER BY COUNT(*), subclass LIMIT 1"
+    ).fetchone()[0]
+
+
+def _load(count):
+    patents = make_patents(count + BACKLOG)
+    for i, patent in enumerate(patents):
+        published = date(2025, 1, 3) + timedelta(weeks=i % WEEKS)
+        patent['publication_date'] = published.strftime("%d/%m/%Y")
+    database.insert_patents(patents[:count])
+    for batch in database.iter_patents_to_classify():
+        database.update_patent_classifications(filter.classify_batch(batch))
+    # A fresh journal waiting for the filter
+    database.insert_patents(patents[count:])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config.DATABASE_FILE = Path(tmp_dir) / "indexes.db"
+        database.create_tables()
+        start = time.perf_counter()
+        _load(count)
+        print(f"--- Index benchmark: {count} classified + {BACKLOG} new patents "
+              f"(loaded in {time.perf_counter() - start:.1f}s) ---")
+
+        indexed_queue, queued = _time(queue_lookup)
+        ipc_timings = []
+        for subclass in ("G06Q", _rarest_subclass()):
+            indexed_ipc, found = _time(lambda: ipc_index_seek(subclass))
+            like_ipc, like_found = _time(lambda: ipc_like_scan(subclass))
+            ipc_timings.append((subclass, found, like_found, indexed_ipc, like_ipc))
+        text_range, text_found = _time(date_range_text)
+        iso_range, in_window = _time(date_range_iso)
+
+        database.get_db_connection().executescript(DROP_INDEXES_SQL)
+        scan_queue, _ = _time(queue_lookup)
+
+    print(f"\n  Filter work queue ({queued} rows):")
+    print(f"    full scan:          {scan_queue:8.2f} ms")
+    print(f"    idx_patents_status: {indexed_queue:8.2f} ms   ({scan_queue / indexed_queue:.0f}x)")
+    for subclass, found, like_found, indexed_ipc, like_ipc in ipc_timings:
+        print(f"\n  Patents in subclass {subclass} ({found} patents, LIKE found {like_found}):")
+        print(f"    LIKE + json.loads:  {like_ipc:8.2f} ms")
+        print(f"    patent_ipc seek:    {indexed_ipc:8.2f} ms   ({like_ipc / indexed_ipc:.0f}x)")
+    print(f"\n  Published {WINDOW[0]} to {WINDOW[1]} ({in_window} patents, text scan found {text_found}):")
+    print(f"    DD/MM/YYYY in SQL:  {text_range:8.2f} ms")
+    print(f"    ISO date range:     {iso_range:8.2f} ms   ({text_range / iso_range:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# -----------------------------------------------------------------
+# BENCHMARK: Patent ingestion (database.py)
+# -----------------------------------------------------------------
+# Compares the old one-commit-per-patent insert_patent() loop
+# against the batched insert_patents() / PatentWriter path.
+#
+# Runs against a throwaway database, never data/patents.db:
+#   python -m benchmarks.bench_ingest
+#   python -m benchmarks.bench_ingest 20000
+# -----------------------------------------------------------------
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import config
+from src import database, utils
+
+
+def make_patents(count):
+    """
+    Builds 'count' synthetic patent dicts by cycling through the
+    records in all_patents.json and giving each a unique app number.
+    """
+    templates = utils.load_json_history(config.ALL_PATENTS_JSON)
+    patents = []
+    for i in range(count):
+        patent = dict(templates[i % len(templates)])
+        patent['application_no'] = f"{209900000000 + i} A"
+        patent['publication_type'] = "PART_I_EARLY"
+        patents.append(patent)
+    return patents
+
+
+def _fresh_database(tmp_dir, name):
+    config.DATABASE_FILE = Path(tmp_dir) / name
+    database.create_tables()
+
+
+def bench_single(patents):
+    start = time.perf_counter()
+    for patent in patents:
+        database.insert_patent(dict(patent))
+    return time.perf_counter() - start
+
+
+def bench_batched(patents):
+    start = time.perf_counter()
+    database.insert_patents(patents)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    patents = make_patents(count)
+    print(f"--- Ingestion benchmark: {count} patents ---")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        _fresh_database(tmp_dir, "single.db")
+        single = bench_single(patents)
+
+        _fresh_database(tmp_dir, "batched.db")
+        batched = bench_batched(patents)
+
+    print(f"  insert_patent  (1 commit/patent): {single:8.3f}s  {count / single:10.0f} patents/sec")
+    print(f"  insert_patents (chunk={config.DB_WRITE_CHUNK_SIZE}):   {batched:8.3f}s  {count / batched:10.0f} patents/sec")
+    print(f"  Speedup: {single / batched:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# -----------------------------------------------------------------
+# BENCHMARK: Full-text search (database.search_patents)
+# -----------------------------------------------------------------
+# Loads synthetic patents into a throwaway database (the FTS5 index is
+# filled by the insert triggers, as during extraction) and compares
+# ranked FTS5 queries against the LIKE scans they replace.
+#
+#   python -m benchmarks.bench_query
+#   python -m benchmarks.bench_query 100000
+# -----------------------------------------------------------------
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import config
+from src import database
+from benchmarks.bench_ingest import make_patents
+
+QUERIES = [
+    "machine learning",
+    "blockchain",
+    "sensor AND vehicle",
+    "drone*",
+    "title:system",
+    "artificial intelligence",
+]
+
+# Every match, as ranking needs (LIMIT 20 would stop at the first 20
+# unranked hits of a common word and hide the full-table scan)
+LIKE_SQL = """
+SELECT application_no, title FROM patents
+WHERE abstract LIKE ? OR title LIKE ?
+"""
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.median(samples) * 1000, p95 * 1000
+
+
+def bench_fts(repeat):
+    timings = {}
+    for terms in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            database.search_patents(terms)
+            samples.append(time.perf_counter() - start)
+        timings[terms] = _percentiles(samples)
+    return timings
+
+
+def bench_like(repeat):
+    timings = {}
+    conn = database.get_db_connection()
+    for terms in QUERIES:
+        # The closest LIKE equivalent: the first plain word as a substring
+        word = terms.split(":")[-1].split()[0].rstrip("*")
+        pattern = f"%{word}%"
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(LIKE_SQL, (pattern, pattern)).fetchall()
+            samples.append(time.perf_counter() - start)
+        timings[terms] = _percentiles(samples)
+    return timings
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repeat = 20
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config.DATABASE_FILE = Path(tmp_dir) / "query.db"
+        database.create_tables()
+        start = time.perf_counter()
+        database.insert_patents(make_patents(count))
+        load = time.perf_counter() - start
+        print(f"--- Query benchmark: {count} patents (loaded and indexed in {load:.1f}s) ---")
+
+        fts = bench_fts(repeat)
+        like = bench_like(repeat)
+
+    print(f"\n  {'query':<26} {'FTS5 p50/p95 (ms)':>20} {'LIKE p50/p95 (ms)':>20}")
+    for terms in QUERIES:
+        print(f"  {terms:<26} {fts[terms][0]:9.2f} / {fts[terms][1]:<8.2f} "
+              f"{like[terms][0]:9.2f} / {like[terms][1]:<8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# -----------------------------------------------------------------
+# BENCHMARK: Memory per patent record (records.py)
+# -----------------------------------------------------------------
+# Loads synthetic patents into a throwaway database, then reads them
+# all back three ways and measures (tracemalloc) the bytes each record
+# holds, including its strings:
+#   - dict:          the extractor's / export's old per-patent dicts
+#   - sqlite3.Row:   what the filter and searcher used to hold
+#   - records.Patent (__slots__, repeated strings interned)
+#
+# Every read gets fresh strings from SQLite, as a real reclassification
+# or export would, so interning is measured too.
+#
+#   python -m benchmarks.bench_records
+#   python -m benchmarks.bench_records 200000
+# -----------------------------------------------------------------
+
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import config
+from src import database
+from src.records import Patent, FIELDS
+from benchmarks.bench_ingest import make_patents
+
+SELECT_SQL = f"SELECT {', '.join(FIELDS)} FROM patents"
+
+
+def as_dicts(cursor):
+    return [dict(row) for row in cursor]
+
+
+def as_rows(cursor):
+    return cursor.fetchall()
+
+
+def as_patents(cursor):
+    return [Patent.from_row(row) for row in cursor]
+
+
+def measure(load, count):
+    """
+    Returns the bytes per record kept alive by load(cursor).
+    """
+    conn = database.get_db_connection()
+    cursor = conn.execute(SELECT_SQL)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = load(cursor)
+    cursor.close()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(records) == count
+    return (after - before) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config.DATABASE_FILE = Path(tmp_dir) / "records.db"
+        database.create_tables()
+        patents = make_patents(count)
+        for patent in patents:
+            patent['status'] = 'newly_extracted'
+        database.insert_patents(patents)
+        del patents
+
+        print(f"--- Record memory benchmark: {count} patents ---\n")
+        results = [(name, measure(load, count)) for name, load in
+                   (("dict", as_dicts), ("sqlite3.Row", as_rows), ("Patent", as_patents))]
+        database.close_db_connection()
+
+    dict_bytes = results[0][1]
+    print(f"  {'record':<12} {'bytes/record':>13} {'vs dict':>9} {'MB per 100k':>12}")
+    for name, per_record in results:
+        print(f"  {name:<12} {per_record:13.0f} {per_record / dict_bytes:9.0%} "
+              f"{per_record * 100000 / 2**20:12.1f}")
+
+
+if __name__ == '__main__':
+    main()
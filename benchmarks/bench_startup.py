@@ -0,0 +1,124 @@
+# -----------------------------------------------------------------
+# BENCHMARK: CLI startup time (main.py)
+# -----------------------------------------------------------------
+# Runs the quick maintenance commands (init, reset, clear, runs) the
+# way cron does, each in a fresh interpreter, and checks that they
+# stay under STARTUP_BUDGET_MS on top of the bare interpreter start.
+# main.py imports the src modules a command needs only when it runs,
+# so none of these may import requests or PyMuPDF; one extra
+# '-X importtime' run per command shows where its import time goes.
+#
+# Runs against a throwaway database, never data/patents.db:
+#   python -m benchmarks.bench_startup
+#   python -m benchmarks.bench_startup 20
+# Exits with status 1 if a command is over budget.
+# -----------------------------------------------------------------
+
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP_BUDGET_MS = 100
+
+# (label, main.py arguments, stdin)
+COMMANDS = [
+    ("init", ["init"], ""),
+    ("reset", ["reset", "1_2099"], ""),
+    ("clear", ["clear"], "no\n"),
+    ("runs", ["runs"], ""),
+]
+
+# Modules that only the network and PDF commands should pay for
+HEAVY_MODULES = ("fitz", "pymupdf", "requests", "urllib3", "bs4")
+
+MARKER = "--- bench_startup: main.py starts here ---"
+
+DRIVER = """
+import sys
+sys.stderr.write({marker!r} + "\\n")
+from pathlib import Path
+import config
+config.DATABASE_FILE = Path({database!r})
+sys.argv = ["main.py"] + {args!r}
+import main
+main.main()
+"""
+
+
+def _run(code, stdin="", importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, input=stdin, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command[:-1])} failed:\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def _median_ms(code, stdin, repeat):
+    return statistics.median(_run(code, stdin)[0] for _ in range(repeat))
+
+
+def import_breakdown(stderr, top=5):
+    """
+    Parses '-X importtime' output after MARKER. Returns the total import
+    time in ms, the slowest top-level imports and any HEAVY_MODULES seen.
+    """
+    lines = stderr.split(MARKER, 1)[-1].splitlines()
+    top_level = []
+    heavy = set()
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip() == "cumulative":
+            continue
+        module = name.strip()
+        if module.split(".")[0] in HEAVY_MODULES:
+            heavy.add(module.split(".")[0])
+        if not name[1:].startswith(" "):
+            top_level.append((int(cumulative) / 1000, module))
+    total = sum(ms for ms, _ in top_level)
+    return total, sorted(top_level, reverse=True)[:top], sorted(heavy)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"--- Startup benchmark: median of {repeat} runs, budget {STARTUP_BUDGET_MS} ms ---")
+
+    interpreter = _median_ms("pass", "", repeat)
+    print(f"\n  Bare interpreter start: {interpreter:.0f} ms (not counted)")
+
+    over_budget = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database = str(Path(tmp_dir) / "startup.db")
+        for label, args, stdin in COMMANDS:
+            code = DRIVER.format(marker=MARKER, database=database, args=args)
+            if label == "init":
+                _run(code)  # the other commands need the tables
+            command_ms = _median_ms(code, stdin, repeat) - interpreter
+            imports_ms, slowest, heavy = import_breakdown(_run(code, stdin, importtime=True)[1])
+
+            ok = command_ms <= STARTUP_BUDGET_MS and not heavy
+            if not ok:
+                over_budget.append(label)
+            print(f"\n  {label:<6} {command_ms:6.0f} ms   (imports {imports_ms:.0f} ms)   "
+                  f"{'OK' if ok else 'OVER BUDGET'}")
+            for ms, module in slowest:
+                print(f"           {ms:6.1f} ms  {module}")
+            if heavy:
+                print(f"           imports {', '.join(heavy)}: should only load for network/PDF commands")
+
+    if over_budget:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        sys.exit(1)
+    print("\nAll commands within budget.")
+
+
+if __name__ == '__main__':
+    main()
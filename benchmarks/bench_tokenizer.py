@@ -0,0 +1,155 @@
+# -----------------------------------------------------------------
+# BENCHMARK: INID tokenizer vs. the legacy patent regex (inid.py)
+# -----------------------------------------------------------------
+# Parses every page of data/output/sample.pdf with both the old
+# DOTALL regex and inid.parse_record(), checks that they extract the
+# same records, and compares throughput on:
+#   - the real journal pages, and
+#   - "no match" pages: a patent header followed by an incomplete
+#     record, which makes the old regex backtrack before failing.
+#
+#   python -m benchmarks.bench_tokenizer
+#   python -m benchmarks.bench_tokenizer 20     (repeat count)
+# -----------------------------------------------------------------
+
+import re
+import sys
+import time
+
+import fitz  # PyMuPDF
+
+import config
+from src import inid
+
+SAMPLE_PDF = config.OUTPUT_DIR / "sample.pdf"
+
+# -----------------------------------------------------------------
+# --- THIS IS THE FINAL, ROBUST REGEX ---
+# -----------------------------------------------------------------
+# It uses complex "lookaheads" (?=...) to stop capturing
+# at the *next nearest* field code, even if it's optional.
+# -----------------------------------------------------------------
+LEGACY_PATENT_REGEX = re.compile(
+    r"\(12\)\s*PATENT APPLICATION PUBLICATION"
+
+    # (21) Application No. - Stop at (19) or (22)
+    r".*?\(21\)\s*Application No\.:?\s*(?P<app_no>.*?)(?=\s*\((?:19|22)\))"
+
+    # (22) Date of filing - Stop at (43)
+    r".*?\(22\)\s*Date of filing of Application\s*:?\s*(?P<date_filing>.*?)(?=\s*\((?:43)\))"
+
+    # (43) Publication Date - Stop at (54)
+    r".*?\(43\)\s*Publication Date\s*:?\s*(?P<date_pub>.*?)(?=\s*\((?:54)\))"
+
+    # (54) Title - Stop at (51) or (71) (in case 51 is missing)
+    r".*?\(54\)\s*Title of the invention\s*:?\s*(?P<title>.*?)(?=\s*\((?:51|71)\))"
+
+    # (51) IPC - This is an optional group.
+    # It captures everything until the *next* field code, which could be
+    # (31), (32), (33), (86), (87), (61), (62), or (71).
+    # We make the whole (51) block optional with (?:...)?
+    r"(?:"
+        r".*?\(51\)\s*International classification\s*:?\s*(?P<ipc>.*?)"
+        r"(?=\s*\((?:31|32|33|86|87|61|62|71)\))"
+    r")?"
+
+    # (71) Applicant - Stop at (72)
+    r".*?\(71\)\s*Name of Applicant\s*:?\s*(?P<applicant>.*?)(?=\s*\((?:72)\))"
+
+    # (72) Inventor - Stop at (57)
+    r".*?\(72\)\s*Name of Inventor\s*:?\s*(?P<inventor>.*?)(?=\s*\((?:57)\))"
+
+    # (57) Abstract - Stop at "No. of Pages" or "Description"
+    r".*?\(57\)\s*Abstract\s*:?\s*(?P<abstract>.*?)"
+    r"(?=No\. of Pages|Description:)",
+
+    re.DOTALL | re.IGNORECASE
+)
+# -----------------------------------------------------------------
+# --- END OF UPDATED REGEX ---
+# -----------------------------------------------------------------
+
+
+def legacy_parse(page_text):
+    """
+    The extractor's original per-page parsing, kept here for comparison.
+    """
+    match = LEGACY_PATENT_REGEX.search(page_text)
+    if not match:
+        return None
+    data = match.groupdict()
+    return {
+        "application_no": data['app_no'].strip(),
+        "date_of_filing": data['date_filing'].strip(),
+        "publication_date": data['date_pub'].strip(),
+        "title": data['title'].strip().replace('\n', ' '),
+        "international_classification": (data.get('ipc') or '').strip().replace('\n', ' '),
+        "applicant": data['applicant'].strip().replace('\n', ' '),
+        "inventor": data['inventor'].strip().replace('\n', ' '),
+        "abstract": data['abstract'].strip().replace('\n', ' '),
+    }
+
+
+def load_pages():
+    doc = fitz.open(SAMPLE_PDF)
+    pages = [page.get_text() + "\n" for page in doc]
+    doc.close()
+    return pages
+
+
+def make_no_match_pages(pages, count=10):
+    """
+    Builds worst cases for the legacy regex: real pages cut off just
+    before the (51) field, like a record that continues on the next page.
+
+    The regex fails only after trying every split of the lazy .*? groups
+    before it, and the cost grows with every field it gets through: cut
+    at (51) a page takes milliseconds, cut at (71) or later it does not
+    finish at all. So we stop at (51) to keep the benchmark runnable.
+    """
+    no_match = []
+    for page in pages[:count]:
+        no_match.append(page[:page.find("(51)")])
+    return no_match
+
+
+def time_parser(parse, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            parse(page)
+    return time.perf_counter() - start
+
+
+def check_parity(pages):
+    mismatches = 0
+    for page_num, page in enumerate(pages, start=1):
+        old, new = legacy_parse(page), inid.parse_record(page)
+        if old != new:
+            mismatches += 1
+            print(f"  ✗ Page {page_num}: legacy={old and old['application_no']} tokenizer={new and new['application_no']}")
+    return mismatches
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    pages = load_pages()
+    no_match = make_no_match_pages(pages)
+
+    print(f"--- Tokenizer benchmark: {len(pages)} pages from {SAMPLE_PDF.name} ---")
+    mismatches = check_parity(pages)
+    matched = sum(1 for page in pages if inid.parse_record(page))
+    print(f"  Parity: {len(pages) - mismatches}/{len(pages)} pages identical ({matched} records)")
+
+    for label, bench_pages in (("journal pages", pages), ("no-match pages", no_match)):
+        legacy = time_parser(legacy_parse, bench_pages, repeat)
+        tokenizer = time_parser(inid.parse_record, bench_pages, repeat)
+        total = len(bench_pages) * repeat
+        print(f"\n  {label} ({total} parses):")
+        print(f"    legacy regex: {legacy:8.3f}s  {total / legacy:10.0f} pages/sec")
+        print(f"    tokenizer:    {tokenizer:8.3f}s  {total / tokenizer:10.0f} pages/sec")
+        print(f"    Speedup: {legacy / tokenizer:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
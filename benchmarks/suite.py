@@ -0,0 +1,437 @@
+# -----------------------------------------------------------------
+# BENCHMARK SUITE: extract, filter and database write paths
+# -----------------------------------------------------------------
+# Runs each stage against synthetic journals of 1k / 10k / 100k
+# patents and reports throughput, p50/p95 latency per item and peak
+# RSS, so a regex, parser or schema change can be checked for
+# regressions against a stored baseline.
+#
+#   extract    extractor._process_pdf() on a synthetic journal PDF
+#              (one patent per page, like the real journals), written
+#              through a PatentWriter. Latency: time between patents.
+#   db_insert  database.insert_patents() in DB_WRITE_CHUNK_SIZE chunks
+#   db_update  database.update_patent_classifications() in
+#              FILTER_BATCH_SIZE batches
+#   filter     filter.run_filter() over that many 'newly_extracted'
+#              patents
+#
+# The batched stages report latency per item as batch time / batch
+# size. The journal PDFs are built from the pages of
+# data/output/sample.pdf, and the patents from the records in
+# all_patents.json, each with a unique application number. Both are
+# deterministic, so runs are comparable. Generated PDFs (volumes of
+# up to PAGES_PER_VOLUME pages) are kept in data/benchmarks/ for the
+# next run.
+#
+# Every stage runs in a fresh process (so peak RSS is its own) against
+# a throwaway database, never data/patents.db. The page-text cache is
+# off. Each stage runs --repeat times (default 3) and the median is
+# reported.
+#
+#   python -m benchmarks.suite                         (1k and 10k)
+#   python -m benchmarks.suite --sizes 1k,10k,100k --repeat 3
+#   python -m benchmarks.suite --stages extract,filter
+#   python -m benchmarks.suite --save-baseline
+#   python -m benchmarks.suite --compare [--tolerance 0.15]
+#
+# Results go to data/benchmarks/latest.json. --save-baseline also
+# writes them to benchmarks/baseline.json, which is committed so the
+# team compares against the same numbers. --compare exits with status
+# 1 if any stage is slower, or uses more memory, than the baseline by
+# more than the tolerance.
+# -----------------------------------------------------------------
+
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+try:
+    import resource
+except ImportError:
+    # Windows: no getrusage(), peak RSS isn't reported
+    resource = None
+
+import config
+from src import database, extractor, filter, metrics
+from benchmarks.bench_ingest import make_patents
+
+SAMPLE_PDF = config.OUTPUT_DIR / "sample.pdf"
+BENCH_DIR = config.DATA_DIR / "benchmarks"
+LATEST_FILE = BENCH_DIR / "latest.json"
+# Tracked in git, unlike the rest of BENCH_DIR
+BASELINE_FILE = config.BASE_DIR / "benchmarks" / "baseline.json"
+
+SIZES = {'1k': 1000, '10k': 10000, '100k': 100000}
+DEFAULT_SIZES = '1k,10k'
+STAGES = ('extract', 'db_insert', 'db_update', 'filter')
+DEFAULT_TOLERANCE = 0.15
+# Runs per stage (the median is reported): a 1k stage takes well under
+# a second, so single runs are too noisy to compare
+DEFAULT_REPEAT = 3
+
+# Pages per synthetic PDF. Bigger journals are split into volumes,
+# extracted one after another like a journal's parts: PyMuPDF slows
+# down more than linearly when appending pages to one huge document.
+PAGES_PER_VOLUME = 10000
+
+APP_NO_REGEX = re.compile(r"\(21\) Application No\.\s*\d+")
+
+
+# --- Synthetic data ---
+
+def _template_pages():
+    doc = fitz.open(SAMPLE_PDF)
+    pages = [page.get_text() for page in doc]
+    doc.close()
+    return [page for page in pages if APP_NO_REGEX.search(page)]
+
+
+def _render_volume(templates, first, count, path):
+    doc = fitz.open()
+    for i in range(first, first + count):
+        text = APP_NO_REGEX.sub(f"(21) Application No.{209900000000 + i}", templates[i % len(templates)], count=1)
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((20, 20), text, fontsize=5)
+    temp_path = path.with_name(path.name + ".tmp")
+    doc.save(temp_path, deflate=True)
+    doc.close()
+    temp_path.replace(path)
+
+
+def synthetic_journal(size):
+    """
+    Returns the PDF volumes of a journal with 'size' patents, one per
+    page (application numbers 209900000000 and up), generating any
+    that don't exist yet. Sizes share volumes: the 10k journal is the
+    first volume of the 100k one.
+    """
+    volumes = []
+    templates = None
+    for first in range(0, size, PAGES_PER_VOLUME):
+        count = min(PAGES_PER_VOLUME, size - first)
+        path = BENCH_DIR / f"journal_{first}_{count}.pdf"
+        if not path.exists():
+            if templates is None:
+                BENCH_DIR.mkdir(parents=True, exist_ok=True)
+                templates = _template_pages()
+            print(f"  Generating synthetic journal pages {first + 1}-{first + count} (once)...")
+            _render_volume(templates, first, count, path)
+        volumes.append(path)
+    return volumes
+
+
+def _fresh_database(tmp_dir):
+    config.DATABASE_FILE = Path(tmp_dir) / "bench.db"
+    database.create_tables()
+
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+# --- Stages (each runs in its own process) ---
+
+class _TimingWriter:
+    """
+    Stands in for the PatentWriter given to _process_pdf(): passes
+    every call through and records the time between patents.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.latencies = []
+        self._last = time.perf_counter()
+
+    def add(self, patent):
+        self.writer.add(patent)
+        now = time.perf_counter()
+        self.latencies.append(now - self._last)
+        self._last = now
+
+    def checkpoint(self, journal_id, part, last_page):
+        self.writer.checkpoint(journal_id, part, last_page)
+
+
+def stage_extract(size):
+    found = 0
+    start = time.perf_counter()
+    with database.PatentWriter() as writer:
+        timing = _TimingWriter(writer)
+        for volume, pdf_path in enumerate(synthetic_journal(size)):
+            found += extractor._process_pdf(pdf_path, f"VOLUME_{volume}", timing, "bench_journal")[0]
+    seconds = time.perf_counter() - start
+    run = metrics.current_run()
+    return {
+        'items': found,
+        'seconds': seconds,
+        'latencies': timing.latencies,
+        'get_text_seconds': run['breakdown']['get_text'],
+        'parse_seconds': run['breakdown']['parse'],
+    }
+
+
+def stage_db_insert(size):
+    patents = make_patents(size)
+    latencies = []
+    start = time.perf_counter()
+    for chunk in _chunks(patents, config.DB_WRITE_CHUNK_SIZE):
+        chunk_start = time.perf_counter()
+        database.insert_patents(chunk)
+        latencies += [(time.perf_counter() - chunk_start) / len(chunk)] * len(chunk)
+    return {'items': size, 'seconds': time.perf_counter() - start, 'latencies': latencies}
+
+
+def stage_db_update(size):
+    patents = make_patents(size)
+    database.insert_patents(patents)
+    classifications = [
+        (patent['application_no'],) + filter.classify_ipc_string(patent['international_classification'])
+        for patent in patents
+    ]
+    latencies = []
+    start = time.perf_counter()
+    for batch in _chunks(classifications, config.FILTER_BATCH_SIZE):
+        batch_start = time.perf_counter()
+        database.update_patent_classifications(batch)
+        latencies += [(time.perf_counter() - batch_start) / len(batch)] * len(batch)
+    return {'items': size, 'seconds': time.perf_counter() - start, 'latencies': latencies}
+
+
+def stage_filter(size):
+    database.insert_patents(make_patents(size))
+    latencies = []
+    iter_batches = database.iter_patents_to_classify
+
+    def timed_batches(batch_size=None):
+        # Time from handing out a batch to the filter asking for the
+        # next one: classify + update (+ the next keyset page read)
+        for batch in iter_batches(batch_size):
+            batch_start = time.perf_counter()
+            yield batch
+            latencies.extend([(time.perf_counter() - batch_start) / len(batch)] * len(batch))
+
+    database.iter_patents_to_classify = timed_batches
+    start = time.perf_counter()
+    filter.run_filter()
+    seconds = time.perf_counter() - start
+    classified = database.get_db_connection().execute(
+        "SELECT COUNT(*) FROM patents WHERE status = 'classified'"
+    ).fetchone()[0]
+    return {'items': classified, 'seconds': seconds, 'latencies': latencies}
+
+
+STAGE_FUNCTIONS = {
+    'extract': stage_extract,
+    'db_insert': stage_db_insert,
+    'db_update': stage_db_update,
+    'filter': stage_filter,
+}
+
+
+def _peak_rss_mb():
+    # Linux: VmHWM is this process's own high-water mark. ru_maxrss
+    # would include the parent's, which Linux carries across fork+exec.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # bytes on macOS
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 / 1024, 1)
+
+
+def _run_stage(stage, size):
+    """
+    Entry point of a stage process. Returns its result dict.
+    """
+    config.TEXT_CACHE_ENABLED = False
+    metrics.reset()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The pipeline's progress output would swamp the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            _fresh_database(tmp_dir)
+            result = STAGE_FUNCTIONS[stage](size)
+        database.close_db_connection()
+
+    latencies = sorted(result.pop('latencies'))
+    if result['items'] != size:
+        raise RuntimeError(f"{stage} processed {result['items']} of {size} items")
+    result.update({
+        'items_per_sec': round(result['items'] / result['seconds'], 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 4),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 4),
+        'peak_rss_mb': _peak_rss_mb(),
+        'seconds': round(result['seconds'], 3),
+    })
+    return result
+
+
+def run_stage(stage, size, repeat):
+    """
+    Runs a stage 'repeat' times, each in a fresh process, and returns
+    the median of every number.
+    """
+    runs = []
+    for _ in range(repeat):
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            runs.append(pool.submit(_run_stage, stage, size).result())
+    result = {'stage': stage, 'size': size, 'repeat': repeat}
+    for key, value in runs[0].items():
+        if isinstance(value, (int, float)):
+            result[key] = statistics.median(run[key] for run in runs)
+        else:
+            result[key] = value
+    return result
+
+
+# --- Reporting and baselines ---
+
+def _environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=config.BASE_DIR,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'sqlite': sqlite3.sqlite_version,
+        'pymupdf': fitz.VersionBind,
+        'git_commit': commit,
+    }
+
+
+def _key(result):
+    return f"{result['stage']}/{result['size']}"
+
+
+def _print_result(result):
+    rss = f"{result['peak_rss_mb']:8.1f}" if result['peak_rss_mb'] is not None else f"{'n/a':>8}"
+    line = (f"  {result['stage']:<10} {result['size']:>7}  {result['items_per_sec']:>12.1f}  "
+            f"{result['p50_ms']:>9.4f}  {result['p95_ms']:>9.4f}  {rss}")
+    if 'get_text_seconds' in result:
+        line += f"   (get_text {result['get_text_seconds']:.2f}s, parse {result['parse_seconds']:.2f}s)"
+    print(line)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints each result against its baseline. Returns the number of
+    regressions (worse than the baseline by more than 'tolerance').
+    """
+    print(f"\n--- Compared with baseline of {baseline['created_at']} "
+          f"(commit {baseline['environment'].get('git_commit')}, tolerance {tolerance:.0%}) ---")
+    if baseline['environment'].get('machine') != platform.machine():
+        print("  Note: the baseline was recorded on a different machine type.")
+
+    regressions = 0
+    for key, result in results.items():
+        before = baseline['results'].get(key)
+        if before is None:
+            print(f"  {key:<18} no baseline")
+            continue
+        checks = [
+            ('throughput', before['items_per_sec'] / result['items_per_sec'] - 1),
+            ('p95', result['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0),
+        ]
+        if result['peak_rss_mb'] is not None and before.get('peak_rss_mb'):
+            checks.append(('peak RSS', result['peak_rss_mb'] / before['peak_rss_mb'] - 1))
+        worse = [f"{name} {change:+.0%}" for name, change in checks if change > tolerance]
+        change = result['items_per_sec'] / before['items_per_sec'] - 1
+        if worse:
+            regressions += 1
+            print(f"  ✗ {key:<18} REGRESSION: {', '.join(worse)} worse")
+        else:
+            print(f"  ✓ {key:<18} throughput {change:+.0%}")
+    return regressions
+
+
+def _option(name, default=None):
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
+
+
+def main():
+    sizes = _option('--sizes', DEFAULT_SIZES).split(',')
+    stages = _option('--stages', ','.join(STAGES)).split(',')
+    repeat = int(_option('--repeat', str(DEFAULT_REPEAT)))
+    tolerance = float(_option('--tolerance', str(DEFAULT_TOLERANCE)))
+    unknown = [size for size in sizes if size not in SIZES] + [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        print(f"Unknown size or stage: {', '.join(unknown)} "
+              f"(sizes: {', '.join(SIZES)}; stages: {', '.join(STAGES)})")
+        return 2
+
+    print(f"--- Benchmark suite: {', '.join(stages)} at {', '.join(sizes)} patents "
+          f"(median of {repeat}) ---")
+    if 'extract' in stages:
+        for size in sizes:
+            synthetic_journal(SIZES[size])
+
+    print(f"\n  {'stage':<10} {'items':>7}  {'items/sec':>12}  {'p50 ms':>9}  {'p95 ms':>9}  {'peak MB':>8}")
+    results = {}
+    for size in sizes:
+        for stage in stages:
+            result = run_stage(stage, SIZES[size], repeat)
+            results[_key(result)] = result
+            _print_result(result)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': _environment(),
+        'results': results,
+    }
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    LATEST_FILE.write_text(json.dumps(report, indent=2))
+    print(f"\nResults saved to {LATEST_FILE}")
+
+    if '--save-baseline' in sys.argv:
+        if BASELINE_FILE.exists():
+            # Merge, so a partial run only replaces what it measured
+            baseline = json.loads(BASELINE_FILE.read_text())
+            baseline['results'].update(results)
+            baseline['created_at'] = report['created_at']
+            baseline['environment'] = report['environment']
+        else:
+            baseline = report
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2))
+        print(f"Baseline saved to {BASELINE_FILE}")
+
+    if '--compare' in sys.argv:
+        if not BASELINE_FILE.exists():
+            print(f"No baseline yet: run with --save-baseline first ({BASELINE_FILE}).")
+            if (BENCH_DIR / "baseline.json").exists():
+                print(f"  (A baseline from before it was tracked is in {BENCH_DIR}: move it there.)")
+            return 2
+        if compare(results, json.loads(BASELINE_FILE.read_text()), tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
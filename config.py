@@ -37,11 +37,51 @@ DOCUMENTS_HTML = OUTPUT_DIR / "view_documents.html"
 REAL_STATUS_HTML = OUTPUT_DIR / "real_status_page.html"
 # --- Database Settings ---
 DATABASE_FILE = BASE_DIR / "data" / "patents.db"
+# Number of patents written per executemany() + commit
+DB_WRITE_CHUNK_SIZE = 500
+# Seconds a connection waits for another process's write lock before
+# raising 'database is locked'
+DB_BUSY_TIMEOUT = 30
+# Bytes of the database file read through a memory map (0 disables it)
+DB_MMAP_SIZE = 256 * 1024 * 1024
+# Page cache per connection, in KiB
+DB_CACHE_SIZE_KB = 64 * 1024
+# Rows per transaction when a migration backfills existing patents
+MIGRATION_CHUNK_SIZE = 10000
+
+# --- Extractor Settings ---
+# Default number of worker processes ('extract --workers N' overrides it)
+EXTRACTOR_WORKERS = 1
+# Pages handed to a worker process at a time in parallel mode
+EXTRACTOR_PAGES_PER_SHARD = 50
+
+# --- Page-Text Cache Settings ---
+# Rendered page text, keyed by PDF SHA-256 (see src/textcache.py)
+TEXT_CACHE_ENABLED = True
+TEXT_CACHE_FILE = DATA_DIR / "page_text_cache.db"
+# Least recently used PDFs are evicted above this (compressed) size
+TEXT_CACHE_MAX_MB = 1024
+
+# --- Verifier Settings ---
+# Threads used by 'verify' to hash the PDFs in RAW_PDF_DIR
+VERIFY_WORKERS = 4
+
+# --- Filter Settings ---
+# Number of patents read, classified, and written per batch
+FILTER_BATCH_SIZE = 2000
 
 # --- Downloader Settings ---
 DOWNLOADER_BASE_URL = 'https://search.ipindia.gov.in/IPOJournal/Journal/Patent'
 # Don't download journals older than '44/2025'
 DOWNLOADER_BASELINE_SERIAL = '44/2025'
+# Journal PDFs are fetched by POSTing their 'FileName' to this URL
+DOWNLOADER_VIEW_URL = 'https://search.ipindia.gov.in/IPOJournal/Journal/ViewJournal'
+# Max journal parts downloaded at the same time (also the connection pool size)
+DOWNLOADER_MAX_CONCURRENCY = 4
+# Seconds to wait for the server to respond (connect / between chunks)
+DOWNLOADER_TIMEOUT = 60
+# Bytes read from the network per write to disk
+DOWNLOADER_CHUNK_SIZE = 64 * 1024
 
 # --- Searcher Settings ---
 SEARCH_BASE_URL = "https.ipindia.gov.in/PublicSearch/"
@@ -51,4 +91,58 @@ SEARCH_POST_URL = "https.ipindia.gov.in/PublicSearch/PublicationSearch/Search"
 REQUESTS_HEADER = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Referer': SEARCH_BASE_URL
-}
\ No newline at end of file
+}
+# A solved CAPTCHA keeps a session searching until the portal expires
+# it; sessions are retired earlier than that to avoid mid-search drops
+SEARCH_SESSION_MAX_AGE = 20 * 60
+SEARCH_SESSION_MAX_SEARCHES = 200
+
+# --- Retriever Settings ---
+# Patents claimed from the database per 'retrieve' run ('--limit N' overrides it)
+RETRIEVER_BATCH_SIZE = 50
+# CAPTCHAs fetched ahead of the one being solved (one session each)
+RETRIEVER_CAPTCHA_PREFETCH = 5
+# Threads running the post-CAPTCHA stages (search -> View Documents)
+RETRIEVER_WORKERS = 4
+# Optional automatic solver as "module:function", called with the image
+# bytes and returning the text (None asks a human at the prompt)
+RETRIEVER_CAPTCHA_SOLVER = None
+# One CAPTCHA image per patent waiting to be solved
+CAPTCHA_DIR = OUTPUT_DIR / "captchas"
+# The 'View Documents' page of every retrieved patent
+DOCUMENTS_DIR = OUTPUT_DIR / "documents"
+
+# --- Scheduler ('serve') Settings ---
+# Seconds between checks of the journal website for new journals
+SERVE_DOWNLOAD_INTERVAL = 30 * 60
+# Seconds an idle stage waits before re-checking its database queue
+# (picks up work queued by other commands, e.g. a manual 'reset')
+SERVE_POLL_INTERVAL = 60
+# Journals waiting between two stages before the stage before them
+# pauses (backpressure)
+SERVE_QUEUE_SIZE = 2
+
+# --- Metrics Settings ---
+# Every pipeline command records its timings and counts (see
+# src/metrics.py) as one row of the 'pipeline_runs' table
+METRICS_ENABLED = True
+# Also write each run to METRICS_DIR: None, 'json' or 'prometheus'
+# (one '<command>.json' / '<command>.prom' file, replaced every run)
+METRICS_EXPORT = None
+METRICS_DIR = OUTPUT_DIR / "metrics"
+# Upper bounds, in seconds, of the database commit latency histogram
+METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+# --- Profiler Settings ---
+# 'python main.py <command> --profile [cprofile|sample]' (see src/profiling.py)
+PROFILE_DIR = OUTPUT_DIR / "profiles"
+# Seconds between stack samples in 'sample' mode
+PROFILE_SAMPLE_INTERVAL = 0.005
+# Functions listed in the summary printed when the command ends
+PROFILE_TOP_N = 15
+
+# --- Export Settings ---
+# 'python main.py export' writes here unless given --output
+EXPORT_DIR = OUTPUT_DIR / "exports"
+# Rows read per fetchmany(), and rows per Parquet row group
+EXPORT_BATCH_SIZE = 10000
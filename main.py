@@ -6,53 +6,231 @@
 # To run a specific step:
 #   python main.py download
 #   python main.py extract
+#   python main.py extract --workers 4
 #   python main.py filter
-#   python main.py search [application_number]
+#   python main.py serve
+#   python main.py verify
+#   python main.py query "drone delivery"
+#   python main.py query --ipc G06Q
+#   python main.py search [application_number ...]
+#   python main.py search --status classified --type Software --limit 10
+#   python main.py retrieve --limit 20
+#   python main.py runs
+#   python main.py export parquet --type Software
+#
+# Any command can be profiled (see src/profiling.py):
+#   python main.py extract --workers 1 --profile
+#   python main.py serve --profile sample
 #
 # -----------------------------------------------------------------
 
 import sys
-# Make sure all modules are imported
-from src import database, downloader, extractor, filter, searcher
+import config
+# Each command imports only the src modules it needs, when it runs:
+# 'init' or 'reset' must not pay for requests or PyMuPDF
+# (benchmarks/bench_startup.py keeps them under STARTUP_BUDGET_MS)
+from src import profiling
+
+# Commands whose timings and counts are saved to 'pipeline_runs'
+RECORDED_COMMANDS = ('download', 'extract', 'filter', 'all', 'serve', 'search', 'retrieve')
+
+def get_option(name, default=None):
+    """
+    Returns the value following a '--name value' flag in sys.argv,
+    or 'default' if the flag isn't present.
+    """
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
 
 def main():
     """
     Parses command-line arguments to run the correct
     part of the pipeline.
     """
+    try:
+        profile = profiling.profile_mode(sys.argv)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
     # Get the command (e.g., 'download') from the user
     if len(sys.argv) < 2:
         print_help()
         return
 
     command = sys.argv[1].lower()
+    recorded = command in RECORDED_COMMANDS and config.METRICS_ENABLED
+    if recorded:
+        from src import metrics
+        metrics.start_run(command)
+    profiler = profiling.start(profile) if profile else None
+    status = 'error'
+    try:
+        run_command(command)
+        status = 'ok'
+    except KeyboardInterrupt:
+        status = 'interrupted'
+        raise
+    finally:
+        if profiler:
+            profiler.stop()
+        run_id = record_run(status) if recorded else None
+        if profiler:
+            profiling.save(profiler, command, run_id)
+
+def record_run(status):
+    """
+    Saves the metrics of the command that just ran and prints a summary.
+    Returns the run's ID.
+    """
+    from src import database, metrics
+    run = metrics.finish_run(status)
+    run_id = database.save_pipeline_run(run)
+    print(f"\nRun #{run_id} ({run['command']}, {status}): {metrics.format_summary(run)}")
+    export_path = metrics.write_export(run)
+    if export_path:
+        print(f"  Metrics written to {export_path}")
+    return run_id
 
+def run_command(command):
+    """
+    Runs one command, with its options read from sys.argv.
+    """
     if command == 'download':
+        from src import downloader
         downloader.run_downloader()
         
     elif command == 'extract':
-        extractor.run_extractor()
+        from src import extractor
+        workers = get_option('--workers')
+        if workers is not None and not workers.isdigit():
+            print(f"Error: --workers must be a number, got '{workers}'.")
+            return
+        extractor.run_extractor(int(workers) if workers else None)
         
     elif command == 'filter':
+        from src import filter
         filter.run_filter()
         
-    elif command == 'search':
-        app_no = None
-        if len(sys.argv) > 2:
-            app_no = sys.argv[2]
-            print(f"Search target: {app_no}")
+    elif command == 'cache':
+        from src import textcache
+        action = sys.argv[2].lower() if len(sys.argv) > 2 else 'stats'
+        if action == 'stats':
+            textcache.print_stats()
+        elif action == 'clear':
+            textcache.clear()
+        elif action == 'evict':
+            textcache.evict()
+            textcache.print_stats()
+        else:
+            print(f"Unknown cache action: '{action}'")
+            print("Usage: python main.py cache [stats|clear|evict]")
+        
+    elif command == 'verify':
+        from src import verifier
+        workers = get_option('--workers')
+        if workers is not None and not workers.isdigit():
+            print(f"Error: --workers must be a number, got '{workers}'.")
+            return
+        verifier.run_verifier(int(workers) if workers else None)
+        
+    elif command == 'query':
+        from src import query
+        limit = get_option('--limit', '20')
+        ipc = get_option('--ipc')
+        options = ('--limit', '--ipc')
+        terms = " ".join(arg for i, arg in enumerate(sys.argv[2:], start=2)
+                         if arg not in options and sys.argv[i - 1] not in options)
+        if not limit.isdigit() or int(limit) < 1:
+            print(f"Error: --limit must be a number, got '{limit}'.")
+            return
+        if ipc and not terms:
+            query.run_ipc_query(ipc, int(limit))
+        elif terms and not ipc:
+            query.run_query(terms, int(limit))
         else:
-            print("No application number provided. Running search with default test data.")
-        searcher.run_searcher(app_no)
+            print("Error: Please provide search terms OR an --ipc prefix.")
+            print('Usage: python main.py query "<terms>" [--limit N]')
+            print('       python main.py query --ipc G06Q [--limit N]')
+        
+    elif command == 'search':
+        from src import searcher
+        options = ('--status', '--type', '--ipc', '--limit')
+        app_nos = []
+        for i, arg in enumerate(sys.argv[2:], start=2):
+            if arg in options or sys.argv[i - 1] in options:
+                continue
+            if app_nos and arg.isalpha() and len(arg) <= 2 and app_nos[-1].isdigit():
+                # "202511087359 A" typed without quotes
+                app_nos[-1] += " " + arg
+            else:
+                app_nos.append(arg)
+        limit = get_option('--limit')
+        if limit is not None and (not limit.isdigit() or int(limit) < 1):
+            print(f"Error: --limit must be a number, got '{limit}'.")
+            return
+        if app_nos:
+            print(f"Search target: {', '.join(app_nos)}")
+        searcher.run_searcher(
+            app_nos,
+            status=get_option('--status'),
+            patent_type=get_option('--type'),
+            ipc=get_option('--ipc'),
+            limit=int(limit) if limit else None
+        )
+        
+    elif command == 'retrieve':
+        from src import retriever
+        limit = get_option('--limit')
+        if limit is not None and (not limit.isdigit() or int(limit) < 1):
+            print(f"Error: --limit must be a number, got '{limit}'.")
+            return
+        retriever.run_retriever(int(limit) if limit else None, include_errors='--retry-errors' in sys.argv)
         
     elif command == 'all':
+        from src import downloader, extractor, filter
         print("--- Running Full Pipeline (Download, Extract, Filter) ---")
         downloader.run_downloader()
         extractor.run_extractor()
         filter.run_filter()
         print("\nFull pipeline complete.")
         
+    elif command == 'serve':
+        from src import scheduler
+        workers = get_option('--workers')
+        if workers is not None and not workers.isdigit():
+            print(f"Error: --workers must be a number, got '{workers}'.")
+            return
+        scheduler.run_scheduler(int(workers) if workers else None)
+        
+    elif command == 'export':
+        from src import exporter
+        fmt = sys.argv[2].lower() if len(sys.argv) > 2 and not sys.argv[2].startswith('--') else 'ndjson'
+        exporter.run_export(
+            fmt,
+            output=get_option('--output'),
+            status=get_option('--status'),
+            patent_type=get_option('--type'),
+            date_from=get_option('--from'),
+            date_to=get_option('--to'),
+            filed_from=get_option('--filed-from'),
+            filed_to=get_option('--filed-to'),
+            compress='--gzip' in sys.argv
+        )
+        
+    elif command == 'runs':
+        from src import database, metrics
+        limit = get_option('--limit', '10')
+        if not limit.isdigit() or int(limit) < 1:
+            print(f"Error: --limit must be a number, got '{limit}'.")
+            return
+        metrics.print_runs(database.get_pipeline_runs(int(limit), get_option('--command')))
+        
     elif command == 'init':
+        from src import database
         print("--- Initializing Database ---")
         if database.create_tables():
             print("\nDatabase initialized successfully.")
@@ -60,26 +238,50 @@ def main():
             print("\nDatabase initialization FAILED.")
 
     elif command == 'migrate':
+        from src import database
         print("--- Running Database Migrations ---")
         database.add_publication_type_column()
+        database.add_extraction_progress_table()
+        database.add_journal_checksum_columns()
+        database.add_applicant_inventor_columns()
+        database.add_fulltext_index()
+        database.add_patent_ipc_table()
+        database.add_status_indexes()
+        database.add_pipeline_runs_table()
+        database.add_iso_date_columns()
         print("Migration complete.")
 
     elif command == 'reset':
-        if len(sys.argv) < 3:
+        from src import database
+        if len(sys.argv) < 3 or sys.argv[2].startswith('--'):
             print("Error: Please provide a journal_id to reset.")
-            print("Usage: python main.py reset [journal_id]")
+            print("Usage: python main.py reset [journal_id] [--from-page N] [--part I|II]")
             print("Example: python main.py reset 44_2025")
             return
         
         journal_id_to_reset = sys.argv[2]
-        database.reset_journal_status(journal_id_to_reset)
+        from_page = get_option('--from-page')
+        part = get_option('--part')
+        if from_page is not None and (not from_page.isdigit() or int(from_page) < 1):
+            print(f"Error: --from-page must be a page number (1 or more), got '{from_page}'.")
+            return
+        if part is not None and part.upper() not in database.JOURNAL_PARTS:
+            print(f"Error: --part must be 'I' or 'II', got '{part}'.")
+            return
+        database.reset_journal_status(
+            journal_id_to_reset,
+            from_page=int(from_page) if from_page else None,
+            part=part.upper() if part else None
+        )
     
     elif command == 'clear':
+        from src import database
         print("--- Clearing 'patents' table ---")
         database.clear_patents_table()
     
     # --- NEW COMMAND BLOCK ---
     elif command == 'reset-patents':
+        from src import database
         print("--- Resetting patent classification status ---")
         database.reset_patents_to_newly_extracted()
     # --- END NEW COMMAND BLOCK ---
@@ -94,18 +296,46 @@ def print_help():
     print("\nAvailable Commands:")
     print("  download    - Download new journals from the website.")
     print("  extract     - Extract patent data from downloaded PDFs.")
+    print("                [--workers N] parse each PDF with N processes.")
     print("  filter      - Filter all patents for software/hybrid ones.")
-    print("  search [app] - Run the 'human-in-the-loop' search for a")
-    print("                 specific application number (e.g., '202511087359 A')")
-    print("                 (If no app number is given, runs in test mode).")
+    print("  cache stats - Show the page-text cache size and hit rate.")
+    print("  cache clear - Empty the page-text cache (evict: trim it to its size limit).")
+    print("  verify      - Check every downloaded PDF against its recorded SHA-256.")
+    print("                [--workers N] hash N files at a time.")
+    print('  query "<terms>" - Full-text search of titles, abstracts, applicants')
+    print("                and inventors, best match first. [--limit N] (default 20)")
+    print("  query --ipc G06Q - List classified patents under an IPC subclass or code prefix.")
+    print("  search [app ...] - Run the 'human-in-the-loop' search for one or more")
+    print("                 application numbers (e.g., '202511087359 A'), reusing one")
+    print("                 CAPTCHA until the session expires. Or select patents with")
+    print("                 [--status S] [--type Software|Hybrid] [--ipc G06Q] [--limit N]")
+    print("                 (If no app number or filter is given, runs in test mode).")
+    print("  retrieve    - Fetch the documents of classified Software/Hybrid patents,")
+    print("                solving their CAPTCHAs back to back from a prefetched queue.")
+    print("                [--limit N] patents this run  [--retry-errors] retry failed ones")
     print("  all         - Run the full download, extract, and filter pipeline.")
+    print("  serve       - Run download, extract, and filter continuously, overlapped:")
+    print("                each journal is extracted and classified as soon as it is")
+    print("                downloaded. [--workers N] extractor processes. Ctrl+C stops.")
+    print("  export [ndjson|parquet] - Stream the patents table to data/output/exports/:")
+    print("                NDJSON (add --gzip to compress) or Parquet (needs pyarrow).")
+    print("                [--status S] [--type Software|Hybrid] [--from YYYY-MM-DD] [--to YYYY-MM-DD]")
+    print("                (publication date range)  [--filed-from D] [--filed-to D]  [--output PATH]")
+    print("  runs        - Show the timings of recent pipeline runs (network, get_text,")
+    print("                parsing, database commits; pages/s and patents/s).")
+    print("                [--limit N] runs (default 10)  [--command extract] only one command")
     print("  init        - Initialize the SQLite database and create tables.")
     print("  migrate     - Run any new database schema upgrades.")
     print("  reset [id]  - Reset a journal's status to 'downloaded'")
     print("                (e.g., python main.py reset 44_2025)")
+    print("                [--from-page N] re-extract from page N instead of page 1")
+    print("                [--part I|II]   ...for only one part of the journal")
     print("  clear       - Deletes ALL patents from the 'patents' table.")
     # --- NEW HELP TEXT ---
     print("  reset-patents - Resets all 'classified' patents back to 'newly_extracted'.")
+    print("\n  Add --profile to any command to profile it: cProfile by default, or")
+    print("  --profile sample for low-overhead stack sampling of every thread")
+    print("  (or set PATENT_WATCH_PROFILE=cprofile|sample). Files go to data/output/profiles/.")
 
 
 if __name__ == "__main__":
@@ -1,31 +1,245 @@
 # src/database.py
 
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 import config
 import json
+from . import metrics
+from . import utils
+from .records import Patent
 
 # -----------------------------------------------------------------
 # SHARED FUNCTIONS
 # -----------------------------------------------------------------
+# Each thread (and each process) keeps ONE open connection, created on
+# first use and reused by every helper below, instead of connecting
+# and closing again for every call.
+#
+# The database runs in WAL mode: readers never block the writer and
+# the writer never blocks readers, so a 'query' or 'search' can read
+# 'patents' while 'extract' is writing to it. Only two WRITERS still
+# take turns, waiting up to DB_BUSY_TIMEOUT seconds for each other.
+# -----------------------------------------------------------------
+
+_local = threading.local()
+
+def _open_connection():
+    """
+    Opens a new connection with the pipeline's pragmas applied.
+    """
+    conn = sqlite3.connect(config.DATABASE_FILE, timeout=config.DB_BUSY_TIMEOUT)
+    # Return rows as dictionaries (like objects) instead of tuples
+    conn.row_factory = sqlite3.Row
+    # WAL is stored in the file, but setting it again is a no-op
+    conn.execute("PRAGMA journal_mode = WAL")
+    # In WAL mode, NORMAL only skips the fsync on each commit: a power
+    # cut can lose the last commits, but never corrupts the database.
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA mmap_size = {int(config.DB_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA cache_size = -{int(config.DB_CACHE_SIZE_KB)}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
 
 def get_db_connection():
     """
-    Creates and returns a connection to the SQLite database.
+    Returns this thread's shared connection to the SQLite database,
+    opening it on first use. Returns None if it can't be opened.
+
+    Callers must NOT close it. Use transaction() to write.
     """
-    conn = None
-    try:
-        conn = sqlite3.connect(config.DATABASE_FILE)
-        # Return rows as dictionaries (like objects) instead of tuples
-        conn.row_factory = sqlite3.Row
+    key = (os.getpid(), str(config.DATABASE_FILE))
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.key == key:
         return conn
+
+    if conn is not None and _local.key[0] == os.getpid():
+        # config.DATABASE_FILE was changed (e.g. by a benchmark)
+        conn.close()
+    # (A connection inherited from a parent process is never used or
+    # closed here; SQLite connections must not cross a fork.)
+    _local.conn = None
+
+    try:
+        _local.conn = _open_connection()
+        _local.key = key
+        _local.depth = 0
+        return _local.conn
     except sqlite3.Error as e:
         print(f"Error connecting to database: {e}")
         return None
 
+def close_db_connection():
+    """
+    Closes this thread's shared connection, if it has one.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.key[0] == os.getpid():
+        conn.close()
+    _local.conn = None
+
+@contextmanager
+def transaction():
+    """
+    Hands out this thread's connection inside a transaction:
+
+        with database.transaction() as conn:
+            conn.execute(...)
+
+    Commits when the block ends, or rolls back and re-raises if it
+    raises. Nested blocks join the outermost transaction.
+
+    Raises:
+        sqlite3.Error if no connection could be opened.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise sqlite3.Error(f"Could not open database {config.DATABASE_FILE}.")
+
+    _local.depth += 1
+    try:
+        yield conn
+        if _local.depth == 1:
+            started = time.perf_counter()
+            conn.commit()
+            metrics.observe('db.commit', time.perf_counter() - started)
+    except BaseException:
+        if _local.depth == 1:
+            conn.rollback()
+        raise
+    finally:
+        _local.depth -= 1
+
+def _execute_script(conn, script):
+    """
+    Runs the statements of a schema script (CREATE TABLE / INDEX /
+    TRIGGER ...) one by one inside the caller's transaction().
+
+    conn.executescript() would COMMIT the open transaction first, so a
+    failing migration could leave half of its schema changes behind.
+    """
+    # DDL does not open a transaction by itself in sqlite3
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        # Not complete until its ';' (for a trigger, until 'END;')
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
 # -----------------------------------------------------------------
 # 'init' COMMAND (main.py)
 # -----------------------------------------------------------------
 
+# One row per journal part: the last page whose patents are committed.
+# A restarted extraction resumes from last_page + 1.
+CREATE_EXTRACTION_PROGRESS_SQL = """
+CREATE TABLE IF NOT EXISTS extraction_progress (
+    journal_id TEXT NOT NULL,
+    part TEXT NOT NULL,
+    last_page INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (journal_id, part)
+);
+"""
+
+# Full-text index over the searchable text of 'patents' (see 'query').
+# It is an "external content" FTS5 table: it stores only the index and
+# reads the text itself from 'patents'. The triggers keep it in sync
+# with every insert, update and delete, so the extractor's inserts are
+# indexed as they are written.
+#
+# The index is keyed by the patents rowid, which VACUUM may renumber:
+# after a VACUUM, run 'migrate' to rebuild the index.
+CREATE_PATENTS_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS patents_fts USING fts5(
+    title, abstract, applicant, inventor,
+    content='patents', content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS patents_fts_insert AFTER INSERT ON patents BEGIN
+    INSERT INTO patents_fts (rowid, title, abstract, applicant, inventor)
+    VALUES (new.rowid, new.title, new.abstract, new.applicant, new.inventor);
+END;
+CREATE TRIGGER IF NOT EXISTS patents_fts_delete AFTER DELETE ON patents BEGIN
+    INSERT INTO patents_fts (patents_fts, rowid, title, abstract, applicant, inventor)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.applicant, old.inventor);
+END;
+CREATE TRIGGER IF NOT EXISTS patents_fts_update
+AFTER UPDATE OF title, abstract, applicant, inventor ON patents BEGIN
+    INSERT INTO patents_fts (patents_fts, rowid, title, abstract, applicant, inventor)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.applicant, old.inventor);
+    INSERT INTO patents_fts (rowid, title, abstract, applicant, inventor)
+    VALUES (new.rowid, new.title, new.abstract, new.applicant, new.inventor);
+END;
+"""
+
+# Indexes for the status work queues
+CREATE_INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS idx_journals_status ON journals (status);
+CREATE INDEX IF NOT EXISTS idx_patents_status ON patents (status, application_no);
+"""
+
+# Date ranges ("published in the last 4 weeks", "filed in Q3") are
+# index range scans on the ISO columns; the raw DD/MM/YYYY text does not
+# sort by date. application_no second, so results within a range come
+# out in a stable order without a sort.
+CREATE_DATE_INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS idx_patents_publication_date_iso ON patents (publication_date_iso, application_no);
+CREATE INDEX IF NOT EXISTS idx_patents_filing_date_iso ON patents (date_of_filing_iso, application_no);
+"""
+
+# One row per pipeline command run (see src/metrics.py). The headline
+# numbers have their own columns; 'metrics' holds the whole run as JSON
+# (timers, counters, commit latency histogram, per-journal summaries).
+CREATE_PIPELINE_RUNS_SQL = """
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    run_id INTEGER PRIMARY KEY,
+    command TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    seconds REAL,
+    pages INTEGER,
+    patents INTEGER,
+    bytes_downloaded INTEGER,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_command ON pipeline_runs (command, run_id);
+"""
+
+# One row per (patent, IPC code), written by the filter, so "every
+# patent in G06Q" is an index seek instead of a LIKE scan over the
+# JSON in patents.ipc_codes. 'subclass' is the first 4 characters
+# (e.g. 'G06Q'); ipc_code is kept as printed in the journal.
+#
+# A patent's rows are dropped when it is deleted or goes back to
+# 'newly_extracted' (re-extracted or 'reset-patents'), and written
+# again when it is classified.
+CREATE_PATENT_IPC_SQL = """
+CREATE TABLE IF NOT EXISTS patent_ipc (
+    application_no TEXT NOT NULL,
+    ipc_code TEXT NOT NULL,
+    subclass TEXT NOT NULL,
+    PRIMARY KEY (application_no, ipc_code)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_patent_ipc_subclass ON patent_ipc (subclass, application_no);
+CREATE INDEX IF NOT EXISTS idx_patent_ipc_code ON patent_ipc (ipc_code);
+CREATE TRIGGER IF NOT EXISTS patent_ipc_delete AFTER DELETE ON patents BEGIN
+    DELETE FROM patent_ipc WHERE application_no = old.application_no;
+END;
+CREATE TRIGGER IF NOT EXISTS patent_ipc_unclassify
+AFTER UPDATE OF status ON patents WHEN new.status = 'newly_extracted' BEGIN
+    DELETE FROM patent_ipc WHERE application_no = new.application_no;
+END;
+"""
+
 def create_tables():
     """
     Initializes the database by creating the 'journals' and 'patents'
@@ -34,10 +248,6 @@ def create_tables():
     Returns:
         True if tables were created successfully, False otherwise.
     """
-    conn = get_db_connection()
-    if not conn:
-        print("Error: Could not create database connection. Tables not created.")
-        return False
 
     # Use 'IF NOT EXISTS' to make this function safe to run multiple times
     create_journals_table_sql = """
@@ -47,7 +257,11 @@ def create_tables():
         part2_pdf_path TEXT,
         status TEXT NOT NULL DEFAULT 'downloaded',
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        part1_sha256 TEXT,
+        part1_bytes INTEGER,
+        part2_sha256 TEXT,
+        part2_bytes INTEGER
     );
     """
     
@@ -64,26 +278,37 @@ def create_tables():
         status TEXT NOT NULL DEFAULT 'newly_extracted',
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        publication_type TEXT
+        publication_type TEXT,
+        applicant TEXT,
+        inventor TEXT,
+        date_of_filing_iso TEXT,
+        publication_date_iso TEXT
     );
     """
 
     try:
-        cursor = conn.cursor()
-        print("Initializing database...")
-        cursor.execute(create_journals_table_sql)
-        print("  ✓ 'journals' table created (or already exists).")
-        cursor.execute(create_patents_table_sql)
-        print("  ✓ 'patents' table created (or already exists).")
-        conn.commit()
-        print("Database initialization complete.")
-        return True
+        with transaction() as conn:
+            print("Initializing database...")
+            _execute_script(conn, create_journals_table_sql)
+            print("  ✓ 'journals' table created (or already exists).")
+            _execute_script(conn, create_patents_table_sql)
+            print("  ✓ 'patents' table created (or already exists).")
+            _execute_script(conn, CREATE_EXTRACTION_PROGRESS_SQL)
+            print("  ✓ 'extraction_progress' table created (or already exists).")
+            _execute_script(conn, CREATE_PATENTS_FTS_SQL)
+            print("  ✓ 'patents_fts' full-text index created (or already exists).")
+            _execute_script(conn, CREATE_PATENT_IPC_SQL)
+            print("  ✓ 'patent_ipc' table created (or already exists).")
+            _execute_script(conn, CREATE_INDEXES_SQL)
+            _execute_script(conn, CREATE_DATE_INDEXES_SQL)
+            print("  ✓ Status and date indexes created (or already exist).")
+            _execute_script(conn, CREATE_PIPELINE_RUNS_SQL)
+            print("  ✓ 'pipeline_runs' table created (or already exists).")
+            print("Database initialization complete.")
+            return True
     except sqlite3.Error as e:
         print(f"Error creating tables: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
 # -----------------------------------------------------------------
 # 'migrate' COMMAND (main.py)
@@ -93,30 +318,206 @@ def add_publication_type_column():
     """
     Adds the 'publication_type' column to the 'patents' table.
     """
-    conn = get_db_connection()
-    if not conn:
-        print("Error: Could not connect to DB for migration.")
-        return
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute("PRAGMA table_info(patents)")
+            columns = [row['name'] for row in cursor.fetchall()]
+        
+            if 'publication_type' not in columns:
+                print("Adding 'publication_type' column to 'patents' table...")
+                cursor.execute("ALTER TABLE patents ADD COLUMN publication_type TEXT")
+                print("  ✓ Column added.")
+            else:
+                print("'publication_type' column already exists.")
+            
+    except sqlite3.Error as e:
+        print(f"Error during migration: {e}")
 
+def add_journal_checksum_columns():
+    """
+    Adds the SHA-256 / byte count columns for each PDF part to the
+    'journals' table.
+    """
+    new_columns = {
+        'part1_sha256': 'TEXT',
+        'part1_bytes': 'INTEGER',
+        'part2_sha256': 'TEXT',
+        'part2_bytes': 'INTEGER',
+    }
     try:
-        cursor = conn.cursor()
+        with transaction() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("PRAGMA table_info(patents)")
-        columns = [row['name'] for row in cursor.fetchall()]
+            cursor.execute("PRAGMA table_info(journals)")
+            columns = [row['name'] for row in cursor.fetchall()]
         
-        if 'publication_type' not in columns:
-            print("Adding 'publication_type' column to 'patents' table...")
-            cursor.execute("ALTER TABLE patents ADD COLUMN publication_type TEXT")
-            conn.commit()
-            print("  ✓ Column added.")
-        else:
-            print("'publication_type' column already exists.")
+            for name, column_type in new_columns.items():
+                if name not in columns:
+                    print(f"Adding '{name}' column to 'journals' table...")
+                    _execute_script(conn, f"ALTER TABLE journals ADD COLUMN {name} {column_type}")
+            print("  ✓ Journal checksum columns ready.")
             
     except sqlite3.Error as e:
         print(f"Error during migration: {e}")
-    finally:
-        if conn:
-            conn.close()
+
+def add_extraction_progress_table():
+    """
+    Adds the 'extraction_progress' checkpoint table.
+    """
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(CREATE_EXTRACTION_PROGRESS_SQL)
+            print("  ✓ 'extraction_progress' table ready.")
+    except sqlite3.Error as e:
+        print(f"Error during migration: {e}")
+
+def add_applicant_inventor_columns():
+    """
+    Adds the 'applicant' and 'inventor' columns to the 'patents' table.
+    Patents extracted before this migration keep NULL in both.
+    """
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("PRAGMA table_info(patents)")
+            columns = [row['name'] for row in cursor.fetchall()]
+
+            for name in ('applicant', 'inventor'):
+                if name not in columns:
+                    print(f"Adding '{name}' column to 'patents' table...")
+                    _execute_script(conn, f"ALTER TABLE patents ADD COLUMN {name} TEXT")
+            print("  ✓ Applicant/inventor columns ready.")
+
+    except sqlite3.Error as e:
+        print(f"Error during migration: {e}")
+
+def add_fulltext_index():
+    """
+    Creates the 'patents_fts' full-text index and its sync triggers,
+    then indexes every patent already in the table.
+    Run add_applicant_inventor_columns() first.
+    """
+    try:
+        with transaction() as conn:
+            _execute_script(conn, CREATE_PATENTS_FTS_SQL)
+            conn.execute("INSERT INTO patents_fts (patents_fts) VALUES ('rebuild')")
+            print("  ✓ 'patents_fts' full-text index ready.")
+    except sqlite3.Error as e:
+        print(f"Error during migration: {e}")
+
+def add_status_indexes():
+    """
+    Adds the indexes on journals/patents 'status'.
+
+    Also drops the old index on the DD/MM/YYYY 'publication_date' text,
+    which doesn't sort by date (see CREATE_DATE_INDEXES_SQL).
+    """
+    try:
+        with transaction() as conn:
+            _execute_script(conn, CREATE_INDEXES_SQL)
+            conn.execute("DROP INDEX IF EXISTS idx_patents_publication_date")
+            conn.execute("ANALYZE")
+            print("  ✓ Status indexes ready.")
+    except sqlite3.Error as e:
+        print(f"Error during migration: {e}")
+
+def add_patent_ipc_table():
+    """
+    Creates the 'patent_ipc' table and fills it from the IPC codes of
+    every patent that is already classified.
+    """
+    try:
+        with transaction() as conn:
+            _execute_script(conn, CREATE_PATENT_IPC_SQL)
+            reader = conn.execute(
+                "SELECT application_no, ipc_codes FROM patents WHERE status = 'classified'"
+            )
+            changes_before = conn.total_changes
+            while True:
+                batch = reader.fetchmany(config.FILTER_BATCH_SIZE)
+                if not batch:
+                    break
+                rows = []
+                for row in batch:
+                    try:
+                        codes = json.loads(row['ipc_codes'] or '[]')
+                    except ValueError:
+                        continue # Not a JSON list: wasn't written by the filter
+                    rows.extend(_ipc_rows(row['application_no'], codes))
+                conn.executemany(INSERT_PATENT_IPC_SQL, rows)
+            backfilled = conn.total_changes - changes_before
+            print(f"  ✓ 'patent_ipc' table ready ({backfilled} codes backfilled).")
+    except sqlite3.Error as e:
+        print(f"Error during migration: {e}")
+
+def add_iso_date_columns(chunk_size=None):
+    """
+    Adds the 'date_of_filing_iso' and 'publication_date_iso' columns,
+    fills them in for the patents already extracted, then indexes them.
+
+    The backfill commits every 'chunk_size' rows (MIGRATION_CHUNK_SIZE),
+    so other commands can write in between and an interrupted run
+    simply continues with the rows still missing their ISO dates.
+    """
+    chunk_size = chunk_size or config.MIGRATION_CHUNK_SIZE
+    select_sql = """
+    SELECT rowid, date_of_filing, publication_date FROM patents
+    WHERE rowid > ?
+      AND ((date_of_filing_iso IS NULL AND date_of_filing IS NOT NULL)
+        OR (publication_date_iso IS NULL AND publication_date IS NOT NULL))
+    ORDER BY rowid
+    LIMIT ?
+    """
+    update_sql = "UPDATE patents SET date_of_filing_iso = ?, publication_date_iso = ? WHERE rowid = ?"
+    try:
+        with transaction() as conn:
+            columns = [row['name'] for row in conn.execute("PRAGMA table_info(patents)")]
+            for name in ('date_of_filing_iso', 'publication_date_iso'):
+                if name not in columns:
+                    print(f"Adding '{name}' column to 'patents' table...")
+                    _execute_script(conn, f"ALTER TABLE patents ADD COLUMN {name} TEXT")
+
+        backfilled = 0
+        last_rowid = 0
+        while True:
+            with transaction() as conn:
+                rows = conn.execute(select_sql, (last_rowid, chunk_size)).fetchall()
+                if not rows:
+                    break
+                updates = [
+                    (utils.iso_date(row['date_of_filing']), utils.iso_date(row['publication_date']), row['rowid'])
+                    for row in rows
+                ]
+                # Dates that aren't DD/MM/YYYY stay NULL (and are looked
+                # at again by the next run); only real dates are counted
+                updates = [update for update in updates if update[0] or update[1]]
+                conn.executemany(update_sql, updates)
+            last_rowid = rows[-1]['rowid']
+            if updates:
+                backfilled += len(updates)
+                print(f"  Backfilled ISO dates of {backfilled} patents...")
+
+        with transaction() as conn:
+            _execute_script(conn, CREATE_DATE_INDEXES_SQL)
+            conn.execute("ANALYZE")
+        print(f"  ✓ ISO date columns and indexes ready ({backfilled} patents backfilled).")
+    except sqlite3.Error as e:
+        print(f"Error during migration: {e}")
+
+def add_pipeline_runs_table():
+    """
+    Adds the 'pipeline_runs' metrics table.
+    """
+    try:
+        with transaction() as conn:
+            _execute_script(conn, CREATE_PIPELINE_RUNS_SQL)
+            print("  ✓ 'pipeline_runs' table ready.")
+    except sqlite3.Error as e:
+        print(f"Error during migration: {e}")
 
 # -----------------------------------------------------------------
 # 'downloader' SCRIPT (downloader.py)
@@ -138,44 +539,87 @@ def get_downloaded_journal_ids():
     except sqlite3.Error as e:
         print(f"Error fetching journal history: {e}")
         return set()
-    finally:
-        if conn:
-            conn.close()
 
-def log_journal(journal_id, part1_path, part2_path):
+def log_journal(journal_id, part1_path, part2_path, part1_checksum=None, part2_checksum=None):
     """
     Logs a newly downloaded journal to the database.
-    """
-    conn = get_db_connection()
-    if not conn:
-        print(f"Error: Could not log journal {journal_id}. No DB connection.")
-        return
 
+    'part1_checksum' / 'part2_checksum' are (sha256_hex, byte_count)
+    tuples computed while the PDF was downloaded.
+    """
     sql = """
-    INSERT OR IGNORE INTO journals (journal_id, part1_pdf_path, part2_pdf_path)
-    VALUES (?, ?, ?)
+    INSERT OR IGNORE INTO journals (
+        journal_id, part1_pdf_path, part2_pdf_path,
+        part1_sha256, part1_bytes, part2_sha256, part2_bytes
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
     """
     
     p1_str = str(part1_path) if part1_path else None
     p2_str = str(part2_path) if part2_path else None
+    p1_sha, p1_bytes = part1_checksum or (None, None)
+    p2_sha, p2_bytes = part2_checksum or (None, None)
     
     try:
-        cursor = conn.cursor()
-        cursor.execute(sql, (journal_id, p1_str, p2_str))
-        conn.commit()
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, (journal_id, p1_str, p2_str, p1_sha, p1_bytes, p2_sha, p2_bytes))
     except sqlite3.Error as e:
         print(f"Error logging journal {journal_id} to database: {e}")
-    finally:
-        if conn:
-            conn.close()
+
+def get_all_journals():
+    """
+    Fetches every journal row (paths, checksums, status).
+    Used by the 'verify' command.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return []
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM journals ORDER BY journal_id")
+        return cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Error fetching journals: {e}")
+        return []
 
 # -----------------------------------------------------------------
 # 'extractor' SCRIPT (extractor.py)
 # -----------------------------------------------------------------
 
+def find_extracted_duplicate(sha256, journal_id):
+    """
+    Returns the journal_id of ANOTHER already-extracted journal that has
+    a PDF part with this exact SHA-256, or None.
+    """
+    if not sha256:
+        return None
+
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    sql = """
+    SELECT journal_id FROM journals
+    WHERE status = 'extracted'
+      AND journal_id != ?
+      AND (part1_sha256 = ? OR part2_sha256 = ?)
+    LIMIT 1
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, (journal_id, sha256, sha256))
+        row = cursor.fetchone()
+        return row['journal_id'] if row else None
+    except sqlite3.Error as e:
+        print(f"Error checking for duplicate of {journal_id}: {e}")
+        return None
+
 def get_journals_to_process():
     """
     Finds all journals that have been downloaded but not extracted.
+    Journals left in 'extracting' by a crashed run are included too,
+    so they resume from their last checkpoint.
     """
     conn = get_db_connection()
     if not conn:
@@ -183,25 +627,30 @@ def get_journals_to_process():
         
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM journals WHERE status = 'downloaded'")
+        cursor.execute("SELECT * FROM journals WHERE status IN ('downloaded', 'extracting')")
         journals = cursor.fetchall()
         return journals
     except sqlite3.Error as e:
         print(f"Error fetching journals to process: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
-def update_journal_status(journal_id, status):
+def get_journal(journal_id):
     """
-    Updates the status of a specific journal.
+    Fetches one journal row, or None.
     """
     conn = get_db_connection()
     if not conn:
-        print(f"Error: Could not update status for {journal_id}. No DB connection.")
-        return
+        return None
+    try:
+        return conn.execute("SELECT * FROM journals WHERE journal_id = ?", (journal_id,)).fetchone()
+    except sqlite3.Error as e:
+        print(f"Error fetching journal {journal_id}: {e}")
+        return None
 
+def update_journal_status(journal_id, status):
+    """
+    Updates the status of a specific journal.
+    """
     sql = """
     UPDATE journals
     SET status = ?, updated_at = CURRENT_TIMESTAMP
@@ -209,57 +658,232 @@ def update_journal_status(journal_id, status):
     """
     
     try:
-        cursor = conn.cursor()
-        cursor.execute(sql, (status, journal_id))
-        conn.commit()
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, (status, journal_id))
     except sqlite3.Error as e:
         print(f"Error updating status for {journal_id}: {e}")
-    finally:
-        if conn:
-            conn.close()
 
-def insert_patent(patent_data):
+# The journal parts, as used by 'reset --part' and extraction_progress
+JOURNAL_PARTS = {'I': 'PART_I_EARLY', 'II': 'PART_II_NORMAL'}
+
+def get_extraction_progress(journal_id):
     """
-    Inserts or replaces a single patent into the 'patents' table.
+    Returns {part: last_page} for a journal's committed checkpoints,
+    e.g. {'PART_I_EARLY': 249}. Parts with no checkpoint are absent.
     """
     conn = get_db_connection()
     if not conn:
-        print("Error: No DB connection. Could not save patent.")
-        return
+        return {}
 
-    # Set defaults for fields the extractor finds
-    patent_data.setdefault('international_classification', None)
-    patent_data.setdefault('patent_type', None)
-    patent_data.setdefault('status', 'newly_extracted')
-    
-    data_tuple = (
-        patent_data.get('application_no'),
-        patent_data.get('title'),
-        patent_data.get('date_of_filing'),
-        patent_data.get('publication_date'),
-        patent_data.get('abstract'),
-        patent_data.get('international_classification'),
-        patent_data.get('patent_type'),
-        patent_data.get('status'),
-        patent_data.get('publication_type')
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT part, last_page FROM extraction_progress WHERE journal_id = ?",
+            (journal_id,)
+        )
+        return {row['part']: row['last_page'] for row in cursor.fetchall()}
+    except sqlite3.Error as e:
+        print(f"Error fetching extraction progress for {journal_id}: {e}")
+        return {}
+
+SAVE_CHECKPOINT_SQL = """
+INSERT OR REPLACE INTO extraction_progress (journal_id, part, last_page, updated_at)
+VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+"""
+
+# An upsert rather than INSERT OR REPLACE: REPLACE deletes the old row
+# without firing delete triggers, which would leave stale entries in
+# the 'patents_fts' index.
+INSERT_PATENT_SQL = """
+INSERT INTO patents (
+    application_no, title, date_of_filing, publication_date,
+    abstract, ipc_codes, patent_type, status, publication_type,
+    applicant, inventor, date_of_filing_iso, publication_date_iso
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(application_no) DO UPDATE SET
+    title = excluded.title,
+    date_of_filing = excluded.date_of_filing,
+    publication_date = excluded.publication_date,
+    abstract = excluded.abstract,
+    ipc_codes = excluded.ipc_codes,
+    patent_type = excluded.patent_type,
+    status = excluded.status,
+    publication_type = excluded.publication_type,
+    applicant = excluded.applicant,
+    inventor = excluded.inventor,
+    date_of_filing_iso = excluded.date_of_filing_iso,
+    publication_date_iso = excluded.publication_date_iso,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+# How many of a chunk's application numbers are already saved (the
+# rest are new rows); one JSON array parameter, whatever the chunk size
+COUNT_EXISTING_PATENTS_SQL = """
+SELECT COUNT(*) FROM patents
+WHERE application_no IN (SELECT value FROM json_each(?))
+"""
+
+def _patent_row(patent):
+    """
+    Converts a Patent (or a patent dict) into the tuple used by
+    INSERT_PATENT_SQL. A patent without a status is 'newly_extracted'.
+    """
+    if not isinstance(patent, Patent):
+        patent = Patent.from_dict(patent)
+    return (
+        patent.application_no,
+        patent.title,
+        patent.date_of_filing,
+        patent.publication_date,
+        patent.abstract,
+        patent.ipc_codes,
+        patent.patent_type,
+        patent.status or 'newly_extracted',
+        patent.publication_type,
+        patent.applicant,
+        patent.inventor,
+        patent.date_of_filing_iso,
+        patent.publication_date_iso
     )
-    
-    sql = """
-    INSERT OR REPLACE INTO patents (
-        application_no, title, date_of_filing, publication_date,
-        abstract, ipc_codes, patent_type, status, publication_type
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+
+def insert_patent(patent_data):
     """
-    
+    Inserts or replaces a single patent (a Patent or a patent dict)
+    into the 'patents' table.
+
+    Commits its own transaction. For bulk loads use
+    PatentWriter or insert_patents() instead.
+    """
+    row = _patent_row(patent_data)
     try:
-        cursor = conn.cursor()
-        cursor.execute(sql, data_tuple)
-        conn.commit()
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(INSERT_PATENT_SQL, row)
     except sqlite3.Error as e:
-        print(f"Error inserting patent {patent_data.get('application_no')}: {e}")
-    finally:
-        if conn:
-            conn.close()
+        print(f"Error inserting patent {row[0]}: {e}")
+
+class PatentWriter:
+    """
+    Batched writer for the 'patents' table.
+
+    Buffers patents in memory and writes them with a single
+    executemany() + commit per chunk instead of one transaction per
+    patent. Any rows still buffered are
+    written when the 'with' block exits.
+
+    A checkpoint() is committed in the SAME transaction as the patents
+    before it, so extraction_progress never claims more than is saved.
+
+    A chunk that can't be written raises sqlite3.Error (none of it is
+    saved), so the caller fails instead of carrying on without it.
+
+    'written' counts every row saved; 'updated' the ones that replaced
+    a patent already in the table (e.g. a journal extracted again).
+    Both are also recorded as the 'db.patents_inserted' and
+    'db.patents_updated' metrics.
+
+    Usage:
+        with database.PatentWriter() as writer:
+            for patent in patents:
+                writer.add(patent)
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or config.DB_WRITE_CHUNK_SIZE
+        self.written = 0
+        self.updated = 0
+        self._pending = []
+        self._checkpoint = None
+
+    def __enter__(self):
+        # Checkpoints share our transactions, so make sure their table
+        # exists even on a database that hasn't been migrated yet.
+        with transaction() as conn:
+            conn.execute(CREATE_EXTRACTION_PROGRESS_SQL)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+            return False
+        # Save what we can, but never hide or swallow the caller's exception
+        try:
+            self.flush()
+        except sqlite3.Error:
+            pass
+        return False
+
+    def add(self, patent_data):
+        """
+        Queues one patent (a Patent or a patent dict), flushing when
+        the chunk is full.
+        """
+        self._pending.append(_patent_row(patent_data))
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def checkpoint(self, journal_id, part, last_page):
+        """
+        Records that every patent starting on or before page 'last_page'
+        (0-based) of this journal part has been queued, and commits.
+        """
+        self._checkpoint = (journal_id, part, last_page)
+        self.flush()
+
+    def flush(self):
+        """
+        Writes all queued patents (and the latest checkpoint) in one
+        transaction. Returns the number of rows written.
+
+        Raises:
+            sqlite3.Error if the transaction fails (it is rolled back).
+        """
+        if not self._pending and not self._checkpoint:
+            return 0
+
+        rows = self._pending
+        checkpoint = self._checkpoint
+        self._pending = []
+        self._checkpoint = None
+        updated = 0
+        try:
+            with metrics.timer('db.write_patents'), transaction() as conn:
+                if rows:
+                    app_nos = {row[0] for row in rows}
+                    existing = conn.execute(COUNT_EXISTING_PATENTS_SQL, (json.dumps(list(app_nos)),)).fetchone()[0]
+                    # A number repeated within the chunk updates its own first row
+                    updated = len(rows) - (len(app_nos) - existing)
+                    conn.executemany(INSERT_PATENT_SQL, rows)
+                if checkpoint:
+                    conn.execute(SAVE_CHECKPOINT_SQL, checkpoint)
+        except sqlite3.Error as e:
+            print(f"Error inserting batch of {len(rows)} patents: {e}")
+            raise
+
+        self.written += len(rows)
+        self.updated += updated
+        metrics.count('db.patents_inserted', len(rows) - updated)
+        metrics.count('db.patents_updated', updated)
+        return len(rows)
+
+def insert_patents(patents, chunk_size=None):
+    """
+    Inserts or replaces many patents using a single connection.
+    'patents' can be any iterable (e.g., a generator) of Patents or
+    patent dicts.
+
+    Returns:
+        The number of patents written.
+
+    Raises:
+        sqlite3.Error if a chunk can't be written. Earlier chunks stay
+        committed.
+    """
+    with PatentWriter(chunk_size) as writer:
+        for patent_data in patents:
+            writer.add(patent_data)
+    return writer.written
 
 # -----------------------------------------------------------------
 # 'filter' COMMAND (filter.py)
@@ -275,24 +899,56 @@ def get_patents_to_classify():
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM patents WHERE status = 'newly_extracted'")
-        patents = cursor.fetchall()
-        return patents
+        return [Patent.from_row(row) for row in cursor.fetchall()]
     except sqlite3.Error as e:
         print(f"Error fetching patents to classify: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
-def update_patent_classification(app_no, patent_type, ipc_codes_list):
+def has_patents_to_classify():
     """
-    Updates a patent's classification, status, and IPC codes list.
+    True if any patent is waiting for classification. Only checks the
+    index, so it is cheap enough to poll.
     """
     conn = get_db_connection()
     if not conn:
-        print(f"Error: No DB connection. Could not update {app_no}")
-        return
+        return False
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM patents WHERE status = 'newly_extracted')")
+        return bool(cursor.fetchone()[0])
+    except sqlite3.Error as e:
+        print(f"Error checking for patents to classify: {e}")
+        return False
 
+INSERT_PATENT_IPC_SQL = """
+INSERT OR IGNORE INTO patent_ipc (application_no, ipc_code, subclass) VALUES (?, ?, ?)
+"""
+
+def _ipc_rows(app_no, ipc_codes_list):
+    """
+    Converts one patent's IPC code list into 'patent_ipc' rows.
+    """
+    return [(app_no, code, code[:4].upper()) for code in ipc_codes_list if code]
+
+def _write_patent_ipc(conn, classifications):
+    """
+    Replaces the 'patent_ipc' rows of every classified patent, inside
+    the caller's transaction.
+    """
+    conn.executemany(
+        "DELETE FROM patent_ipc WHERE application_no = ?",
+        [(app_no,) for app_no, _, _ in classifications]
+    )
+    conn.executemany(INSERT_PATENT_IPC_SQL, [
+        row
+        for app_no, _, ipc_codes_list in classifications
+        for row in _ipc_rows(app_no, ipc_codes_list)
+    ])
+
+def update_patent_classification(app_no, patent_type, ipc_codes_list):
+    """
+    Updates a patent's classification, status, and IPC codes list.
+    """
     # Store the list of IPC codes as a JSON string
     ipc_codes_json = json.dumps(ipc_codes_list)
     
@@ -305,27 +961,511 @@ def update_patent_classification(app_no, patent_type, ipc_codes_list):
     WHERE application_no = ?
     """
     try:
-        cursor = conn.cursor()
-        cursor.execute(sql, (patent_type, ipc_codes_json, app_no))
-        conn.commit()
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, (patent_type, ipc_codes_json, app_no))
+            _write_patent_ipc(conn, [(app_no, patent_type, ipc_codes_list)])
     except sqlite3.Error as e:
         print(f"Error updating patent classification for {app_no}: {e}")
-    finally:
-        if conn:
-            conn.close()
+
+def iter_patents_to_classify(batch_size=None):
+    """
+    Yields 'newly_extracted' patents in lists of at most 'batch_size'
+    Patents (only application_no and ipc_codes are loaded), so a 100k+ backlog never has to
+    be held in memory at once.
+
+    Pages through the table by primary key (keyset pagination) rather
+    than keeping one SELECT open: the caller updates 'status' on these
+    same rows between batches, which would otherwise race the open cursor.
+    """
+    batch_size = batch_size or config.FILTER_BATCH_SIZE
+    conn = get_db_connection()
+    if not conn:
+        return
+
+    sql = """
+    SELECT application_no, ipc_codes
+    FROM patents
+    WHERE status = 'newly_extracted' AND application_no > ?
+    ORDER BY application_no
+    LIMIT ?
+    """
+    last_app_no = ''
+    try:
+        cursor = conn.cursor()
+        while True:
+            cursor.execute(sql, (last_app_no, batch_size))
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            last_app_no = batch[-1]['application_no']
+            yield [Patent.from_row(row) for row in batch]
+    except sqlite3.Error as e:
+        print(f"Error fetching patents to classify: {e}")
+
+def update_patent_classifications(classifications):
+    """
+    Bulk version of update_patent_classification().
+
+    'classifications' is a list of (app_no, patent_type, ipc_codes_list)
+    tuples. All rows (and their 'patent_ipc' codes) are written with
+    executemany() in a single transaction.
+
+    Returns:
+        The number of patents updated (0 on error).
+    """
+    if not classifications:
+        return 0
+
+    sql = """
+    UPDATE patents
+    SET patent_type = ?, 
+        ipc_codes = ?, 
+        status = 'classified', 
+        updated_at = CURRENT_TIMESTAMP
+    WHERE application_no = ?
+    """
+    rows = [
+        (patent_type, json.dumps(ipc_codes_list), app_no)
+        for app_no, patent_type, ipc_codes_list in classifications
+    ]
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(sql, rows)
+            _write_patent_ipc(conn, classifications)
+            return len(rows)
+    except sqlite3.Error as e:
+        print(f"Error updating {len(rows)} patent classifications: {e}")
+        return 0
+
+# -----------------------------------------------------------------
+# 'retrieve' COMMAND (retriever.py)
+# -----------------------------------------------------------------
+
+RETRIEVAL_PATENT_TYPES = ('Software', 'Hybrid')
+RETRIEVAL_ERROR_STATUSES = ('error_captcha', 'error_retrieval')
+
+def claim_patents_for_retrieval(limit, include_errors=False):
+    """
+    Picks up to 'limit' 'classified' Software/Hybrid patents and marks
+    them 'retrieval_in_progress' in one transaction, so two retrievers
+    never work on the same patent.
+
+    With 'include_errors', patents that failed before (and any left
+    'retrieval_in_progress' by a run that was killed) are retried too.
+
+    Returns:
+        The claimed Patents (application_no, date_of_filing, title).
+    """
+    statuses = ['classified']
+    if include_errors:
+        statuses += list(RETRIEVAL_ERROR_STATUSES) + ['retrieval_in_progress']
+
+    sql = f"""
+    SELECT application_no, date_of_filing, title
+    FROM patents
+    WHERE status IN ({', '.join('?' * len(statuses))})
+      AND patent_type IN ({', '.join('?' * len(RETRIEVAL_PATENT_TYPES))})
+    ORDER BY application_no
+    LIMIT ?
+    """
+    try:
+        with transaction() as conn:
+            # Take the write lock BEFORE reading, or another retriever
+            # could select the same rows between our SELECT and UPDATE
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(sql, (*statuses, *RETRIEVAL_PATENT_TYPES, limit)).fetchall()
+            conn.executemany(
+                "UPDATE patents SET status = 'retrieval_in_progress', updated_at = CURRENT_TIMESTAMP "
+                "WHERE application_no = ?",
+                [(row['application_no'],) for row in rows]
+            )
+            return [Patent.from_row(row) for row in rows]
+    except sqlite3.Error as e:
+        print(f"Error claiming patents for retrieval: {e}")
+        return []
+
+def update_patent_status(app_no, status):
+    """
+    Sets the status of a single patent.
+    """
+    sql = "UPDATE patents SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE application_no = ?"
+    try:
+        with transaction() as conn:
+            conn.execute(sql, (status, app_no))
+    except sqlite3.Error as e:
+        print(f"Error updating status for {app_no}: {e}")
+
+def release_patents(app_nos):
+    """
+    Hands claimed patents that were never attempted back to the queue
+    ('retrieval_in_progress' -> 'classified').
+
+    Returns:
+        The number of patents released.
+    """
+    if not app_nos:
+        return 0
+    sql = """
+    UPDATE patents SET status = 'classified', updated_at = CURRENT_TIMESTAMP
+    WHERE application_no = ? AND status = 'retrieval_in_progress'
+    """
+    try:
+        with transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(sql, [(app_no,) for app_no in app_nos])
+            return conn.total_changes - before
+    except sqlite3.Error as e:
+        print(f"Error releasing {len(app_nos)} patents: {e}")
+        return 0
+
+# -----------------------------------------------------------------
+# 'query' COMMAND (query.py)
+# -----------------------------------------------------------------
+
+# bm25() weights for (title, abstract, applicant, inventor): a term in
+# the title says more about a patent than the same term in its abstract.
+FTS_COLUMN_WEIGHTS = (5.0, 1.0, 2.0, 2.0)
+
+_BM25 = f"bm25(patents_fts, {', '.join(str(w) for w in FTS_COLUMN_WEIGHTS)})"
+
+# Step 1: rank every match, but only by score, and keep the best few.
+TOP_MATCHES_SQL = f"""
+SELECT rowid, {_BM25} AS score
+FROM patents_fts
+WHERE patents_fts MATCH ?
+ORDER BY score
+LIMIT ?
+"""
+
+# Step 2: snippet() and the join are costly, so they run once per
+# result (a rowid lookup) instead of for every matching patent.
+MATCH_DETAILS_SQL = """
+SELECT p.application_no, p.title, p.publication_date, p.patent_type,
+       snippet(patents_fts, -1, '[', ']', '...', 16) AS snippet
+FROM patents_fts
+JOIN patents p ON p.rowid = patents_fts.rowid
+WHERE patents_fts MATCH ? AND patents_fts.rowid = ?
+"""
+
+def _search(conn, terms, limit):
+    """
+    Runs the two search steps on an open connection.
+    """
+    results = []
+    for rowid, score in conn.execute(TOP_MATCHES_SQL, (terms, limit)).fetchall():
+        row = conn.execute(MATCH_DETAILS_SQL, (terms, rowid)).fetchone()
+        if row:
+            results.append(dict(row, score=score))
+    return results
+
+def _quote_fts_terms(terms):
+    """
+    Turns free text into a query FTS5 can't misread: every word becomes
+    a quoted string, so '-', ':' or '*' inside it are taken literally.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"' for word in terms.split())
+
+def search_patents(terms, limit=20):
+    """
+    Full-text search over patent titles, abstracts, applicants and
+    inventors, best match first.
+
+    'terms' uses the FTS5 query syntax (e.g. 'blockchain AND payment',
+    'title:drone', 'neural*'). If it isn't valid FTS5, each word is
+    searched for literally instead.
+
+    Ranking scores every matching patent, so a query is as fast as
+    the number of patents it matches: rare terms take about a
+    millisecond, words found in most patents much longer.
+
+    Returns:
+        A list of dicts with application_no, title, publication_date,
+        patent_type, snippet (matches in [brackets]) and score.
+    """
+    conn = get_db_connection()
+    if not conn:
+        print("Error: No DB connection.")
+        return []
+
+    try:
+        try:
+            return _search(conn, terms, limit)
+        except sqlite3.OperationalError as e:
+            if "no such table" in str(e):
+                raise
+            return _search(conn, _quote_fts_terms(terms), limit)
+    except sqlite3.Error as e:
+        print(f"Error searching patents: {e}")
+        if "no such table" in str(e):
+            print("The full-text index is missing. Run 'python main.py migrate' first.")
+        return []
+
+def _ipc_where(prefix):
+    """
+    Returns the 'patent_ipc' WHERE clause and parameters for an IPC
+    subclass or code prefix (already upper-cased).
+    """
+    if len(prefix) == 4:
+        return "subclass = ?", [prefix]
+    # Half-open range instead of LIKE, which can't use the index
+    # (LIKE is case-insensitive, the index isn't)
+    return "ipc_code >= ? AND ipc_code < ?", [prefix, prefix + "\uffff"]
+
+def get_patents_by_ipc(prefix, limit=None):
+    """
+    Returns the classified patents with at least one IPC code starting
+    with 'prefix', ordered by application number.
+
+    A 4-character prefix is a subclass (e.g. 'G06Q') and is looked up in
+    idx_patent_ipc_subclass; a longer one (e.g. 'G06Q0020', 'G06F17/')
+    is a range seek on idx_patent_ipc_code.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return []
+
+    prefix = prefix.strip().upper()
+    where, params = _ipc_where(prefix)
+
+    # IN (...) rather than a JOIN + DISTINCT: a patent with several
+    # codes in the subclass is listed once without a temp B-tree.
+    sql = f"""
+    SELECT p.application_no, p.title, p.publication_date, p.patent_type
+    FROM patents p
+    WHERE p.application_no IN (SELECT application_no FROM patent_ipc WHERE {where})
+    ORDER BY p.application_no
+    """
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    try:
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error fetching patents for IPC {prefix}: {e}")
+        if "no such table" in str(e):
+            print("The 'patent_ipc' table is missing. Run 'python main.py migrate' first.")
+        return []
+
+# -----------------------------------------------------------------
+# 'search' COMMAND (searcher.py)
+# -----------------------------------------------------------------
+# Both lookups are primary-key or index seeks, so a search starts just
+# as fast on a million patents as on a hundred.
+
+SEARCH_COLUMNS = "application_no, date_of_filing, title, status, patent_type"
+
+def get_patents_by_application_no(app_nos):
+    """
+    Looks up each application number. A number without its kind code
+    ('202511087359') matches the stored one ('202511087359 A').
+
+    Returns:
+        A list of (requested number, Patent or None), in the given order.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return [(app_no, None) for app_no in app_nos]
+
+    exact_sql = f"SELECT {SEARCH_COLUMNS} FROM patents WHERE application_no = ?"
+    # "202511087359 " <= application_no < "202511087359!" (space + 1)
+    prefix_sql = f"""
+    SELECT {SEARCH_COLUMNS} FROM patents
+    WHERE application_no >= ? AND application_no < ?
+    ORDER BY application_no LIMIT 1
+    """
+    results = []
+    try:
+        for app_no in app_nos:
+            app_no = app_no.strip()
+            row = conn.execute(exact_sql, (app_no,)).fetchone()
+            if row is None:
+                row = conn.execute(prefix_sql, (app_no + " ", app_no + "!")).fetchone()
+            results.append((app_no, Patent.from_row(row) if row is not None else None))
+    except sqlite3.Error as e:
+        print(f"Error looking up patents: {e}")
+    return results
+
+def find_patents(status=None, patent_type=None, ipc=None, limit=None):
+    """
+    Returns the Patents matching every given filter, ordered by
+    application number: a status (idx_patents_status), a patent type,
+    and/or an IPC subclass or code prefix (patent_ipc).
+    """
+    conn = get_db_connection()
+    if not conn:
+        return []
+
+    where, params = [], []
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if patent_type:
+        where.append("patent_type = ?")
+        params.append(patent_type)
+    if ipc:
+        ipc_where, ipc_params = _ipc_where(ipc.strip().upper())
+        where.append(f"application_no IN (SELECT application_no FROM patent_ipc WHERE {ipc_where})")
+        params += ipc_params
+
+    sql = f"SELECT {SEARCH_COLUMNS} FROM patents"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY application_no"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    try:
+        return [Patent.from_row(row) for row in conn.execute(sql, params)]
+    except sqlite3.Error as e:
+        print(f"Error finding patents: {e}")
+        return []
+
+# -----------------------------------------------------------------
+# 'export' COMMAND (exporter.py)
+# -----------------------------------------------------------------
+
+def iter_patent_batches(status=None, patent_type=None, date_from=None, date_to=None,
+                        filed_from=None, filed_to=None, batch_size=None):
+    """
+    Yields every patent matching the given filters, in lists of at most
+    'batch_size' Patents. 'date_from' / 'date_to' are inclusive
+    YYYY-MM-DD bounds on the publication date, 'filed_from' /
+    'filed_to' on the filing date.
+
+    Patents come ordered by application number, or by the date whose
+    range is given (then application number): either way the order is
+    an index's, so a range is an index range scan with no sort step.
+
+    One SELECT is read with fetchmany(), so only one batch is held in
+    memory however many patents match.
+    """
+    batch_size = batch_size or config.EXPORT_BATCH_SIZE
+    conn = get_db_connection()
+    if not conn:
+        return
+
+    where, params = [], []
+    if status:
+        where.append("status = ?")
+        params.append(status)
+    if patent_type:
+        where.append("patent_type = ?")
+        params.append(patent_type)
+    order_by = "application_no"
+    for column, low, high in (("date_of_filing_iso", filed_from, filed_to),
+                              ("publication_date_iso", date_from, date_to)):
+        if low:
+            where.append(f"{column} >= ?")
+            params.append(low)
+        if high:
+            where.append(f"{column} <= ?")
+            params.append(high)
+        if low or high:
+            order_by = f"{column}, application_no"
+
+    sql = "SELECT * FROM patents"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order_by}"
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield [Patent.from_row(row) for row in batch]
+    except sqlite3.Error as e:
+        print(f"Error reading patents for export: {e}")
+
+# -----------------------------------------------------------------
+# 'pipeline_runs' (metrics.py, 'runs' COMMAND)
+# -----------------------------------------------------------------
+
+def save_pipeline_run(run):
+    """
+    Saves a finished run (metrics.finish_run()) to 'pipeline_runs'.
+    Returns its run_id, or None (e.g. on a database created before the
+    table: run 'migrate').
+    """
+    sql = """
+    INSERT INTO pipeline_runs (
+        command, status, started_at, finished_at, seconds,
+        pages, patents, bytes_downloaded, metrics
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    try:
+        with transaction() as conn:
+            cursor = conn.execute(sql, (
+                run['command'], run['status'], run['started_at'], run['finished_at'], run['seconds'],
+                run['pages'], run['patents'], run['bytes_downloaded'], json.dumps(run)
+            ))
+            return cursor.lastrowid
+    except sqlite3.Error as e:
+        print(f"Error saving pipeline run metrics: {e}")
+        if 'no such table' in str(e):
+            print("  Run 'python main.py migrate' to add the 'pipeline_runs' table.")
+        return None
+
+def get_pipeline_runs(limit=20, command=None):
+    """
+    Fetches the most recent runs, newest first (optionally of one command).
+    """
+    conn = get_db_connection()
+    if not conn:
+        return []
+    sql = "SELECT * FROM pipeline_runs"
+    params = []
+    if command:
+        sql += " WHERE command = ?"
+        params.append(command)
+    sql += " ORDER BY run_id DESC LIMIT ?"
+    params.append(limit)
+    try:
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error fetching pipeline runs: {e}")
+        return []
 
 # -----------------------------------------------------------------
 # 'reset' and 'clear' COMMANDS (main.py)
 # -----------------------------------------------------------------
 
-def reset_journal_status(journal_id):
+def reset_journal_status(journal_id, from_page=None, part=None):
     """
     Resets a journal's status back to 'downloaded' for reprocessing.
+
+    By default the extraction checkpoints are cleared, so the journal is
+    re-extracted from page 1. With 'from_page' (1-based), extraction
+    resumes at that page instead, for one part ('I' or 'II') or both.
     """
     print(f"Attempting to reset status for journal: {journal_id}")
     # We can just reuse the function we already built
     update_journal_status(journal_id, "downloaded")
-    print(f"✓ Journal {journal_id} status reset to 'downloaded'.")
+
+    parts = [JOURNAL_PARTS[part]] if part else list(JOURNAL_PARTS.values())
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            if from_page is None:
+                cursor.execute("DELETE FROM extraction_progress WHERE journal_id = ?", (journal_id,))
+            else:
+                # Checkpoints store the last DONE page (0-based)
+                cursor.executemany(
+                    SAVE_CHECKPOINT_SQL,
+                    [(journal_id, part_name, from_page - 2) for part_name in parts]
+                )
+    except sqlite3.Error as e:
+        print(f"Error resetting checkpoints for {journal_id}: {e}")
+        return
+
+    if from_page is None:
+        print(f"✓ Journal {journal_id} status reset to 'downloaded'.")
+    else:
+        print(f"✓ Journal {journal_id} status reset to 'downloaded' "
+              f"(resuming {', '.join(parts)} from page {from_page}).")
 
 
 def clear_patents_table():
@@ -333,11 +1473,6 @@ def clear_patents_table():
     Deletes ALL data from the 'patents' table.
     Used for resetting the pipeline during debugging.
     """
-    conn = get_db_connection()
-    if not conn:
-        print("Error: No DB connection. Could not clear patents.")
-        return False
-
     print("WARNING: This will delete all patent records from the 'patents' table.")
     confirm = input("Type 'DELETE' to confirm: ")
     if confirm != 'DELETE':
@@ -346,17 +1481,14 @@ def clear_patents_table():
         
     sql = "DELETE FROM patents"
     try:
-        cursor = conn.cursor()
-        cursor.execute(sql)
-        conn.commit()
-        print(f"✓ 'patents' table has been cleared.")
-        return True
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql)
+            print(f"✓ 'patents' table has been cleared.")
+            return True
     except sqlite3.Error as e:
         print(f"Error clearing 'patents' table: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
 # --- NEW FUNCTION ---
 def reset_patents_to_newly_extracted():
@@ -364,11 +1496,6 @@ def reset_patents_to_newly_extracted():
     Resets all 'classified' patents back to 'newly_extracted'
     so the filter can be run again.
     """
-    conn = get_db_connection()
-    if not conn:
-        print("Error: No DB connection.")
-        return
-        
     sql = """
     UPDATE patents
     SET status = 'newly_extracted', 
@@ -378,13 +1505,10 @@ def reset_patents_to_newly_extracted():
     WHERE status = 'classified'
     """
     try:
-        cursor = conn.cursor()
-        cursor.execute(sql)
-        count = cursor.rowcount
-        conn.commit()
-        print(f"✓ Reset {count} patents from 'classified' back to 'newly_extracted'.")
+        with transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql)
+            count = cursor.rowcount
+            print(f"✓ Reset {count} patents from 'classified' back to 'newly_extracted'.")
     except sqlite3.Error as e:
         print(f"Error resetting patent status: {e}")
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
@@ -1,170 +1,376 @@
 # src/downloader.py
 
+import os
+import hashlib
+import re
 import requests
 import json
-from bs4 import BeautifulSoup
+import time
 from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Import configuration and utilities from our own package
+from . import forms
+from . import metrics
 from . import utils
 import config
 
 # --- MODIFICATION: Import database ---
 from . import database
 
-def run_downloader():
+def _make_session():
+    """
+    Creates ONE pooled requests.Session shared by every download.
+
+    Keep-alive connections are reused across journals and parts, and the
+    pool is sized to DOWNLOADER_MAX_CONCURRENCY so parallel downloads
+    never queue for a socket. Failed connections are retried with
+    backoff, and so are 5xx responses and read errors for the listing
+    GET. The PDF POSTs are not resent mid-transfer: a failed part keeps
+    its '.part' file and is resumed on the next run.
+    """
+    session = requests.Session()
+    session.headers.update({'User-Agent': 'Mozilla/5.0'})
+    retries = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[502, 503, 504],
+        # Not the PDF POSTs (see above)
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config.DOWNLOADER_MAX_CONCURRENCY,
+        pool_maxsize=config.DOWNLOADER_MAX_CONCURRENCY,
+        max_retries=retries,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def run_downloader(on_journal_saved=None):
     """
     Finds and downloads new patent journals (Parts I & II) that are
     not listed in the 'journals' database table.
+
+    All parts of all new journals are downloaded concurrently (at most
+    DOWNLOADER_MAX_CONCURRENCY at a time). A journal is only logged to
+    the database once EVERY part it lists has downloaded completely.
+
+    'on_journal_saved(journal_id)' is called as each journal is logged,
+    while the others are still downloading ('serve' uses it to start
+    extracting straight away).
     """
     print("--- Running Downloader ---")
-    
+
     # 1. Setup
     # Ensure directories exist
     config.RAW_PDF_DIR.mkdir(parents=True, exist_ok=True)
-    
+
     # --- MODIFICATION: Load history from database instead of JSON ---
     # This is now a SET for faster lookups (e.g., {'44_2025', '45_2025'})
     download_history = database.get_downloaded_journal_ids()
     print(f"Loaded {len(download_history)} journals from database history.")
-    
+
+    session = _make_session()
+
     # 2. Fetch the webpage
     print(f"Fetching webpage: {config.DOWNLOADER_BASE_URL}")
     try:
-        response = requests.get(
-            config.DOWNLOADER_BASE_URL, 
-            headers={'User-Agent': 'Mozilla/5.0'}
-        )
-        response.raise_for_status()
+        with metrics.timer('download.listing'):
+            response = session.get(config.DOWNLOADER_BASE_URL, timeout=config.DOWNLOADER_TIMEOUT)
+            response.raise_for_status()
 
     except requests.RequestException as e:
         print(f"Error: Could not fetch webpage. {e}")
         return
 
-    soup = BeautifulSoup(response.content, 'html.parser')
-    table = soup.find('table')
-    if not table:
+    rows = forms.parse_table(response.text)
+    if not rows:
         print("Error: Could not find table on the webpage.")
         return
 
     # 3. Iterate through table rows
-    rows = table.find_all('tr')
     print(f"Found {len(rows)} rows in table. Checking for new journals...")
-    
-    new_journals_found = 0
-    
-    for row in rows[1:]:  # Skip header row
-        cols = row.find_all('td')
+
+    # journal_db_id -> {"serial": '45/2025', "parts": {"Part_I": 'file', ...}}
+    new_journals = {}
+
+    for cols in rows[1:]:  # Skip header row; each row is a list of its <td> cells
         if len(cols) < 2:
             continue
-        
+
         journal_serial = cols[1].text.strip() # "Journal No." is in the second column
-        
+
         if not utils.parse_serial(journal_serial):
             continue
-            
+
         # --- MODIFICATION: Use database-safe ID ---
         # Convert '45/2025' to '45_2025' for filenames and DB key
         journal_db_id = journal_serial.replace('/', '_')
-            
+
         # 4. Check against Baseline and History
-        
+
         # Check 1: If journal is older than our baseline, stop.
         comparison = utils.compare_serials(journal_serial, config.DOWNLOADER_BASELINE_SERIAL)
         if comparison is not None and comparison < 0:
             print(f"Reached baseline serial ({config.DOWNLOADER_BASELINE_SERIAL}). Stopping.")
             break
-        
-        # Check 2: If we already downloaded this, skip.
+
+        # Check 2: If we already downloaded (or queued) this, skip.
         # This now checks against the set from the database.
-        if journal_db_id in download_history:
+        if journal_db_id in download_history or journal_db_id in new_journals:
             continue
-            
-        print(f"Found new journal: {journal_serial}. Processing...")
-        new_journals_found += 1
-        
-        # 5. Find and Download PDFs
+
+        print(f"Found new journal: {journal_serial}.")
+
+        # 5. Find the PDFs to download
         download_col = cols[-1]
-        download_forms = download_col.find_all('form')
-        
-        part_i_filename = None
-        part_ii_filename = None
-        
-        for form in download_forms:
-            button = form.find('button')
-            if not button:
+
+        parts = {}
+
+        for form in download_col.forms:
+            if not form.buttons:
                 continue
-            
-            text = button.get_text(" ", strip=True).lower()
-            filename_input = form.find('input', {'type': 'hidden', 'name': 'FileName'})
-            
-            if not filename_input:
+
+            text = form.buttons[0][2].lower()
+            filename_value = form.find_input('FileName', 'hidden')
+
+            if filename_value is None:
                 continue
-                
-            filename_value = filename_input.get('value', '')
-            
+
             # Strict Exact matching
             if text == 'part i' or text == 'part 1':
-                part_i_filename = filename_value
+                parts["Part_I"] = filename_value
             elif text == 'part ii' or text == 'part 2':
-                part_ii_filename = filename_value
-        
-        # --- MODIFICATION: Store the returned file paths ---
-        part_i_path = None
-        part_ii_path = None
-        
-        # Download Part I
-        if part_i_filename:
-            part_i_path = _download_pdf(journal_db_id, "Part_I", part_i_filename)
-        
-        # Download Part II
-        if part_ii_filename:
-            part_ii_path = _download_pdf(journal_db_id, "Part_II", part_ii_filename)
-            
-        # 6. Save to history
-        # --- MODIFICATION: Log to database instead of JSON ---
-        database.log_journal(journal_db_id, part_i_path, part_ii_path)
-        
-        # Add to our local set to avoid re-downloading in this same session
-        download_history.add(journal_db_id) 
-        print(f"  Saved {journal_serial} (ID: {journal_db_id}) to database.")
-
-    print(f"\nDownloader finished. Found {new_journals_found} new journals.")
-
-
-def _download_pdf(journal_db_id, part_name, form_filename):
+                parts["Part_II"] = filename_value
+
+        new_journals[journal_db_id] = {"serial": journal_serial, "parts": parts}
+
+    if not new_journals:
+        print("\nDownloader finished. Found 0 new journals.")
+        return
+
+    # 6. Download every part of every new journal concurrently
+    total_parts = sum(len(journal["parts"]) for journal in new_journals.values())
+    print(f"\nDownloading {total_parts} PDFs for {len(new_journals)} journals "
+          f"({config.DOWNLOADER_MAX_CONCURRENCY} at a time)...")
+
+    # journal_db_id -> {part_name: Path or None}
+    results = {journal_db_id: {} for journal_db_id in new_journals}
+    journals_saved = 0
+
+    # Wall time of all transfers together ('download.part' adds up each one)
+    transfer_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config.DOWNLOADER_MAX_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(_download_pdf, session, journal_db_id, part_name, form_filename): (journal_db_id, part_name)
+            for journal_db_id, journal in new_journals.items()
+            for part_name, form_filename in journal["parts"].items()
+        }
+
+        for future in as_completed(futures):
+            journal_db_id, part_name = futures[future]
+            results[journal_db_id][part_name] = future.result()
+
+            journal = new_journals[journal_db_id]
+            if len(results[journal_db_id]) < len(journal["parts"]):
+                continue # Other parts still downloading
+
+            # 7. Save to history (only from this thread, never the workers)
+            if _save_journal(journal_db_id, journal["serial"], results[journal_db_id]):
+                journals_saved += 1
+                if on_journal_saved:
+                    on_journal_saved(journal_db_id)
+    metrics.add_time('download.transfer', time.perf_counter() - transfer_started)
+
+    # Journals that listed no PDFs at all
+    for journal_db_id, journal in new_journals.items():
+        if not journal["parts"] and _save_journal(journal_db_id, journal["serial"], {}):
+            journals_saved += 1
+            if on_journal_saved:
+                on_journal_saved(journal_db_id)
+
+    session.close()
+    print(f"\nDownloader finished. Found {len(new_journals)} new journals, saved {journals_saved}.")
+
+
+def _save_journal(journal_db_id, journal_serial, part_results):
+    """
+    Logs a journal to the database if all of its parts downloaded.
+    'part_results' maps part name to _download_pdf()'s return value.
+    Returns True if it was saved.
+    """
+    failed = [part_name for part_name, result in part_results.items() if result is None]
+    if failed:
+        # Not logged, so the next run retries (and resumes) it
+        print(f"  ✗ {journal_serial}: {', '.join(failed)} failed. Will retry on the next run.")
+        return False
+
+    part1_path, part1_checksum = part_results.get("Part_I") or (None, None)
+    part2_path, part2_checksum = part_results.get("Part_II") or (None, None)
+    metrics.journal(journal_db_id, pdf_bytes=sum(checksum[1] for checksum in (part1_checksum, part2_checksum) if checksum))
+
+    # --- MODIFICATION: Log to database instead of JSON ---
+    database.log_journal(journal_db_id, part1_path, part2_path, part1_checksum, part2_checksum)
+    print(f"  Saved {journal_serial} (ID: {journal_db_id}) to database.")
+    return True
+
+
+# 'bytes 1000-4999/5000' (a 206) or 'bytes */5000' (a 416)
+CONTENT_RANGE_REGEX = re.compile(r'bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)')
+
+def _content_range(response):
+    """
+    Parses the response's Content-Range header.
+
+    Returns:
+        A (first_byte, total_bytes) tuple; either is None if the header
+        is missing or doesn't say.
+    """
+    match = CONTENT_RANGE_REGEX.match(response.headers.get('Content-Range', ''))
+    if not match:
+        return None, None
+    first_byte = int(match.group(1)) if match.group(1) else None
+    total_bytes = int(match.group(2)) if match.group(2) != '*' else None
+    return first_byte, total_bytes
+
+def _content_length(response):
+    """
+    Returns the response's Content-Length as the number of bytes
+    iter_content() will yield, or None if it can't be trusted: missing,
+    malformed, or counting an encoded (e.g. gzip) body.
+    """
+    length = response.headers.get('Content-Length', '').strip()
+    encoding = response.headers.get('Content-Encoding', 'identity').strip().lower()
+    if not length.isdigit() or encoding not in ('', 'identity'):
+        return None
+    return int(length)
+
+def _post_pdf(session, form_filename, resume_from=0):
+    """
+    Requests a journal PDF, from byte 'resume_from' on (HTTP Range) if
+    it is given. Returns the streaming response.
+    """
+    headers = {'Range': f'bytes={resume_from}-'} if resume_from else {}
+    return session.post(
+        config.DOWNLOADER_VIEW_URL,
+        data={'FileName': form_filename},
+        headers=headers,
+        timeout=config.DOWNLOADER_TIMEOUT,
+        stream=True
+    )
+
+@metrics.timed('download.part')
+def _download_pdf(session, journal_db_id, part_name, form_filename):
     """
     Helper function to download a single PDF via POST request.
-    
-    --- MODIFICATION: Returns the Path object on success, None on failure. ---
+
+    The PDF is streamed into '<name>.pdf.part' and only renamed to
+    '<name>.pdf' once complete, so a dropped connection never leaves a
+    truncated file behind under the real name. If a '.part' file from
+    an earlier attempt exists, we ask the server for just the missing
+    bytes (HTTP Range) and append them; if the server ignores the Range
+    header, the download starts over.
+
+    The server's Content-Range must agree with the '.part' file: a 416
+    is only taken as "already complete" if the file has the server's
+    total size, and a 206 must start right where the file ends.
+    Otherwise the '.part' file (truncated, or from another version of
+    the PDF) is deleted and downloaded again from scratch. A finished
+    '<name>.pdf' left by an earlier run is checked the same way.
+
+    A transfer shorter than the Content-Length is kept as a '.part'
+    file for the next run; without a usable Content-Length (missing,
+    malformed, or of a compressed body) whatever arrives is accepted.
+
+    A SHA-256 and byte count are computed from the chunks as they are
+    written (after first hashing any bytes already in the '.part' file).
+
+    Returns:
+        (pdf_path, (sha256_hex, byte_count)) on success, None on failure.
     """
+    # Save to 'data/raw_pdfs/44_2025_Part_I.pdf'
+    pdf_filename = f"{journal_db_id}_{part_name}.pdf"
+    pdf_path = config.RAW_PDF_DIR / pdf_filename
+    part_path = pdf_path.with_name(pdf_filename + ".part")
+
+    if pdf_path.exists() and not part_path.exists():
+        # Left by an earlier run (e.g. the other part of this journal
+        # failed), but nothing records what it should hold: the journal
+        # is only logged once all its parts are in. Resume it like a
+        # '.part' file, so the server's size decides: a 416 means it is
+        # complete, anything else fetches what is missing or starts over.
+        print(f"  Checking {pdf_filename} against the server...")
+        os.replace(pdf_path, part_path)
+
+    resume_from = part_path.stat().st_size if part_path.exists() else 0
+
     try:
-        POST_URL = 'https://search.ipindia.gov.in/IPOJournal/Journal/ViewJournal'
-        pdf_response = requests.post(
-            POST_URL,
-            data={'FileName': form_filename},
-            timeout=60,
-            stream=True
-        )
+        pdf_response = _post_pdf(session, form_filename, resume_from)
+
+        if resume_from and pdf_response.status_code in (206, 416):
+            first_byte, total_bytes = _content_range(pdf_response)
+            if pdf_response.status_code == 416 and total_bytes == resume_from:
+                # Range not satisfiable: the .part file is already complete
+                pdf_response.close()
+                os.replace(part_path, pdf_path)
+                print(f"  ✓ Downloaded {pdf_filename} (already complete)")
+                return pdf_path, utils.file_sha256(pdf_path)
+            if pdf_response.status_code == 416 or first_byte != resume_from:
+                pdf_response.close()
+                print(f"  {part_path.name} ({resume_from} bytes) doesn't match the server's file "
+                      f"({pdf_response.headers.get('Content-Range') or 'no Content-Range'}). Downloading it again...")
+                part_path.unlink()
+                resume_from = 0
+                pdf_response = _post_pdf(session, form_filename)
+
         pdf_response.raise_for_status()
-        
-        # Save to 'data/raw_pdfs/44_2025_Part_I.pdf'
-        pdf_filename = f"{journal_db_id}_{part_name}.pdf"
-        pdf_path = config.RAW_PDF_DIR / pdf_filename
-        
-        with open(pdf_path, 'wb') as pdf_file:
-            for chunk in pdf_response.iter_content(chunk_size=8192):
-                if chunk:
-                    pdf_file.write(chunk)
-        print(f"  ✓ Downloaded {pdf_filename}")
-        
-        # Return the path to be logged in the database
-        return pdf_path 
-        
-    except requests.RequestException as e:
+
+        hasher = hashlib.sha256()
+        if resume_from and pdf_response.status_code == 206:
+            print(f"  Resuming {pdf_filename} from byte {resume_from}...")
+            mode = 'ab'
+            # The digest must cover the bytes we already have, too
+            resume_from = utils.update_hash_from_file(hasher, part_path)
+        else:
+            # Fresh download (or the server doesn't support ranges)
+            resume_from = 0
+            mode = 'wb'
+
+        expected_bytes = _content_length(pdf_response)
+        received_bytes = 0
+        try:
+            with pdf_response, open(part_path, mode) as pdf_file:
+                for chunk in pdf_response.iter_content(chunk_size=config.DOWNLOADER_CHUNK_SIZE):
+                    if chunk:
+                        pdf_file.write(chunk)
+                        hasher.update(chunk)
+                        received_bytes += len(chunk)
+        finally:
+            metrics.count('download.bytes', received_bytes)
+
+        if expected_bytes is not None and received_bytes < expected_bytes:
+            print(f"  ✗ Error downloading {part_name}: connection closed after "
+                  f"{resume_from + received_bytes} bytes. Partial file kept for resume.")
+            metrics.count('download.failed')
+            return None
+
+        # Atomic on the same filesystem: readers see the old file or the whole new one
+        os.replace(part_path, pdf_path)
+        metrics.count('download.parts')
+        checksum = (hasher.hexdigest(), resume_from + received_bytes)
+        print(f"  ✓ Downloaded {pdf_filename} ({checksum[1]} bytes, sha256 {checksum[0][:12]}...)")
+
+        # Return the path and checksum to be logged in the database
+        return pdf_path, checksum
+
+    except (requests.RequestException, OSError) as e:
         print(f"  ✗ Error downloading {part_name}: {e}")
-        return None # Return None on failure
+        metrics.count('download.failed')
+        return None # Return None on failure (the .part file is kept)
 
 if __name__ == '__main__':
     # This allows the script to be run directly for testing
-    run_downloader()
\ No newline at end of file
+    run_downloader()
@@ -1,115 +1,302 @@
-import fitz  # PyMuPDF
 import re
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 # Import configuration and our new database functions
 import config
 from . import utils
 from . import database
+from . import inid
+from . import metrics
+from . import textcache
+from .records import Patent
 
-def _process_pdf(pdf_path, pub_type, patent_regex):
+# (journals column prefix, publication_type) for each journal part
+JOURNAL_PART_TYPES = [("part1", "PART_I_EARLY"), ("part2", "PART_II_NORMAL")]
+
+class _PageSource:
+    """
+    The page texts of one PDF.
+
+    Pages are served from the page-text cache when possible (keyed by the
+    PDF's SHA-256) and rendered with PyMuPDF otherwise. The PDF itself is
+    only opened (and PyMuPDF only imported) on the first cache miss, so a
+    fully cached journal is re-extracted without touching PyMuPDF at all.
+
+    Rendering time and page counts are added up here and recorded in
+    metrics once, on close().
+    """
+
+    def __init__(self, pdf_path, pdf_sha256=None):
+        self.pdf_path = pdf_path
+        self.cache = None
+        if pdf_sha256 and config.TEXT_CACHE_ENABLED:
+            self.cache = textcache.PageTextCache(pdf_sha256)
+        self._doc = None
+        self.render_seconds = 0.0
+        self.pages_rendered = 0
+        self.pages_cached = 0
+
+    @property
+    def doc(self):
+        if self._doc is None:
+            # Imported here: PyMuPDF takes longer to import than a cached
+            # journal takes to re-extract (and 'extract' with nothing
+            # queued needs it not at all)
+            import fitz  # PyMuPDF
+            self._doc = fitz.open(self.pdf_path)
+            if self.cache:
+                self.cache.page_count = self._doc.page_count
+        return self._doc
+
+    @property
+    def page_count(self):
+        if self.cache and self.cache.page_count is not None:
+            return self.cache.page_count
+        return self.doc.page_count
+
+    def text(self, page_index):
+        if self.cache:
+            text = self.cache.get(page_index)
+            if text is not None:
+                self.pages_cached += 1
+                return text
+        started = time.perf_counter()
+        text = self.doc[page_index].get_text()
+        self.render_seconds += time.perf_counter() - started
+        self.pages_rendered += 1
+        if self.cache:
+            self.cache.put(page_index, text)
+        return text
+
+    def close(self):
+        if self.pages_rendered:
+            metrics.add_time('pdf.get_text', self.render_seconds, self.pages_rendered)
+            self.pages_rendered = 0
+            self.render_seconds = 0.0
+        if self.pages_cached:
+            metrics.count('textcache.pages', self.pages_cached)
+            self.pages_cached = 0
+        if self.cache:
+            self.cache.close()
+        if self._doc is not None:
+            self._doc.close()
+
+def _iter_page_texts(source, start):
+    """
+    Yields (page_index, text) for every page from 'start' to the end of
+    a _PageSource. Pages are only rendered as they are consumed.
+    """
+    for page_index in range(start, source.page_count):
+        try:
+            yield page_index, source.text(page_index) + "\n"
+        except Exception as e:
+            print(f"    - Error processing page {page_index + 1}: {e}")
+            yield page_index, ""
+
+def _iter_page_range(source, pub_type, start, stop):
+    """
+    Yields (Patent, stitched) for every patent that STARTS on pages
+    [start, stop) of a _PageSource. Records spilling past 'stop'
+    are finished by reading ahead; 'stitched' is True for records
+    joined from more than one page.
+    """
+    pages = _iter_page_texts(source, start)
+    records = inid.iter_records(pages, stop)
+    # Time spent producing records, minus the page rendering inside it,
+    # is the tokenizer/regex time ('extract.parse'). The consumer's
+    # time between records (e.g. database writes) is not counted.
+    parsing = 0.0
+    rendering = source.render_seconds
+    found = 0
+    try:
+        while True:
+            started = time.perf_counter()
+            record = next(records, None)
+            parsing += time.perf_counter() - started
+            if record is None:
+                break
+            _, fields, stitched = record
+            found += 1
+            yield Patent.from_extracted(fields, pub_type), stitched
+    finally:
+        metrics.add_time('extract.parse', parsing - (source.render_seconds - rendering))
+        metrics.count('extract.pages', max(0, min(stop, source.page_count) - start))
+        metrics.count('extract.patents', found)
+
+def _extract_page_range(pdf_path, pub_type, start, stop, pdf_sha256=None):
+    """
+    Worker entry point for parallel extraction.
+
+    Runs in a child process: opens its OWN copy of the PDF (PyMuPDF
+    documents can't be shared between processes) and its own cache
+    connection, and returns the (patent, stitched) pairs for pages
+    [start, stop). It never touches the patents database; the parent
+    process is the only writer.
+
+    Returns:
+        (list of (patent, stitched), metrics.snapshot() of this shard)
+    """
+    # A pool process runs many shards: each reports only its own metrics
+    metrics.reset()
+    source = _PageSource(pdf_path, pdf_sha256)
+    try:
+        patents = list(_iter_page_range(source, pub_type, start, stop))
+    finally:
+        source.close()
+    return patents, metrics.snapshot()
+
+def _merge_shard_metrics(results):
+    """
+    Adds each worker shard's metrics to this process's as it arrives,
+    and yields its patents.
+    """
+    for patents, shard_metrics in results:
+        metrics.merge(shard_metrics)
+        yield patents
+
+def _page_ranges(start_page, page_count, pages_per_shard):
+    """
+    Splits [start_page, page_count) into consecutive (start, stop) shards.
+    """
+    return [
+        (start, min(start + pages_per_shard, page_count))
+        for start in range(start_page, page_count, pages_per_shard)
+    ]
+
+def _iter_shards(source, pub_type, shards, executor=None, pdf_sha256=None):
+    """
+    Yields (stop, patents) for each (start, stop) shard of a _PageSource,
+    in page order, where 'patents' iterates the (patent, stitched) pairs
+    of patents starting in the shard. Closes 'source'.
+
+    Without 'executor' each shard is parsed lazily in this process, as
+    it is consumed. With one, the shards are parsed in parallel by
+    worker processes that open their own document and cache connection.
+    """
+    if executor is None:
+        try:
+            for start, stop in shards:
+                patents = _iter_page_range(source, pub_type, start, stop)
+                try:
+                    yield stop, patents
+                finally:
+                    # Before the document closes, if the consumer stopped early
+                    patents.close()
+        finally:
+            source.close()
+        return
+
+    source.close()
+    results = _merge_shard_metrics(executor.map(
+        _extract_page_range,
+        [source.pdf_path] * len(shards),
+        [pub_type] * len(shards),
+        [start for start, _ in shards],
+        [stop for _, stop in shards],
+        [pdf_sha256] * len(shards),
+    ))
+    yield from zip((stop for _, stop in shards), results)
+
+def iter_patents(pdf_path, pub_type, start_page=0, executor=None, pdf_sha256=None):
+    """
+    Yields every patent in a journal PDF, in page order, starting at
+    'start_page' (0-based).
+
+    Each patent is a records.Patent with publication_type = pub_type
+    and status None (not saved yet). Pages are rendered and parsed only as
+    patents are consumed, so a journal of any size is read in constant
+    memory. Nothing is written to the database, and the page-text cache
+    is only used if 'pdf_sha256' is given.
+
+    With 'executor' (a ProcessPoolExecutor), EXTRACTOR_PAGES_PER_SHARD
+    page shards are parsed in parallel; memory then holds the patents of
+    the shards in flight.
+
+    Raises:
+        Whatever PyMuPDF raises if the PDF can't be opened.
+    """
+    source = _PageSource(pdf_path, pdf_sha256)
+    try:
+        page_count = source.page_count
+    except Exception:
+        source.close()
+        raise
+    shards = _iter_shards(
+        source, pub_type,
+        _page_ranges(start_page, page_count, config.EXTRACTOR_PAGES_PER_SHARD),
+        executor, pdf_sha256
+    )
+    try:
+        for _, shard_patents in shards:
+            for patent, _ in shard_patents:
+                yield patent
+    finally:
+        shards.close()
+
+def _process_pdf(pdf_path, pub_type, writer, journal_id, start_page=0, executor=None, pdf_sha256=None):
     """
     Helper function to process a single PDF file page by page.
+    Every patent found is streamed into 'writer' (a database.PatentWriter),
+    which saves them in batches.
+
+    Walks the same shards as iter_patents(), starting at 'start_page'.
+    After each shard a checkpoint is committed together with its
+    patents, so a crashed run resumes from there.
+
+    If 'executor' (a ProcessPoolExecutor) is given, the shards are parsed
+    in parallel. Results come back in page order and are written here,
+    by this process only.
+
+    If 'pdf_sha256' is given, page texts go through the page-text cache.
+
+    Returns:
+        A (patents_found, patents_stitched) tuple.
     """
     patents_found = 0
+    patents_stitched = 0
+    source = _PageSource(pdf_path, pdf_sha256)
     try:
-        doc = fitz.open(pdf_path)
+        page_count = source.page_count
     except Exception as e:
         print(f"  ✗ ERROR: Could not open {pdf_path}. Skipping. Error: {e}")
-        return 0
+        source.close()
+        return 0, 0
         
-    print(f"  Processing {doc.page_count} pages from {pdf_path.name}...")
-    
-    for page_num, page in enumerate(doc, start=1):
-        try:
-            page_text = page.get_text() + "\n"
-            
-            # Run the regex on this single page's text
-            match = patent_regex.search(page_text)
-            
-            if match:
-                data = match.groupdict()
-                
-                # Clean up the extracted data
-                # We .strip() EVERY field to remove unwanted whitespace
-                cleaned_data = {
-                    "application_no": data['app_no'].strip(),
-                    "date_of_filing": data['date_filing'].strip(),
-                    "publication_date": data['date_pub'].strip(),
-                    "title": data['title'].strip().replace('\n', ' '),
-                    # Use .get() for optional 'ipc' group, default to empty string
-                    "international_classification": data.get('ipc', '').strip().replace('\n', ' '),
-                    "applicant": data['applicant'].strip().replace('\n', ' '),
-                    "inventor": data['inventor'].strip().replace('\n', ' '),
-                    "abstract": data['abstract'].strip().replace('\n', ' '),
-                    "publication_type": pub_type
-                }
-                
-                database.insert_patent(cleaned_data)
-                patents_found += 1
-            else:
-                # Fluff page, skip
-                pass 
-                
-        except Exception as e:
-            print(f"    - Error processing page {page_num}: {e}")
+    if start_page >= page_count:
+        print(f"  {pdf_path.name} already fully extracted. Skipping.")
+        source.close()
+        return 0, 0
+    if start_page > 0:
+        print(f"  Resuming {pdf_path.name} from page {start_page + 1} (checkpoint).")
+
+    print(f"  Processing {page_count - start_page} pages from {pdf_path.name}...")
+    shards = _page_ranges(start_page, page_count, config.EXTRACTOR_PAGES_PER_SHARD)
+    if executor is not None:
+        print(f"  Split into {len(shards)} shards of up to {config.EXTRACTOR_PAGES_PER_SHARD} pages.")
+
+    for stop, shard_patents in _iter_shards(source, pub_type, shards, executor, pdf_sha256):
+        for patent, stitched in shard_patents:
+            writer.add(patent)
+            patents_found += 1
+            patents_stitched += stitched
+        writer.checkpoint(journal_id, pub_type, stop - 1)
             
-    doc.close()
-    print(f"  ✓ Found {patents_found} patents in {pdf_path.name}.")
-    return patents_found
+    print(f"  ✓ Found {patents_found} patents in {pdf_path.name} ({patents_stitched} stitched across pages).")
+    return patents_found, patents_stitched
 
-def run_extractor():
+def run_extractor(workers=None):
     """
     Extracts structured data from all PDFs in the 'journals' table
-    that have a status of 'downloaded'.
+    that have a status of 'downloaded' (or 'extracting', left behind by
+    an interrupted run, which resumes from its last checkpoint).
+
+    With workers > 1, each PDF's pages are parsed by a pool of that many
+    processes (see _process_pdf).
     """
     print("--- Running Extractor ---")
-    
-    # -----------------------------------------------------------------
-    # --- THIS IS THE FINAL, ROBUST REGEX ---
-    # -----------------------------------------------------------------
-    # It uses complex "lookaheads" (?=...) to stop capturing
-    # at the *next nearest* field code, even if it's optional.
-    # -----------------------------------------------------------------
-    patent_regex = re.compile(
-        r"\(12\)\s*PATENT APPLICATION PUBLICATION"
-        
-        # (21) Application No. - Stop at (19) or (22)
-        r".*?\(21\)\s*Application No\.:?\s*(?P<app_no>.*?)(?=\s*\((?:19|22)\))"
-        
-        # (22) Date of filing - Stop at (43)
-        r".*?\(22\)\s*Date of filing of Application\s*:?\s*(?P<date_filing>.*?)(?=\s*\((?:43)\))"
-        
-        # (43) Publication Date - Stop at (54)
-        r".*?\(43\)\s*Publication Date\s*:?\s*(?P<date_pub>.*?)(?=\s*\((?:54)\))"
-        
-        # (54) Title - Stop at (51) or (71) (in case 51 is missing)
-        r".*?\(54\)\s*Title of the invention\s*:?\s*(?P<title>.*?)(?=\s*\((?:51|71)\))"
-        
-        # (51) IPC - This is an optional group.
-        # It captures everything until the *next* field code, which could be
-        # (31), (32), (33), (86), (87), (61), (62), or (71).
-        # We make the whole (51) block optional with (?:...)?
-        r"(?:"
-            r".*?\(51\)\s*International classification\s*:?\s*(?P<ipc>.*?)"
-            r"(?=\s*\((?:31|32|33|86|87|61|62|71)\))"
-        r")?"
-        
-        # (71) Applicant - Stop at (72)
-        r".*?\(71\)\s*Name of Applicant\s*:?\s*(?P<applicant>.*?)(?=\s*\((?:72)\))"
-        
-        # (72) Inventor - Stop at (57)
-        r".*?\(72\)\s*Name of Inventor\s*:?\s*(?P<inventor>.*?)(?=\s*\((?:57)\))"
-        
-        # (57) Abstract - Stop at "No. of Pages" or "Description"
-        r".*?\(57\)\s*Abstract\s*:?\s*(?P<abstract>.*?)"
-        r"(?=No\. of Pages|Description:)",
-        
-        re.DOTALL | re.IGNORECASE
-    )
-    # -----------------------------------------------------------------
-    # --- END OF UPDATED REGEX ---
-    # -----------------------------------------------------------------
+    workers = workers or config.EXTRACTOR_WORKERS
 
     # Get the "to-do list" from the database
     journals_to_process = database.get_journals_to_process()
@@ -119,37 +306,150 @@ def run_extractor():
 
     print(f"Found {len(journals_to_process)} journals to process...")
     total_patents_found = 0
+    marked = metrics.mark()
+
+    # One pool for the whole run, shared by every journal
+    executor = None
+    if workers > 1:
+        print(f"Using {workers} worker processes.")
+        executor = ProcessPoolExecutor(max_workers=workers)
 
     # Loop through each journal
-    for journal in journals_to_process:
-        journal_id = journal['journal_id']
-        print(f"\nProcessing journal: {journal_id}")
-        
-        database.update_journal_status(journal_id, "extracting")
-        
-        journal_patents = 0
-        
-        try:
-            # Process Part I
-            if journal['part1_pdf_path']:
-                pdf_path = config.BASE_DIR / journal['part1_pdf_path']
-                journal_patents += _process_pdf(pdf_path, "PART_I_EARLY", patent_regex)
-            
-            # Process Part II
-            if journal['part2_pdf_path']:
-                pdf_path = config.BASE_DIR / journal['part2_pdf_path']
-                journal_patents += _process_pdf(pdf_path, "PART_II_NORMAL", patent_regex)
-            
-            database.update_journal_status(journal_id, "extracted")
-            print(f"✓ Finished journal {journal_id}. Found {journal_patents} patents.")
-            total_patents_found += journal_patents
-            
-        except Exception as e:
-            print(f"  ✗✗✗ CRITICAL ERROR processing {journal_id}: {e}")
-            database.update_journal_status(journal_id, "error_extracting")
+    try:
+        for journal in journals_to_process:
+            total_patents_found += _process_journal(journal, executor)
+    finally:
+        if executor:
+            executor.shutdown()
             
     print(f"\n--- Extraction complete. ---")
-    print(f"Total new patents saved to database: {total_patents_found}")
+    saved = metrics.since(marked)
+    print(f"Total patents found: {total_patents_found}")
+    print(f"Saved to database: {saved.get('db.patents_inserted', 0)} new, "
+          f"{saved.get('db.patents_updated', 0)} updated")
+
+def extract_journal(journal_id, executor=None):
+    """
+    Extracts one journal if it is still waiting for extraction
+    ('downloaded', or 'extracting' after an interrupted run).
+
+    Returns:
+        The number of patents saved, or None if the journal wasn't
+        waiting (unknown, or already extracted by someone else).
+    """
+    journal = database.get_journal(journal_id)
+    if journal is None or journal['status'] not in ('downloaded', 'extracting'):
+        return None
+    return _process_journal(journal, executor)
+
+def _check_part(journal, part_key, pdf_path):
+    """
+    Checks a journal PDF against the SHA-256 / size recorded when it was
+    downloaded ('part_key' is 'part1' or 'part2').
+
+    Raises:
+        ValueError if the file on disk is truncated or corrupt.
+    Returns:
+        An (extract, pdf_sha256) tuple. 'extract' is False if the exact
+        same content was already extracted under another journal (a
+        re-download). 'pdf_sha256' keys the page-text cache (None if
+        the file can't be hashed).
+    """
+    if not pdf_path.exists():
+        # Let _process_pdf report the missing file
+        return True, None
+
+    sha_column = f"{part_key}_sha256"
+    if sha_column not in journal.keys() or not journal[sha_column]:
+        # Downloaded before checksums were recorded: nothing to compare
+        pdf_sha256 = utils.file_sha256(pdf_path)[0] if config.TEXT_CACHE_ENABLED else None
+        return True, pdf_sha256
+
+    expected_sha, expected_bytes = journal[sha_column], journal[f"{part_key}_bytes"]
+    actual_sha, actual_bytes = utils.file_sha256(pdf_path)
+    if actual_sha != expected_sha or actual_bytes != expected_bytes:
+        raise ValueError(
+            f"{pdf_path.name} does not match its download checksum "
+            f"({actual_bytes} bytes on disk, expected {expected_bytes}). Re-download it."
+        )
+
+    duplicate_of = database.find_extracted_duplicate(expected_sha, journal['journal_id'])
+    if duplicate_of:
+        print(f"  {pdf_path.name} is identical to a part of journal {duplicate_of}, "
+              f"which is already extracted. Skipping.")
+        return False, expected_sha
+    return True, expected_sha
+
+def _record_journal_metrics(journal_id, elapsed, marked):
+    """
+    Records the per-journal summary: wall time, pages, patents (the
+    rates are derived by metrics.journal()), and where the time went
+    (summed over worker processes in parallel mode).
+    """
+    metrics.add_time('extract.journal', elapsed)
+    spent = metrics.since(marked)
+    pages = spent.get('extract.pages', 0)
+    patents = spent.get('extract.patents', 0)
+    metrics.journal(
+        journal_id,
+        seconds=round(elapsed, 3),
+        pages=pages,
+        patents=patents,
+        get_text_seconds=round(spent.get('pdf.get_text', 0), 3),
+        parse_seconds=round(spent.get('extract.parse', 0), 3),
+        db_write_seconds=round(spent.get('db.write_patents', 0), 3),
+    )
+
+def _process_journal(journal, executor=None):
+    """
+    Extracts both parts of one journal, moving its status through
+    'extracting' -> 'extracted' (or 'error_extracting').
+    Returns the number of patents found (new or updated).
+    """
+    journal_id = journal['journal_id']
+    print(f"\nProcessing journal: {journal_id}")
+    started = time.perf_counter()
+    marked = metrics.mark()
+    
+    database.update_journal_status(journal_id, "extracting")
+    
+    journal_patents = 0
+    journal_stitched = 0
+    
+    # Last committed page per part, if a previous run was interrupted
+    progress = database.get_extraction_progress(journal_id)
+
+    try:
+        # One connection per journal; patents are committed in chunks
+        # and any remainder is flushed when the 'with' block exits.
+        with database.PatentWriter() as writer:
+            # Process Part I, then Part II
+            for part_key, pub_type in JOURNAL_PART_TYPES:
+                if not journal[f"{part_key}_pdf_path"]:
+                    continue
+                pdf_path = config.BASE_DIR / journal[f"{part_key}_pdf_path"]
+                extract, pdf_sha256 = _check_part(journal, part_key, pdf_path)
+                if not extract:
+                    continue
+                start_page = progress.get(pub_type, -1) + 1
+                found, stitched = _process_pdf(
+                    pdf_path, pub_type, writer, journal_id, start_page, executor, pdf_sha256
+                )
+                journal_patents += found
+                journal_stitched += stitched
+        
+        database.update_journal_status(journal_id, "extracted")
+        if config.TEXT_CACHE_ENABLED:
+            textcache.evict()
+        print(f"✓ Finished journal {journal_id}. Found {journal_patents} patents "
+              f"({journal_stitched} stitched across pages, {writer.updated} already in the database).")
+        _record_journal_metrics(journal_id, time.perf_counter() - started, marked)
+        return journal_patents
+        
+    except Exception as e:
+        print(f"  ✗✗✗ CRITICAL ERROR processing {journal_id}: {e}")
+        database.update_journal_status(journal_id, "error_extracting")
+        return 0
 
 if __name__ == '__main__':
     run_extractor()
\ No newline at end of file
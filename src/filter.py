@@ -5,82 +5,106 @@ import re
 import config
 from . import utils
 from . import database # Import the database module
+from . import metrics
 
+# Define software IPC codes
+SOFTWARE_PREFIXES = ['G06', 'H04L', 'G16H', 'G05B']
+
+# All prefixes compiled into ONE alternation, so each code is checked
+# with a single .match() instead of an any(...startswith...) loop.
+SOFTWARE_PREFIX_REGEX = re.compile('|'.join(re.escape(prefix) for prefix in SOFTWARE_PREFIXES))
+
+def classify_ipc_string(ipc_string):
+    """
+    Classifies a patent from its raw, comma-separated IPC string.
+
+    Returns:
+        A (patent_type, ipc_codes) tuple, where patent_type is one of
+        'Software', 'Hybrid', 'Non-Software' or 'Unknown' and ipc_codes
+        is the cleaned list of codes.
+    """
+    # We must split ONLY on commas, not on spaces.
+    # old: ipc_codes = [code.strip() for code in re.split(r'[,\s]+', ipc_string) if code]
+    ipc_codes = [code.strip() for code in (ipc_string or "").split(',') if code.strip()]
+
+    if not ipc_codes:
+        return 'Unknown', ipc_codes
+
+    software_count = sum(1 for code in ipc_codes if SOFTWARE_PREFIX_REGEX.match(code))
+    other_count = len(ipc_codes) - software_count
+
+    if software_count > 0 and other_count > 0:
+        return 'Hybrid', ipc_codes
+    elif software_count > 0:
+        return 'Software', ipc_codes
+    else:
+        return 'Non-Software', ipc_codes
+
+def classify_batch(patents):
+    """
+    Classifies a batch of Patents (only application_no and ipc_codes
+    are needed).
+
+    Returns:
+        A list of (app_no, patent_type, ipc_codes) tuples, ready for
+        database.update_patent_classifications().
+    """
+    classifications = []
+    for patent in patents:
+        patent_type, ipc_codes = classify_ipc_string(patent.ipc_codes)
+        classifications.append((patent.application_no, patent_type, ipc_codes))
+    return classifications
+
+@metrics.timed('filter.run')
 def run_filter():
     """
-    Loads all 'newly_extracted' patents from the database,
-    classifies them based on IPC codes, and updates them in place.
+    Streams all 'newly_extracted' patents from the database in batches,
+    classifies them based on IPC codes, and updates each batch in a
+    single transaction.
     """
     print("--- Running Filter ---")
-    
-    # Define software IPC codes
-    SOFTWARE_PREFIXES = ['G06', 'H04L', 'G16H', 'G05B']
-    
-    # 1. Load patents from DATABASE, not JSON
-    patents_to_classify = database.get_patents_to_classify()
-    
-    if not patents_to_classify:
-        print("No new patents to classify. Exiting.")
-        return
 
-    print(f"Loaded {len(patents_to_classify)} unclassified patents from database.")
-    
     classified_counts = {
         "Software": 0,
         "Hybrid": 0,
         "Non-Software": 0,
         "Unknown": 0
     }
-    
-    # 2. Loop and classify
-    for patent in patents_to_classify:
-        # Get data from the database row
-        ipc_string = patent["ipc_codes"] or ""
-        
-        # -----------------------------------------------------------------
-        # --- THIS IS THE BUG FIX ---
-        # -----------------------------------------------------------------
-        # We must split ONLY on commas, not on spaces.
-        # old: ipc_codes = [code.strip() for code in re.split(r'[,\s]+', ipc_string) if code]
-        ipc_codes_raw = ipc_string.split(',')
-        ipc_codes = [code.strip() for code in ipc_codes_raw if code.strip()]
-        # -----------------------------------------------------------------
-        
-        if not ipc_codes:
-            patent_type = 'Unknown'
-        else:
-            software_count = 0
-            other_count = 0
-            
-            for code in ipc_codes:
-                if any(code.startswith(prefix) for prefix in SOFTWARE_PREFIXES):
-                    software_count += 1
-                else:
-                    other_count += 1
-            
-            # 3. Assign type
-            if software_count > 0 and other_count > 0:
-                patent_type = 'Hybrid'
-            elif software_count > 0 and other_count == 0:
-                patent_type = 'Software'
-            else:
-                patent_type = 'Non-Software'
-        
-        # 4. Update the database
-        app_no = patent["application_no"]
-        database.update_patent_classification(app_no, patent_type, ipc_codes)
-        
-        # Update our local counter
-        classified_counts[patent_type] += 1
-
-    # 5. Print summary
+    total_loaded = 0
+    total_updated = 0
+
+    # 1. Stream patents from the DATABASE, one batch at a time
+    for batch in database.iter_patents_to_classify():
+        total_loaded += len(batch)
+
+        # 2. Classify the whole batch
+        with metrics.timer('filter.classify'):
+            classifications = classify_batch(batch)
+
+        # 3. Update the database (one executemany per batch)
+        updated = database.update_patent_classifications(classifications)
+        total_updated += updated
+        metrics.count('filter.patents', updated)
+
+        # Update our local counters (only for rows actually saved)
+        if updated:
+            for _, patent_type, _ in classifications:
+                classified_counts[patent_type] += 1
+
+        print(f"  Classified {total_loaded} patents so far...")
+
+    if total_loaded == 0:
+        print("No new patents to classify. Exiting.")
+        return
+
+    # 4. Print summary
     print("\n--- Filtering complete ---")
     print(f"  ✓ Classified {classified_counts['Software']} as 'Software'")
     print(f"  ✓ Classified {classified_counts['Hybrid']} as 'Hybrid'")
     print(f"  ✓ Classified {classified_counts['Non-Software']} as 'Non-Software'")
     print(f"  ✓ Classified {classified_counts['Unknown']} as 'Unknown'")
-    print(f"Total patents updated in database: {len(patents_to_classify)}")
+    print(f"Total patents updated in database: {total_updated}")
 
 if __name__ == '__main__':
     # This check is still useful for direct testing
-    run_filter()
\ No newline at end of file
+    run_filter()
@@ -0,0 +1,198 @@
+# src/forms.py
+# -----------------------------------------------------------------
+# LIGHTWEIGHT HTML FORM EXTRACTION
+# -----------------------------------------------------------------
+# Every page the downloader and searcher read is only needed for one
+# form's action and a few named fields (or, on the journal listing,
+# the cells of one table). Building a full BeautifulSoup tree for that
+# is most of the cost of handling a page.
+#
+# These helpers run the standard library's event parser
+# (html.parser.HTMLParser) over the page, keep only the fields they
+# were asked for, and stop as soon as the target is complete.
+#
+#   form = forms.find_form(html, action='/PublicSearch/PublicationSearch/PatentDetails')
+#   form.action, form.get('ConnectionName'), form.buttons
+# -----------------------------------------------------------------
+from html.parser import HTMLParser
+
+class Form:
+    """
+    One <form>: its attributes, named field values and buttons.
+    """
+
+    def __init__(self, attrs):
+        self.attrs = attrs
+        self.action = attrs.get('action')
+        self.name = attrs.get('name')
+        # name -> value of every named <input>, <button>, <select> and
+        # <textarea> (the first one wins if a name repeats)
+        self.fields = {}
+        # (name, value, text) of every <button>, in page order
+        self.buttons = []
+        # name -> type of every named <input>, for find_input()
+        self.input_types = {}
+
+    def get(self, name, default=None):
+        return self.fields.get(name, default)
+
+    def find_input(self, name, input_type=None):
+        """
+        Returns the value of an <input> (optionally of a given type),
+        or None.
+        """
+        if name not in self.input_types:
+            return None
+        if input_type is not None and self.input_types[name] != input_type:
+            return None
+        return self.fields[name]
+
+class Cell:
+    """
+    One table cell: its text and the forms inside it.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.forms = []
+
+class _StopParsing(Exception):
+    pass
+
+class _PageParser(HTMLParser):
+    """
+    Collects forms (all of them, or the first that matches) and, if
+    asked, the rows of the first <table> or the src of one <img>.
+    """
+
+    def __init__(self, match=None, want_table=False, image_id=None):
+        super().__init__(convert_charrefs=True)
+        self.match = match
+        self.want_table = want_table
+        self.image_id = image_id
+        self.image_src = None
+        self.forms = []
+        self.rows = []
+        self._form = None
+        self._button = None    # [name, value, text pieces]
+        self._field = None     # [name, text pieces] of a <textarea>
+        self._select = None
+        self._table_depth = 0
+        self._table_done = False
+        self._cell = None
+        self._cell_text = None
+
+    # --- parsing events ---
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: (value if value is not None else '') for name, value in attrs}
+
+        if tag == 'table' and self.want_table and not self._table_done:
+            self._table_depth += 1
+        elif tag == 'tr' and self._table_depth == 1:
+            self.rows.append([])
+        elif tag in ('td', 'th') and self._table_depth == 1 and self.rows:
+            self._cell = Cell()
+            self._cell_text = []
+            if tag == 'td':
+                # Only data cells count, like row.find_all('td')
+                self.rows[-1].append(self._cell)
+        elif tag == 'img' and self.image_id is not None and attrs.get('id') == self.image_id:
+            self.image_src = attrs.get('src')
+            raise _StopParsing()
+
+        if tag == 'form':
+            self._form = Form(attrs)
+            return
+        form = self._form
+        if form is None:
+            return
+        name = attrs.get('name')
+        if tag == 'input' and name:
+            form.fields.setdefault(name, attrs.get('value', ''))
+            form.input_types.setdefault(name, attrs.get('type', 'text').lower())
+        elif tag == 'button':
+            self._button = [name, attrs.get('value', ''), []]
+        elif tag == 'select' and name:
+            self._select = name
+        elif tag == 'option' and self._select:
+            if self._select not in form.fields or 'selected' in attrs:
+                form.fields[self._select] = attrs.get('value')
+        elif tag == 'textarea' and name:
+            self._field = [name, []]
+
+    def handle_endtag(self, tag):
+        if tag == 'table' and self._table_depth:
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._table_done = True
+        elif tag in ('td', 'th') and self._cell is not None and self._table_depth == 1:
+            self._cell.text = ''.join(self._cell_text)
+            self._cell = None
+            self._cell_text = None
+
+        form = self._form
+        if form is None:
+            return
+        if tag == 'button' and self._button:
+            name, value, pieces = self._button
+            text = ' '.join(piece.strip() for piece in pieces if piece.strip())
+            form.buttons.append((name, value, text))
+            if name:
+                form.fields.setdefault(name, value)
+            self._button = None
+        elif tag == 'select':
+            self._select = None
+        elif tag == 'textarea' and self._field:
+            form.fields.setdefault(self._field[0], ''.join(self._field[1]))
+            self._field = None
+        elif tag == 'form':
+            self._form = None
+            if self._cell is not None:
+                self._cell.forms.append(form)
+            if self.match is None:
+                self.forms.append(form)
+            elif self.match(form):
+                self.forms.append(form)
+                raise _StopParsing()
+
+    def handle_data(self, data):
+        if self._cell_text is not None:
+            self._cell_text.append(data)
+        if self._button:
+            self._button[2].append(data)
+        if self._field:
+            self._field[1].append(data)
+
+def _parse(html, match=None, want_table=False, image_id=None):
+    parser = _PageParser(match, want_table, image_id)
+    try:
+        parser.feed(html)
+        parser.close()
+    except _StopParsing:
+        pass
+    return parser
+
+def find_form(html, action=None, name=None):
+    """
+    Returns the first form with the given 'action' and/or 'name'
+    attribute, or None. Parsing stops at the end of that form.
+    """
+    def match(form):
+        return ((action is None or form.action == action)
+                and (name is None or form.name == name))
+    forms = _parse(html, match).forms
+    return forms[0] if forms else None
+
+def find_image_src(html, image_id):
+    """
+    Returns the 'src' of the <img> with the given id, or None.
+    """
+    return _parse(html, match=lambda form: False, image_id=image_id).image_src
+
+def parse_table(html):
+    """
+    Returns the rows of the page's first <table> as lists of Cells
+    (one per <td>; header rows made of <th> come back empty).
+    """
+    return _parse(html, want_table=True).rows
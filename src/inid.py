@@ -0,0 +1,262 @@
+# src/inid.py
+# -----------------------------------------------------------------
+# INID-CODE TOKENIZER
+# -----------------------------------------------------------------
+# Every patent in the journal is laid out as a sequence of numbered
+# "INID" field markers, e.g.:
+#
+#   (12) PATENT APPLICATION PUBLICATION
+#   (21) Application No.202511087359 A
+#   (22) Date of filing of Application :15/09/2025
+#   ...
+#   (57) Abstract : ...
+#   No. of Pages : 11 No. of Claims : 2
+#
+# Instead of one giant backtracking regex, we find all the "(NN)"
+# markers in ONE left-to-right scan and then slice the text between
+# them. Parsing a page is linear in its length, even when it fails.
+# -----------------------------------------------------------------
+import re
+
+# Cheap pre-check: pages without this header are "fluff" (index, cover...)
+HEADER_REGEX = re.compile(r"\(12\)\s*PATENT APPLICATION PUBLICATION", re.IGNORECASE)
+
+# Any two-digit field marker, e.g. "(21)" or "(57)"
+MARKER_REGEX = re.compile(r"\((\d\d)\)")
+
+# The abstract runs until one of these (there is no (NN) marker after it)
+TERMINATOR_REGEX = re.compile(r"No\. of Pages|Description:", re.IGNORECASE)
+
+# Running header printed at the top of every journal page, e.g.
+# "The Patent Office Journal No. 43/2025 Dated  24/10/2025    104599"
+# It must be dropped before a record is stitched across pages.
+PAGE_HEADER_REGEX = re.compile(r"\A\s*The Patent Office Journal No\.[^\n]*\n", re.IGNORECASE)
+
+# A record may start on one page and continue onto AT MOST this many
+# following pages; this keeps the stitching buffer to about two pages.
+MAX_CONTINUATION_PAGES = 1
+
+# -----------------------------------------------------------------
+# FIELD LAYOUT
+# -----------------------------------------------------------------
+# (record key, INID code, label that follows the marker,
+#  codes that end this field, optional?)
+#
+# The stop codes mirror the lookaheads of the original regex, so the
+# tokenizer extracts exactly the same text.
+# -----------------------------------------------------------------
+FIELDS = [
+    ("application_no", "21", r"\s*Application No\.:?\s*", ("19", "22"), False),
+    ("date_of_filing", "22", r"\s*Date of filing of Application\s*:?\s*", ("43",), False),
+    ("publication_date", "43", r"\s*Publication Date\s*:?\s*", ("54",), False),
+    ("title", "54", r"\s*Title of the invention\s*:?\s*", ("51", "71"), False),
+    ("international_classification", "51", r"\s*International classification\s*:?\s*",
+        ("31", "32", "33", "86", "87", "61", "62", "71"), True),
+    ("applicant", "71", r"\s*Name of Applicant\s*:?\s*", ("72",), False),
+    ("inventor", "72", r"\s*Name of Inventor\s*:?\s*", ("57",), False),
+    ("abstract", "57", r"\s*Abstract\s*:?\s*", None, False),
+]
+
+# Pre-compile each label once, at import time
+FIELDS = [
+    (key, code, re.compile(label, re.IGNORECASE), stops, optional)
+    for key, code, label, stops, optional in FIELDS
+]
+
+# Fields whose newlines are folded into spaces (dates/app no. are single-line)
+MULTILINE_FIELDS = {"title", "international_classification", "applicant", "inventor", "abstract"}
+
+
+def is_patent_page(text):
+    """
+    Cheap pre-check: True if the text contains a patent header.
+    """
+    return HEADER_REGEX.search(text) is not None
+
+
+def tokenize(text, pos=0):
+    """
+    Scans 'text' once and returns every field marker found after 'pos'
+    as a list of (code, marker_start, marker_end) tuples.
+    """
+    return [(m.group(1), m.start(), m.end()) for m in MARKER_REGEX.finditer(text, pos)]
+
+
+def _find_field(text, markers, start, limit, code, label):
+    """
+    Returns the index of the first marker in markers[start:limit] with
+    the given code whose label matches, plus where its value begins.
+    Returns (None, None) if there isn't one.
+    """
+    for index in range(start, limit):
+        marker_code, _, marker_end = markers[index]
+        if marker_code != code:
+            continue
+        label_match = label.match(text, marker_end)
+        if label_match:
+            return index, label_match.end()
+    return None, None
+
+
+def _find_stop(markers, start, stops):
+    """
+    Returns the index of the first marker at or after 'start' whose
+    code is in 'stops', or None.
+    """
+    for index in range(start, len(markers)):
+        if markers[index][0] in stops:
+            return index
+    return None
+
+
+def parse_record(text, terminated=True):
+    """
+    Parses a single patent record out of 'text' (usually one page).
+
+    If 'terminated' is False, the abstract may run to the end of 'text'
+    when no "No. of Pages" terminator is found (used when the record's
+    end is known from elsewhere, e.g. the next record's header).
+
+    Returns:
+        A dict with keys application_no, date_of_filing, publication_date,
+        title, international_classification, applicant, inventor and
+        abstract, or None if the text doesn't hold a complete record.
+    """
+    header = HEADER_REGEX.search(text)
+    if not header:
+        return None
+
+    markers = tokenize(text, header.end())
+    record = {}
+    cursor = 0
+
+    for key, code, label, stops, optional in FIELDS:
+        # An optional field must appear before the next required one
+        # (for (51) that is (71)), so it can't "borrow" a later marker.
+        limit = len(markers)
+        if optional:
+            next_required = _find_stop(markers, cursor, ("71",))
+            if next_required is not None:
+                limit = next_required
+
+        index, value_start = _find_field(text, markers, cursor, limit, code, label)
+        if index is None:
+            if optional:
+                record[key] = ''
+                continue
+            return None
+
+        if stops is None:
+            # Last field: ends at the terminator text, not at a marker
+            terminator = TERMINATOR_REGEX.search(text, value_start)
+            if terminator:
+                value = text[value_start:terminator.start()]
+            elif not terminated:
+                value = text[value_start:]
+            else:
+                return None
+        else:
+            stop_index = _find_stop(markers, index + 1, stops)
+            if stop_index is None:
+                return None
+            value = text[value_start:markers[stop_index][1]]
+            # The stop marker is where the search for the next field begins
+            cursor = stop_index
+
+        value = value.strip()
+        if key in MULTILINE_FIELDS:
+            value = value.replace('\n', ' ')
+        record[key] = value
+
+    return record
+
+
+# -----------------------------------------------------------------
+# CROSS-PAGE STITCHING
+# -----------------------------------------------------------------
+
+def iter_records(pages, stop=None):
+    """
+    Streams patent records out of a sequence of pages, stitching records
+    whose abstract or inventor list spills onto the next page.
+
+    'pages' is an iterable of (page_index, page_text). A record is
+    emitted once its "No. of Pages" terminator or the NEXT record's
+    header has been seen, so at most about two pages of text are held.
+    Text before the first header (the tail of a record that started
+    before these pages) is ignored.
+
+    If 'stop' is given, only records that START before page 'stop' are
+    emitted; pages are read past 'stop' only to finish such a record.
+
+    Yields:
+        (start_page_index, record_dict, stitched) tuples, where 'stitched'
+        is True if the record was joined from more than one page.
+    """
+    pending = ""          # Text of an open record, starting at its header
+    pending_page = None   # Page the open record started on
+    pending_span = 0      # How many pages it has continued onto
+
+    for page_index, page_text in pages:
+        if stop is not None and page_index >= stop and not pending:
+            break
+
+        page_text = PAGE_HEADER_REGEX.sub("", page_text, count=1)
+
+        if pending:
+            text = pending + page_text
+            # Positions before 'boundary' belong to the previous page(s)
+            boundary = len(pending)
+            pending_span += 1
+        else:
+            header = HEADER_REGEX.search(page_text)
+            if not header:
+                # Fluff page (or the tail of a record we don't own)
+                continue
+            text = page_text[header.start():]
+            boundary = 0
+            pending_page = page_index
+            pending_span = 0
+
+        pending = ""
+        pos = 0
+        while True:
+            record_page = pending_page if pos < boundary else page_index
+            # Pages this record has already continued onto (0 for a
+            # record that starts on this page)
+            record_span = pending_span if pos < boundary else 0
+            next_header = HEADER_REGEX.search(text, pos + 1)
+            terminator = TERMINATOR_REGEX.search(text, pos)
+
+            if terminator and (not next_header or terminator.start() < next_header.start()):
+                end = next_header.start() if next_header else len(text)
+                record = parse_record(text[pos:end])
+            elif next_header:
+                # No terminator: the next header closes this record
+                end = next_header.start()
+                record = parse_record(text[pos:end], terminated=False)
+            elif record_span < MAX_CONTINUATION_PAGES:
+                # Record continues on the next page
+                pending = text[pos:]
+                pending_page = record_page
+                pending_span = record_span
+                break
+            else:
+                # Spilled over too many pages: emit what we have
+                end = len(text)
+                record = parse_record(text[pos:], terminated=False)
+
+            if record and (stop is None or record_page < stop):
+                yield record_page, record, pos < boundary < end
+            if end >= len(text):
+                break
+            pos = end
+
+        if stop is not None and page_index >= stop:
+            break
+
+    # End of input: flush a record still waiting for its terminator
+    if pending and (stop is None or pending_page < stop):
+        record = parse_record(pending, terminated=False)
+        if record:
+            yield pending_page, record, pending_span > 0
@@ -0,0 +1,360 @@
+# src/metrics.py
+# -----------------------------------------------------------------
+# PIPELINE METRICS
+# -----------------------------------------------------------------
+# Timings and counts recorded by the downloader, extractor, filter,
+# searcher and database while a command runs:
+#
+#   timers      name -> [calls, seconds]     e.g. 'pdf.get_text'
+#   counters    name -> total                e.g. 'download.bytes'
+#   histograms  name -> bucket counts        e.g. 'db.commit' latency
+#   journals    journal_id -> summary        (seconds, pages, patents...)
+#
+# main.py starts a run before a pipeline command and finishes it
+# afterwards: the run is saved to the 'pipeline_runs' table and, if
+# METRICS_EXPORT is set, written to METRICS_DIR as JSON or as
+# Prometheus text (for node_exporter's textfile collector).
+#
+# Recording is a lock and a dict update, cheap enough to leave on.
+# The hot loops (pages, patents) add up locally and record once per
+# shard instead of once per item.
+#
+# Extractor worker processes have their own registry: each shard
+# resets it and returns a snapshot(), which the parent merge()s.
+# -----------------------------------------------------------------
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import config
+
+_lock = threading.Lock()
+_timers = {}
+_counters = {}
+_histograms = {}
+_journals = {}
+_run = {'command': None, 'started_at': None, 'started': None}
+
+# Timers that are mostly waiting on the network (the 'network' part of
+# a run's breakdown; parallel downloads and searches add up)
+NETWORK_TIMERS = ('download.listing', 'download.transfer', 'search.captcha', 'search.submit', 'search.documents')
+
+# Per-journal rates, derived from the summed totals (rate -> total);
+# adding up the rates of a journal processed twice would be wrong
+JOURNAL_RATES = {'pages_per_sec': 'pages', 'patents_per_sec': 'patents'}
+
+# --- Recording ---
+
+def add_time(name, seconds, calls=1):
+    with _lock:
+        timer = _timers.setdefault(name, [0, 0.0])
+        timer[0] += calls
+        timer[1] += seconds
+
+def count(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def observe(name, seconds):
+    """
+    Adds one latency to a histogram with METRICS_LATENCY_BUCKETS.
+    """
+    buckets = config.METRICS_LATENCY_BUCKETS
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            # One count per bucket, plus one for "above the last bound"
+            histogram = _histograms[name] = {'buckets': [0] * (len(buckets) + 1), 'count': 0, 'sum': 0.0}
+        index = 0
+        while index < len(buckets) and seconds > buckets[index]:
+            index += 1
+        histogram['buckets'][index] += 1
+        histogram['count'] += 1
+        histogram['sum'] += seconds
+
+@contextmanager
+def timer(name):
+    """
+    Adds the time spent in a 'with' block to timer 'name'.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(name, time.perf_counter() - started)
+
+def timed(name):
+    """
+    Decorator form of timer().
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def journal(journal_id, **fields):
+    """
+    Adds to the per-journal summary of 'journal_id' (numbers add up,
+    anything else is replaced). The JOURNAL_RATES are recomputed from
+    the totals and 'seconds' rather than added up.
+    """
+    with _lock:
+        summary = _journals.setdefault(journal_id, {})
+        for key, value in fields.items():
+            if key in JOURNAL_RATES:
+                continue
+            if isinstance(value, (int, float)) and isinstance(summary.get(key), (int, float)):
+                summary[key] += value
+            else:
+                summary[key] = value
+        if 'seconds' in summary:
+            for rate, total in JOURNAL_RATES.items():
+                if total in summary:
+                    summary[rate] = _rate(summary[total], summary['seconds'])
+
+# --- Snapshots (worker processes, per-journal deltas) ---
+
+def snapshot():
+    """
+    Returns a plain, picklable copy of everything recorded so far.
+    """
+    with _lock:
+        return {
+            'timers': {name: list(timer) for name, timer in _timers.items()},
+            'counters': dict(_counters),
+            'histograms': {name: {'buckets': list(h['buckets']), 'count': h['count'], 'sum': h['sum']}
+                           for name, h in _histograms.items()},
+            'journals': {journal_id: dict(summary) for journal_id, summary in _journals.items()},
+        }
+
+def merge(other):
+    """
+    Adds a snapshot() taken in another process to this one.
+    """
+    for name, (calls, seconds) in other['timers'].items():
+        add_time(name, seconds, calls)
+    for name, amount in other['counters'].items():
+        count(name, amount)
+    with _lock:
+        for name, h in other['histograms'].items():
+            histogram = _histograms.setdefault(name, {'buckets': [0] * len(h['buckets']), 'count': 0, 'sum': 0.0})
+            histogram['buckets'] = [a + b for a, b in zip(histogram['buckets'], h['buckets'])]
+            histogram['count'] += h['count']
+            histogram['sum'] += h['sum']
+    for journal_id, summary in other['journals'].items():
+        journal(journal_id, **summary)
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _histograms.clear()
+        _journals.clear()
+
+def mark():
+    """
+    Returns the current timer seconds and counter totals, for since().
+    """
+    with _lock:
+        totals = {name: timer[1] for name, timer in _timers.items()}
+        totals.update(_counters)
+        return totals
+
+def since(marked):
+    """
+    Returns {name: increase} of every timer and counter since mark().
+    """
+    now = mark()
+    return {name: value - marked.get(name, 0) for name, value in now.items()}
+
+# -----------------------------------------------------------------
+# RUNS (main.py)
+# -----------------------------------------------------------------
+
+def _rate(amount, seconds):
+    return round(amount / seconds, 1) if seconds > 0 else None
+
+def start_run(command):
+    reset()
+    _run['command'] = command
+    _run['started_at'] = datetime.now().isoformat(timespec='seconds')
+    _run['started'] = time.monotonic()
+
+def current_run(status='running'):
+    """
+    Returns the run so far as a dict: totals, rates, the time split
+    between network, page rendering, parsing and database commits,
+    and everything recorded (see snapshot()).
+    """
+    run = snapshot()
+    elapsed = time.monotonic() - _run['started'] if _run['started'] is not None else 0.0
+    counters = run['counters']
+    timers = run['timers']
+    commits = run['histograms'].get('db.commit', {'sum': 0.0})
+
+    def timer_seconds(name):
+        return round(timers.get(name, [0, 0.0])[1], 3)
+
+    run.update({
+        'command': _run['command'],
+        'status': status,
+        'started_at': _run['started_at'],
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'seconds': round(elapsed, 3),
+        'pages': counters.get('extract.pages', 0),
+        'patents': counters.get('extract.patents', 0),
+        'bytes_downloaded': counters.get('download.bytes', 0),
+        'breakdown': {
+            'network': round(sum(timer_seconds(name) for name in NETWORK_TIMERS), 3),
+            'get_text': timer_seconds('pdf.get_text'),
+            'parse': timer_seconds('extract.parse'),
+            'db_commit': round(commits['sum'], 3),
+        },
+        'latency_buckets': list(config.METRICS_LATENCY_BUCKETS),
+    })
+    extract_seconds = timers.get('extract.journal', [0, 0.0])[1]
+    run['rates'] = {
+        'pages_per_sec': _rate(run['pages'], extract_seconds),
+        'patents_per_sec': _rate(run['patents'], extract_seconds),
+        'classified_per_sec': _rate(counters.get('filter.patents', 0), timers.get('filter.run', [0, 0.0])[1]),
+        'download_bytes_per_sec': _rate(run['bytes_downloaded'], timers.get('download.transfer', [0, 0.0])[1]),
+    }
+    return run
+
+def finish_run(status='ok'):
+    """
+    Ends the run started by start_run() and returns it (current_run()).
+    """
+    run = current_run(status)
+    _run['command'] = _run['started_at'] = _run['started'] = None
+    return run
+
+# -----------------------------------------------------------------
+# EXPORT (METRICS_EXPORT)
+# -----------------------------------------------------------------
+
+def _prometheus_name(name):
+    return "patent_watch_" + name.replace('.', '_')
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+def to_prometheus(run):
+    """
+    Formats a run in the Prometheus text exposition format.
+    """
+    command = run['command']
+    lines = [
+        "# TYPE patent_watch_run_seconds gauge",
+        f"patent_watch_run_seconds{_labels(command=command)} {run['seconds']}",
+        "# TYPE patent_watch_run_timestamp_seconds gauge",
+        f"patent_watch_run_timestamp_seconds{_labels(command=command)} {int(time.time())}",
+        "# TYPE patent_watch_stage_seconds_total counter",
+    ]
+    for name, (calls, seconds) in sorted(run['timers'].items()):
+        lines.append(f"patent_watch_stage_seconds_total{_labels(command=command, stage=name)} {seconds:.6f}")
+    lines.append("# TYPE patent_watch_stage_calls_total counter")
+    for name, (calls, seconds) in sorted(run['timers'].items()):
+        lines.append(f"patent_watch_stage_calls_total{_labels(command=command, stage=name)} {calls}")
+    lines.append("# TYPE patent_watch_events_total counter")
+    for name, amount in sorted(run['counters'].items()):
+        lines.append(f"patent_watch_events_total{_labels(command=command, event=name)} {amount}")
+    for name, rate in sorted(run['rates'].items()):
+        if rate is not None:
+            metric = _prometheus_name(name)
+            lines += [f"# TYPE {metric} gauge", f"{metric}{_labels(command=command)} {rate}"]
+
+    for name, histogram in sorted(run['histograms'].items()):
+        metric = _prometheus_name(name) + "_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        bounds = [str(bound) for bound in run['latency_buckets']] + ["+Inf"]
+        for bound, bucket in zip(bounds, histogram['buckets']):
+            cumulative += bucket
+            lines.append(f"{metric}_bucket{_labels(command=command, le=bound)} {cumulative}")
+        lines.append(f"{metric}_sum{_labels(command=command)} {histogram['sum']:.6f}")
+        lines.append(f"{metric}_count{_labels(command=command)} {histogram['count']}")
+
+    for field in ('seconds', 'pages', 'patents'):
+        metric = f"patent_watch_journal_{field}"
+        lines.append(f"# TYPE {metric} gauge")
+        for journal_id, summary in sorted(run['journals'].items()):
+            if field in summary:
+                lines.append(f"{metric}{_labels(command=command, journal=journal_id)} {summary[field]}")
+    return "\n".join(lines) + "\n"
+
+def write_export(run):
+    """
+    Writes a run to METRICS_DIR in the METRICS_EXPORT format, one file
+    per command (replaced by its next run). Returns the path, or None.
+    """
+    export = config.METRICS_EXPORT
+    if not export or not run['command']:
+        return None
+    if export == 'json':
+        text = json.dumps(run, indent=2)
+        path = config.METRICS_DIR / f"{run['command']}.json"
+    elif export == 'prometheus':
+        text = to_prometheus(run)
+        path = config.METRICS_DIR / f"{run['command']}.prom"
+    else:
+        print(f"Unknown METRICS_EXPORT '{export}' (expected 'json' or 'prometheus').")
+        return None
+
+    config.METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    # Written under a temporary name and renamed, so a scraper never
+    # reads half a file
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    temp_path.replace(path)
+    return path
+
+def format_summary(run):
+    """
+    One line per run: totals, rates and where the time went.
+    """
+    parts = [f"{run['seconds']:.1f}s"]
+    if run['pages']:
+        parts.append(f"{run['pages']} pages ({run['rates']['pages_per_sec']}/s)")
+    if run['patents']:
+        parts.append(f"{run['patents']} patents ({run['rates']['patents_per_sec']}/s)")
+    if run['bytes_downloaded']:
+        parts.append(f"{run['bytes_downloaded'] / 1024 / 1024:.1f} MB downloaded")
+    breakdown = run['breakdown']
+    parts.append("time in network {network:.1f}s, get_text {get_text:.1f}s, "
+                 "parse {parse:.1f}s, db commits {db_commit:.1f}s".format(**breakdown))
+    return ", ".join(parts)
+
+def print_runs(rows):
+    """
+    Prints 'pipeline_runs' rows (newest first) with their time
+    breakdown, and the per-journal summaries of each run.
+    """
+    if not rows:
+        print("No pipeline runs recorded yet.")
+        return
+    print(f"{'#':>5}  {'command':<9} {'started':<19} {'status':<11} {'seconds':>8} "
+          f"{'pages/s':>8} {'pat/s':>8} {'MB':>7}   {'network':>8} {'get_text':>8} {'parse':>8} {'db':>8}")
+    for row in rows:
+        run = json.loads(row['metrics'] or '{}')
+        rates = run.get('rates', {})
+        breakdown = run.get('breakdown', {})
+        print(f"{row['run_id']:>5}  {row['command']:<9} {row['started_at']:<19} {row['status']:<11} "
+              f"{row['seconds'] or 0:>8.1f} {rates.get('pages_per_sec') or '-':>8} "
+              f"{rates.get('patents_per_sec') or '-':>8} {(row['bytes_downloaded'] or 0) / 1024 / 1024:>7.1f}   "
+              f"{breakdown.get('network', 0):>8.1f} {breakdown.get('get_text', 0):>8.1f} "
+              f"{breakdown.get('parse', 0):>8.1f} {breakdown.get('db_commit', 0):>8.1f}")
+        for journal_id, summary in sorted(run.get('journals', {}).items()):
+            if 'seconds' not in summary:
+                continue # Downloaded only
+            print(f"         journal {journal_id}: {summary['seconds']:.1f}s, {summary['pages']} pages, "
+                  f"{summary['patents']} patents ({summary['patents_per_sec']}/s); get_text "
+                  f"{summary['get_text_seconds']:.1f}s, parse {summary['parse_seconds']:.1f}s, "
+                  f"db writes {summary['db_write_seconds']:.1f}s")
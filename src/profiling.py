@@ -0,0 +1,183 @@
+# src/profiling.py
+# -----------------------------------------------------------------
+# PROFILER HOOK (main.py --profile)
+# -----------------------------------------------------------------
+# Wraps any main.py command in one of two profilers:
+#
+#   cprofile  Deterministic: every Python call of the main thread is
+#             timed. Exact call counts, but slows pure-Python code
+#             down noticeably. Saved as a .pstats file:
+#                 python -m pstats data/output/profiles/run12_extract.pstats
+#   sample    Statistical: a background thread records the stack of
+#             every thread each PROFILE_SAMPLE_INTERVAL seconds. Wall
+#             clock, so network and lock waits show up too. Overhead
+#             is about 1%. Saved as collapsed stacks (one
+#             "frame;frame;frame count" line per stack) for
+#             flamegraph.pl or speedscope.
+#
+# Files go to PROFILE_DIR, named after the run's 'pipeline_runs' ID,
+# and the top PROFILE_TOP_N functions are printed when the command
+# ends (also after Ctrl+C).
+#
+# Neither mode sees inside 'extract --workers N' worker processes:
+# profile with --workers 1 to look at the parser itself.
+# -----------------------------------------------------------------
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+import config
+
+MODES = ('cprofile', 'sample')
+
+# Same as '--profile <mode>', for runs started by cron or a service
+ENV_VAR = 'PATENT_WATCH_PROFILE'
+
+def profile_mode(argv):
+    """
+    Returns the profiler requested by '--profile [cprofile|sample]' or
+    the PATENT_WATCH_PROFILE environment variable (None if neither),
+    and removes the flag from 'argv' so commands never see it.
+
+    Raises:
+        ValueError for an unknown mode.
+    """
+    mode = None
+    if '--profile' in argv:
+        index = argv.index('--profile')
+        del argv[index]
+        mode = 'cprofile'
+        if index < len(argv) and argv[index].lower() in MODES:
+            mode = argv.pop(index).lower()
+    elif os.environ.get(ENV_VAR):
+        mode = os.environ[ENV_VAR].strip().lower()
+        if mode in ('1', 'true', 'yes'):
+            mode = 'cprofile'
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"Unknown profiler '{mode}' (expected {' or '.join(MODES)}).")
+    return mode
+
+def _file_stem(command, run_id):
+    if run_id is not None:
+        return f"run{run_id}_{command}"
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{command}"
+
+class DeterministicProfiler:
+    """
+    cProfile around the command (main thread only).
+    """
+
+    suffix = '.pstats'
+
+    def __init__(self):
+        # cProfile and pstats are imported here: main.py imports this
+        # module for every command, profiled or not
+        import cProfile
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def write(self, path):
+        self._profile.dump_stats(path)
+
+    def summary(self, top):
+        import pstats
+        stats = pstats.Stats(self._profile).stats
+        if not stats:
+            return ["  (no calls recorded)"]
+        total = sum(tottime for _, _, tottime, _, _ in stats.values()) or 1
+        rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+        lines = [f"  {'self %':>7} {'self s':>8} {'total s':>8} {'calls':>9}  function"]
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in rows:
+            lines.append(f"  {tottime / total:7.1%} {tottime:8.3f} {cumtime:8.3f} {calls:>9}  "
+                         f"{name} ({os.path.basename(filename)}:{line})")
+        return lines
+
+class SamplingProfiler:
+    """
+    Samples the stack of every thread from a background thread.
+    """
+
+    suffix = '.collapsed'
+
+    def __init__(self, interval=None):
+        self.interval = interval or config.PROFILE_SAMPLE_INTERVAL
+        # (thread name, frame label, ...) root first -> times seen
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, seen in self.stacks.most_common():
+                f.write(f"{';'.join(stack)} {seen}\n")
+
+    def summary(self, top):
+        if not self.stacks:
+            return ["  (no samples: the command ended within one interval)"]
+        own = Counter()
+        inclusive = Counter()
+        for stack, seen in self.stacks.items():
+            own[stack[-1]] += seen
+            # Recursion counts a function once per sample
+            for label in set(stack[1:]):
+                inclusive[label] += seen
+        stack_samples = sum(self.stacks.values())
+        lines = [f"  {self.samples} samples every {self.interval * 1000:g} ms "
+                 f"(all threads; % of thread samples)",
+                 f"  {'self %':>7} {'total %':>8}  function"]
+        for label, seen in own.most_common(top):
+            lines.append(f"  {seen / stack_samples:7.1%} {inclusive[label] / stack_samples:8.1%}  {label}")
+        return lines
+
+def start(mode):
+    """
+    Starts a profiler ('cprofile' or 'sample') and returns it.
+    """
+    profiler = DeterministicProfiler() if mode == 'cprofile' else SamplingProfiler()
+    profiler.start()
+    return profiler
+
+def save(profiler, command, run_id=None):
+    """
+    Writes a stopped profiler's file to PROFILE_DIR and prints the
+    hottest functions. Returns the file's path.
+    """
+    config.PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = config.PROFILE_DIR / (_file_stem(command, run_id) + profiler.suffix)
+    profiler.write(path)
+    print(f"\n--- Profile: top {config.PROFILE_TOP_N} functions by self time ---")
+    for line in profiler.summary(config.PROFILE_TOP_N):
+        print(line)
+    print(f"  Saved to {path}")
+    return path
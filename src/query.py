@@ -0,0 +1,63 @@
+# src/query.py
+# -----------------------------------------------------------------
+# 'query' COMMAND (main.py)
+# -----------------------------------------------------------------
+# Ranked full-text search over every extracted patent, backed by the
+# 'patents_fts' FTS5 index (see database.CREATE_PATENTS_FTS_SQL).
+#
+#   python main.py query "drone delivery"
+#   python main.py query "title:blockchain AND payment*" --limit 5
+#   python main.py query --ipc G06Q      (by IPC subclass or code prefix)
+# -----------------------------------------------------------------
+import time
+
+from . import database
+
+def run_query(terms, limit=20):
+    """
+    Searches the patents for 'terms' and prints the best matches
+    with a highlighted snippet of where they matched.
+
+    Returns:
+        The list of result rows.
+    """
+    start = time.perf_counter()
+    results = database.search_patents(terms, limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if not results:
+        print(f"No patents match '{terms}' ({elapsed_ms:.1f} ms).")
+        return results
+
+    print(f"--- Top {len(results)} matches for '{terms}' ({elapsed_ms:.1f} ms) ---\n")
+    for rank, row in enumerate(results, start=1):
+        patent_type = row['patent_type'] or 'unclassified'
+        print(f"{rank:3}. {row['application_no']}  [{patent_type}]  {row['publication_date'] or ''}")
+        print(f"     {row['title']}")
+        print(f"     {' '.join(row['snippet'].split())}\n")
+    return results
+
+def run_ipc_query(prefix, limit=20):
+    """
+    Prints the classified patents filed under an IPC subclass
+    (e.g. 'G06Q') or code prefix (e.g. 'G06Q0020').
+
+    Returns:
+        The list of result rows.
+    """
+    start = time.perf_counter()
+    results = database.get_patents_by_ipc(prefix, limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if not results:
+        print(f"No classified patents under IPC '{prefix}' ({elapsed_ms:.1f} ms).")
+        return results
+
+    print(f"--- {len(results)} patents under IPC '{prefix}' ({elapsed_ms:.1f} ms) ---\n")
+    for row in results:
+        print(f"  {row['application_no']}  [{row['patent_type']}]  {row['title']}")
+    return results
+
+if __name__ == '__main__':
+    import sys
+    run_query(" ".join(sys.argv[1:]) or "software")
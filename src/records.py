@@ -0,0 +1,127 @@
+# src/records.py
+# -----------------------------------------------------------------
+# THE PATENT RECORD
+# -----------------------------------------------------------------
+# One compact record type for a patent, wherever it travels: out of
+# the extractor, into the database writer, through the filter and the
+# searcher/retriever, and out of exports.
+#
+# Its attributes are the columns of the 'patents' table. It uses
+# __slots__ (no per-record __dict__), and the few strings that repeat
+# across thousands of records (status, patent type, publication type,
+# the journal's dates) are interned, so every record shares one copy.
+# benchmarks/bench_records.py compares it with the dicts and
+# sqlite3.Row objects it replaces.
+# -----------------------------------------------------------------
+import sys
+
+from . import utils
+
+# The 'patents' columns a record carries, in INSERT_PATENT_SQL order
+FIELDS = (
+    'application_no', 'title', 'date_of_filing', 'publication_date',
+    'abstract', 'ipc_codes', 'patent_type', 'status', 'publication_type',
+    'applicant', 'inventor', 'date_of_filing_iso', 'publication_date_iso',
+)
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+class Patent:
+    """
+    A patent: the columns of one 'patents' row. Missing fields are None.
+
+    'ipc_codes' holds the raw comma-separated string from the journal
+    until the filter classifies the patent, then its JSON list of codes.
+
+    The dates are kept as printed (DD/MM/YYYY) and as YYYY-MM-DD in the
+    '_iso' fields, which are derived from the printed ones unless given.
+
+    Records are equal when every field is; they hash by application_no.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, application_no=None, title=None, date_of_filing=None,
+                 publication_date=None, abstract=None, ipc_codes=None,
+                 patent_type=None, status=None, publication_type=None,
+                 applicant=None, inventor=None,
+                 date_of_filing_iso=None, publication_date_iso=None):
+        self.application_no = application_no
+        self.title = title
+        self.date_of_filing = _intern(date_of_filing)
+        self.publication_date = _intern(publication_date)
+        self.abstract = abstract
+        self.ipc_codes = ipc_codes
+        self.patent_type = _intern(patent_type)
+        self.status = _intern(status)
+        self.publication_type = _intern(publication_type)
+        self.applicant = applicant
+        self.inventor = inventor
+        # Few distinct values across a journal: utils.iso_date() returns
+        # one cached string per date, and column values are interned
+        if date_of_filing_iso is None and date_of_filing:
+            date_of_filing_iso = utils.iso_date(date_of_filing)
+        if publication_date_iso is None and publication_date:
+            publication_date_iso = utils.iso_date(publication_date)
+        self.date_of_filing_iso = _intern(date_of_filing_iso)
+        self.publication_date_iso = _intern(publication_date_iso)
+
+    @classmethod
+    def from_extracted(cls, record, publication_type):
+        """
+        Builds a new patent from an inid.parse_record() dict.
+        """
+        return cls(
+            application_no=record.get('application_no'),
+            title=record.get('title'),
+            date_of_filing=record.get('date_of_filing'),
+            publication_date=record.get('publication_date'),
+            abstract=record.get('abstract'),
+            ipc_codes=record.get('international_classification'),
+            publication_type=publication_type,
+            applicant=record.get('applicant'),
+            inventor=record.get('inventor'),
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Builds a patent from a sqlite3.Row of any subset of the
+        'patents' columns.
+        """
+        return cls(**{key: row[key] for key in row.keys() if key in FIELDS})
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a patent from a dict of column values. Extractor-style
+        dicts ('international_classification') are accepted too.
+        """
+        values = {key: data[key] for key in FIELDS if key in data}
+        if 'ipc_codes' not in values and 'international_classification' in data:
+            values['ipc_codes'] = data['international_classification']
+        return cls(**values)
+
+    def to_dict(self):
+        """
+        Returns the record as a {column: value} dict (e.g. for JSON).
+        """
+        return {key: getattr(self, key) for key in FIELDS}
+
+    def __reduce__(self):
+        # Sent between processes as a plain tuple of values
+        return (Patent, tuple(getattr(self, key) for key in FIELDS))
+
+    def __eq__(self, other):
+        if not isinstance(other, Patent):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in FIELDS)
+
+    def __hash__(self):
+        # Consistent with __eq__ (equal records share an application_no),
+        # so records can be deduplicated in sets and used as dict keys
+        return hash(self.application_no)
+
+    def __repr__(self):
+        return f"Patent({self.application_no!r}, status={self.status!r}, patent_type={self.patent_type!r})"
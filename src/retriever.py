@@ -0,0 +1,288 @@
+# src/retriever.py
+# -----------------------------------------------------------------
+# 'retrieve' COMMAND (main.py)
+# -----------------------------------------------------------------
+# Runs the searcher's stages for every 'classified' Software/Hybrid
+# patent in the database, so the CAPTCHA is the only thing anyone has
+# to wait for:
+#
+#   prefetch threads:  new session + CAPTCHA image, a few ahead
+#   main thread:       the solve queue - a human (or a solver function)
+#                      answers the CAPTCHAs back to back
+#   worker threads:    search -> details -> status -> View Documents
+#
+# A solved session goes into a SessionPool and keeps searching for one
+# patent after another until the portal expires it. CAPTCHAs are only
+# needed to open RETRIEVER_WORKERS sessions and to replace the ones
+# that expire, not once per patent.
+#
+# Status flow:  classified -> retrieval_in_progress
+#                  -> documents_retrieved | error_captcha | error_retrieval
+#
+# A patent whose session expired mid-search is retried on another
+# session, up to MAX_SESSION_EXPIRED_RETRIES times. Patents that were
+# claimed but never attempted (or whose session expired as the run was
+# stopped) go back to 'classified'.
+# -----------------------------------------------------------------
+import importlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+import config
+from . import database
+from . import metrics
+from . import searcher
+from .sessionpool import SessionPool
+
+# Worker threads report while the main thread may be at the prompt
+_print_lock = threading.Lock()
+
+# _retrieve() result for a patent that must be retried on another session
+SESSION_EXPIRED = 'session_expired'
+
+# Give up when this many CAPTCHA downloads fail in a row (site down)
+MAX_CAPTCHA_FETCH_FAILURES = 3
+
+# Give up on a patent after its session expired mid-search this many
+# times (a patent that always ends on the search page would otherwise
+# cost a new CAPTCHA forever)
+MAX_SESSION_EXPIRED_RETRIES = 2
+
+def _report(message):
+    with _print_lock:
+        print(message)
+
+def _file_stem(patent):
+    # "202511087359 A" -> "202511087359"
+    return patent.application_no.split(' ')[0]
+
+def _load_solver():
+    """
+    Imports RETRIEVER_CAPTCHA_SOLVER ("module:function"), or returns
+    None to ask a human.
+    """
+    if not config.RETRIEVER_CAPTCHA_SOLVER:
+        return None
+    module_name, _, function_name = config.RETRIEVER_CAPTCHA_SOLVER.partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+def _prefetch(session, number):
+    """
+    Fetches the CAPTCHA of a new session and saves it to CAPTCHA_DIR.
+
+    Returns:
+        (image bytes, image path)
+    """
+    image = searcher.fetch_captcha(session)
+    image_path = config.CAPTCHA_DIR / f"captcha_{number}.jpg"
+    with open(image_path, 'wb') as f:
+        f.write(image)
+    return image, image_path
+
+def _retrieve(search_session, patent):
+    """
+    Runs every stage after the CAPTCHA for one patent and records the
+    outcome in the database.
+
+    Returns:
+        The patent's new status, or SESSION_EXPIRED if a reused session
+        had expired (the patent is untouched and should be retried).
+    """
+    app_no = patent.application_no
+    session = search_session.session
+    try:
+        post_response = searcher.submit_search(session, patent, search_session.captcha_text)
+        search_session.searches += 1
+        documents_html = searcher.open_documents(session, post_response, search_session=search_session)
+        documents_path = config.DOCUMENTS_DIR / f"{_file_stem(patent)}.html"
+        with open(documents_path, "w", encoding="utf-8") as f:
+            f.write(documents_html)
+        status = 'documents_retrieved'
+        _report(f"  ✓ {app_no}: documents saved to {documents_path}")
+    except searcher.CaptchaError:
+        if not search_session.is_fresh():
+            # The answer was accepted before: the portal dropped the session
+            return SESSION_EXPIRED
+        status = 'error_captcha'
+        _report(f"  ✗ {app_no}: invalid CAPTCHA.")
+    except searcher.RetrievalError as e:
+        status = 'error_retrieval'
+        message = f"  ✗ {app_no}: {e}"
+        if e.page is not None:
+            error_path = config.DOCUMENTS_DIR / f"{_file_stem(patent)}.error.html"
+            with open(error_path, "w", encoding="utf-8") as f:
+                f.write(e.page)
+            message += f" (page saved to {error_path})"
+        _report(message)
+    except requests.exceptions.RequestException as e:
+        status = 'error_retrieval'
+        _report(f"  ✗ {app_no}: {e}")
+    except Exception as e:
+        # e.g. a page that changed layout under the parser
+        status = 'error_retrieval'
+        _report(f"  ✗ {app_no}: unexpected error ({e!r}).")
+
+    database.update_patent_status(app_no, status)
+    metrics.count(f'retrieve.{status}')
+    return status
+
+def _ask_human(image_path, waiting, ready):
+    """
+    Prompts for one CAPTCHA. Returns the answer, '' for a new image,
+    or None to stop.
+    """
+    _report(f"\nCAPTCHA: {image_path}  ({waiting} patents waiting, {ready} more CAPTCHAs ready)")
+    answer = input("  Enter CAPTCHA text (Enter = new image, 'q' = stop): ").strip()
+    if answer.lower() == 'q':
+        return None
+    return answer
+
+def run_retriever(limit=None, include_errors=False):
+    """
+    Retrieves the 'View Documents' page of up to 'limit' classified
+    Software/Hybrid patents (default: RETRIEVER_BATCH_SIZE).
+
+    With 'include_errors', patents whose retrieval failed before are
+    retried as well.
+    """
+    print("--- Running Retriever ---")
+    limit = limit or config.RETRIEVER_BATCH_SIZE
+
+    try:
+        solver = _load_solver()
+    except (ImportError, AttributeError) as e:
+        print(f"Error: could not load CAPTCHA solver '{config.RETRIEVER_CAPTCHA_SOLVER}': {e}")
+        return
+
+    patents = database.claim_patents_for_retrieval(limit, include_errors)
+    if not patents:
+        print("No classified Software/Hybrid patents waiting for retrieval.")
+        return
+    print(f"Claimed {len(patents)} patents for retrieval.")
+
+    config.CAPTCHA_DIR.mkdir(parents=True, exist_ok=True)
+    config.DOCUMENTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    pending = deque(patents)       # not yet handed to a worker
+    solve_queue = deque()          # (session, future of _prefetch)
+    in_flight = {}                 # future of _retrieve -> (patent, search_session)
+    outcomes = {}
+    expired_retries = {}           # application_no -> times requeued
+    state = {'captchas': 0, 'fetch_failures': 0}
+
+    pool = SessionPool()
+    prefetch_pool = ThreadPoolExecutor(max_workers=config.RETRIEVER_CAPTCHA_PREFETCH)
+    worker_pool = ThreadPoolExecutor(max_workers=config.RETRIEVER_WORKERS)
+
+    def fill_solve_queue():
+        # Only fetch the CAPTCHAs still needed: one per missing session
+        missing = min(config.RETRIEVER_WORKERS - pool.size, len(pending))
+        while len(solve_queue) < min(missing, config.RETRIEVER_CAPTCHA_PREFETCH):
+            state['captchas'] += 1
+            session = searcher.new_session()
+            solve_queue.append((session, prefetch_pool.submit(_prefetch, session, state['captchas'])))
+
+    def dispatch(patent, search_session):
+        future = worker_pool.submit(_retrieve, search_session, patent)
+        in_flight[future] = (patent, search_session)
+
+    def collect(done):
+        for future in done:
+            patent, search_session = in_flight.pop(future)
+            status = future.result()
+            if status == SESSION_EXPIRED:
+                pool.discard(search_session, expired=True)
+                app_no = patent.application_no
+                retries = expired_retries.get(app_no, 0)
+                if retries < MAX_SESSION_EXPIRED_RETRIES:
+                    expired_retries[app_no] = retries + 1
+                    pending.appendleft(patent)
+                    continue
+                status = 'error_retrieval'
+                database.update_patent_status(app_no, status)
+                metrics.count(f'retrieve.{status}')
+                _report(f"  ✗ {app_no}: session expired on {retries + 1} searches, giving up.")
+            elif status == 'error_captcha':
+                pool.discard(search_session)
+            else:
+                # Failures after the CAPTCHA don't mean the session is bad;
+                # if it is, its next search says so
+                pool.release(search_session)
+            outcomes[status] = outcomes.get(status, 0) + 1
+
+    def solve_next():
+        """
+        Opens one more session. Returns False to stop the run.
+        """
+        fill_solve_queue()
+        session, future = solve_queue.popleft()
+        try:
+            image, image_path = future.result()
+            state['fetch_failures'] = 0
+        except (searcher.RetrievalError, requests.exceptions.RequestException, OSError) as e:
+            _report(f"  ✗ Could not fetch a CAPTCHA ({e}).")
+            session.close()
+            state['fetch_failures'] += 1
+            return state['fetch_failures'] < MAX_CAPTCHA_FETCH_FAILURES
+
+        if solver:
+            try:
+                answer = solver(image)
+            except Exception as e:
+                _report(f"  ✗ CAPTCHA solver failed ({e}).")
+                answer = ''
+        else:
+            ready = sum(1 for _, f in solve_queue if f.done())
+            answer = _ask_human(image_path, len(pending), ready)
+
+        if answer is None or not answer:
+            session.close()
+            return answer is not None
+        # The first search with it tells us whether the answer was right
+        dispatch(pending.popleft(), pool.add(session, answer))
+        return True
+
+    try:
+        fill_solve_queue()
+        while pending or in_flight:
+            # Reuse every idle session before asking for a new CAPTCHA
+            while pending and len(in_flight) < config.RETRIEVER_WORKERS:
+                search_session = pool.acquire()
+                if search_session is None:
+                    break
+                dispatch(pending.popleft(), search_session)
+
+            if pending and pool.size < config.RETRIEVER_WORKERS:
+                if not solve_next():
+                    break
+                collect([future for future in in_flight if future.done()])
+            elif in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                collect(done)
+    except KeyboardInterrupt:
+        print("\nStopping: finishing the patents already submitted...")
+    finally:
+        for _, future in solve_queue:
+            future.cancel()
+        prefetch_pool.shutdown(wait=True)
+        for session, _ in solve_queue:
+            session.close()
+        worker_pool.shutdown(wait=True)
+        collect(list(in_flight))
+        pool.close()
+        released = database.release_patents([patent.application_no for patent in pending])
+
+    print("\n--- Retriever Finished ---")
+    print(f"  ✓ Documents retrieved: {outcomes.get('documents_retrieved', 0)}")
+    print(f"  ✗ Invalid CAPTCHA:     {outcomes.get('error_captcha', 0)}")
+    print(f"  ✗ Other errors:        {outcomes.get('error_retrieval', 0)}")
+    if released:
+        print(f"  Returned to the queue: {released}")
+    print(f"  CAPTCHAs solved: {pool.solved} for {pool.solved + pool.reused} searches "
+          f"({pool.expired} sessions expired)")
+
+if __name__ == '__main__':
+    run_retriever()
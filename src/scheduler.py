@@ -0,0 +1,201 @@
+# src/scheduler.py
+# -----------------------------------------------------------------
+# 'serve' COMMAND (main.py)
+# -----------------------------------------------------------------
+# Runs the pipeline continuously instead of one stage after another.
+# Each stage has its own thread, and the stages are linked by bounded
+# queues of journal IDs:
+#
+#   download --(journal_id)--> extract --(journal_id)--> filter
+#
+# A journal is extracted as soon as the downloader logs it, while the
+# other new journals are still downloading, and its patents are
+# classified as soon as it is extracted.
+#
+# The database statuses stay the source of truth: the queues only say
+# "this journal is ready now". A stage that is idle for
+# SERVE_POLL_INTERVAL seconds re-checks its status queue in the
+# database, so work left by a crash or queued by another command is
+# picked up too.
+#
+# Backpressure: each queue holds SERVE_QUEUE_SIZE journals. When
+# extraction falls behind, the downloader waits before logging the
+# next journal. Stopping (Ctrl+C) lets every stage finish the journal
+# it is working on; anything not done yet is picked up on the next start.
+# -----------------------------------------------------------------
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+from . import database
+from . import downloader
+from . import extractor
+from . import filter
+from . import metrics
+
+def _log(stage, message):
+    print(f"[{time.strftime('%H:%M:%S')}] {stage}: {message}")
+
+def _put(work_queue, item, stop):
+    """
+    Puts 'item' on a bounded queue, blocking while it is full.
+    Returns False if the scheduler stopped first.
+    """
+    while not stop.is_set():
+        try:
+            work_queue.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _get(work_queue, stop, timeout):
+    """
+    Takes the next item from a queue, or returns None after 'timeout'
+    seconds or once the scheduler stops.
+    """
+    deadline = time.monotonic() + timeout
+    while not stop.is_set():
+        try:
+            return work_queue.get(timeout=min(1, max(0, deadline - time.monotonic())))
+        except queue.Empty:
+            if time.monotonic() >= deadline:
+                return None
+    return None
+
+def _ignore_sigint():
+    # Ctrl+C is for the scheduler: extractor worker processes must not
+    # die mid-journal (the journal would be marked 'error_extracting')
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+# -----------------------------------------------------------------
+# STAGES (one thread each)
+# -----------------------------------------------------------------
+
+def _download_stage(extract_queue, stop):
+    """
+    Checks the journal website every SERVE_DOWNLOAD_INTERVAL seconds.
+    """
+    def journal_saved(journal_id):
+        _log("download", f"journal {journal_id} ready for extraction")
+        _put(extract_queue, (journal_id, time.monotonic()), stop)
+
+    while not stop.is_set():
+        try:
+            downloader.run_downloader(on_journal_saved=journal_saved)
+        except Exception as e:
+            _log("download", f"error: {e}")
+        if stop.wait(config.SERVE_DOWNLOAD_INTERVAL):
+            break
+        _log("download", "checking for new journals")
+
+def _extract_stage(extract_queue, filter_queue, stop, workers):
+    """
+    Extracts journals as they are downloaded, plus any left in the
+    database's 'downloaded' / 'extracting' queue.
+    """
+    executor = None
+    if workers > 1:
+        # Spawned, not forked: the other stages' threads may hold locks
+        # (the database, stdout) at the moment a worker is forked
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint,
+                                       mp_context=multiprocessing.get_context('spawn'))
+    backlog = [(journal['journal_id'], None) for journal in database.get_journals_to_process()]
+    if backlog:
+        _log("extract", f"{len(backlog)} journals waiting from before")
+
+    try:
+        while not stop.is_set():
+            if backlog:
+                item = backlog.pop(0)
+            else:
+                item = _get(extract_queue, stop, config.SERVE_POLL_INTERVAL)
+                if item is None:
+                    backlog = [(journal['journal_id'], None) for journal in database.get_journals_to_process()]
+                    continue
+
+            journal_id, ready_at = item
+            try:
+                found = extractor.extract_journal(journal_id, executor)
+            except Exception as e:
+                _log("extract", f"error on journal {journal_id}: {e}")
+                continue
+            if found is not None:
+                _put(filter_queue, (journal_id, ready_at), stop)
+    finally:
+        if executor:
+            executor.shutdown()
+
+def _filter_stage(filter_queue, stop):
+    """
+    Classifies newly extracted patents after each journal (several
+    journals that finish together share one pass).
+    """
+    while not stop.is_set():
+        item = _get(filter_queue, stop, config.SERVE_POLL_INTERVAL)
+        if stop.is_set():
+            break
+        finished = [item] if item else []
+        while True:
+            try:
+                finished.append(filter_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if not finished and not database.has_patents_to_classify():
+            continue
+        try:
+            filter.run_filter()
+        except Exception as e:
+            _log("filter", f"error: {e}")
+            continue
+        if config.METRICS_ENABLED:
+            # The run is only saved when 'serve' stops; keep the export
+            # file current for scrapers in the meantime
+            metrics.write_export(metrics.current_run())
+
+        for journal_id, ready_at in finished:
+            if ready_at is not None:
+                minutes = (time.monotonic() - ready_at) / 60
+                _log("filter", f"journal {journal_id} classified {minutes:.1f} min after download")
+            else:
+                _log("filter", f"journal {journal_id} classified")
+
+# -----------------------------------------------------------------
+# SCHEDULER
+# -----------------------------------------------------------------
+
+def run_scheduler(workers=None):
+    """
+    Runs download -> extract -> filter continuously until Ctrl+C.
+    """
+    workers = workers or config.EXTRACTOR_WORKERS
+    print("--- Running Scheduler (Ctrl+C to stop) ---")
+    print(f"  New journals checked every {config.SERVE_DOWNLOAD_INTERVAL // 60} min; "
+          f"{workers} extractor process(es); queues hold {config.SERVE_QUEUE_SIZE} journals.")
+
+    stop = threading.Event()
+    extract_queue = queue.Queue(maxsize=config.SERVE_QUEUE_SIZE)
+    filter_queue = queue.Queue(maxsize=config.SERVE_QUEUE_SIZE)
+    threads = [
+        threading.Thread(target=_download_stage, args=(extract_queue, stop), name="download"),
+        threading.Thread(target=_extract_stage, args=(extract_queue, filter_queue, stop, workers), name="extract"),
+        threading.Thread(target=_filter_stage, args=(filter_queue, stop), name="filter"),
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        print("\nStopping: each stage finishes what it is working on...")
+        stop.set()
+        for thread in threads:
+            thread.join()
+    print("Scheduler stopped.")
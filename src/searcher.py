@@ -1,213 +1,446 @@
 import requests
 import json
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import sys
 
 # Import configuration and utilities
 import config
+from . import database
+from . import forms
+from . import metrics
 from . import utils
+from .records import Patent
+from .sessionpool import SearchSession
 
 # Suppress only the InsecureRequestWarning from requests
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
-def run_searcher(patent_app_no=None):
+# -----------------------------------------------------------------
+# SEARCH STAGES
+# -----------------------------------------------------------------
+# The search is split into steps so it can be driven one patent at a
+# time ('search', below) or for many patents at once (retriever.py):
+#
+#   new_session() -> fetch_captcha() -> [someone solves it]
+#   -> submit_search() -> open_documents()
+#
+# Only fetch_captcha() has to happen before the CAPTCHA is solved;
+# everything after it can run in the background. Once solved, the same
+# session can run submit_search() -> open_documents() again for other
+# patents until the portal expires it (see sessionpool.py).
+# -----------------------------------------------------------------
+
+class CaptchaError(Exception):
+    """The site rejected the CAPTCHA answer."""
+
+class SessionExpired(CaptchaError):
+    """The portal sent us back to the search page: solve a new CAPTCHA."""
+
+class RetrievalError(Exception):
+    """
+    A search stage didn't get the page it expected. 'page' holds the
+    HTML it got instead and 'debug_file' the default file to save it to.
+    """
+    def __init__(self, message, page=None, debug_file=None):
+        super().__init__(message)
+        self.page = page
+        self.debug_file = debug_file
+
+def _no_log(message):
+    pass
+
+def _find_form(response, debug_file, error, action=None, name=None):
+    """
+    Returns the form a stage needs from 'response', or raises
+    RetrievalError with the page attached.
+    """
+    form = forms.find_form(response.text, action=action, name=name)
+    if form is None:
+        raise RetrievalError(error, response.text, debug_file)
+    return form
+
+def _field(form, name, response, debug_file):
+    """
+    Returns a named field of a stage's form, or raises RetrievalError.
+    """
+    value = form.get(name)
+    if value is None:
+        raise RetrievalError(f"Form has no '{name}' field.", response.text, debug_file)
+    return value
+
+def _check_session(response):
+    """
+    Raises SessionExpired if the portal answered with its search page
+    (the only page with the CAPTCHA image) instead of the one we asked
+    for, as it does once a session's CAPTCHA is no longer valid.
+    """
+    redirected_home = (
+        response.history
+        and response.url.rstrip('/') == config.SEARCH_BASE_URL.rstrip('/')
+    )
+    if redirected_home or 'id="Captcha"' in response.text:
+        raise SessionExpired("Session expired.")
+
+def new_session():
+    """
+    Starts a session that keeps the search site's cookies. Each
+    CAPTCHA belongs to the session it was fetched with.
+    """
+    session = requests.Session()
+    session.headers.update(config.REQUESTS_HEADER)
+    return session
+
+def search_fields(patent_data):
+    """
+    Takes a Patent (application_no and date_of_filing are enough).
+    Returns (application number, filing date as MM/DD/YYYY) as the
+    search form expects them, or None if the date can't be read.
+    """
+    app_number_clean = patent_data.application_no.split(' ')[0]
+    app_date_formatted = utils.reformat_search_date(patent_data.date_of_filing)
+    if not app_date_formatted:
+        return None # Error already printed by utils
+    return app_number_clean, app_date_formatted
+
+@metrics.timed('search.captcha')
+def fetch_captcha(session, log=_no_log):
+    """
+    STAGE 1: Opens the search page and downloads its CAPTCHA image.
+
+    Returns:
+        The image bytes.
+    """
+    log(f"\nConnecting to {config.SEARCH_BASE_URL} to get session...")
+    response = session.get(config.SEARCH_BASE_URL, verify=False)
+    response.raise_for_status()
+    log("Session started.")
+
+    captcha_src = forms.find_image_src(response.text, 'Captcha')
+    if not captcha_src:
+        raise RetrievalError("Could not find CAPTCHA image tag.", response.text, config.ERROR_HTML)
+
+    captcha_url = urljoin(config.SEARCH_BASE_URL, captcha_src)
+    image_response = session.get(captcha_url, verify=False)
+    image_response.raise_for_status()
+    return image_response.content
+
+@metrics.timed('search.submit')
+def submit_search(session, patent_data, captcha_text, log=_no_log):
+    """
+    STAGE 3: Posts the search form with the solved CAPTCHA.
+
+    Returns:
+        The results page response.
+
+    Raises:
+        CaptchaError if the CAPTCHA was wrong, RetrievalError if the
+        search didn't find exactly this one application.
+    """
+    fields = search_fields(patent_data)
+    if not fields:
+        raise RetrievalError(f"Unreadable filing date '{patent_data.date_of_filing}'.")
+    app_number_clean, app_date_formatted = fields
+
+    form_payload = [
+        ('Published', 'true'), ('Published', 'false'), ('Granted', 'false'),
+        ('DateField', 'APD'),
+        ('FromDate', app_date_formatted), ('ToDate', app_date_formatted),
+        ('LogicField', 'AND'),
+        ('ItemField1', 'AP'), ('TextField1', app_number_clean),
+        ('LogicField1', 'AND'),
+        ('CaptchaText', captcha_text),
+        ('submit', 'Search')
+    ]
+    log("\nPayload constructed. Submitting search...")
+
+    post_headers = {'Referer': config.SEARCH_BASE_URL}
+    post_response = session.post(
+        config.SEARCH_POST_URL,
+        data=form_payload,
+        headers=post_headers,
+        verify=False
+    )
+    post_response.raise_for_status()
+
+    if "Invalid Captcha" in post_response.text:
+        raise CaptchaError("Invalid CAPTCHA.")
+    _check_session(post_response)
+    if "Total Document(s): 1" not in post_response.text:
+        raise RetrievalError("Search was not successful.", post_response.text, config.ERROR_HTML)
+
+    log("\n--- SUCCESS! (Stage 1) ---")
+    log("Successfully reached results page.")
+    return post_response
+
+@metrics.timed('search.documents')
+def open_documents(session, post_response, log=_no_log, search_session=None):
+    """
+    STAGES 4-7: Follows the results page through the application
+    details and status pages to the 'View Documents' page.
+
+    With a pooled 'search_session', its ConnectionName is remembered and
+    used when a results page doesn't carry one.
+
+    Returns:
+        The HTML of the documents page.
     """
-    Performs the 5-stage "human-in-the-loop" search to retrieve
-    all document pages for a single patent application.
+    # ------ STAGE 4: "CLICK" APPLICATION NUMBER ------
+    log("Parsing results to find 'Application Number' link...")
+    details_form = _find_form(
+        post_response, config.RESULTS_HTML, "Could not find the 'Application Number' link.",
+        action='/PublicSearch/PublicationSearch/PatentDetails'
+    )
+    details_action_url = urljoin(config.SEARCH_BASE_URL, details_form.action)
+
+    conn_name = details_form.get('ConnectionName')
+    if conn_name is not None:
+        if search_session is not None:
+            search_session.connection_name = conn_name
+    elif search_session is not None and search_session.connection_name:
+        conn_name = search_session.connection_name
+    else:
+        raise RetrievalError("Results page has no 'ConnectionName'.", post_response.text, config.RESULTS_HTML)
+    app_num_val = _field(details_form, 'ApplicationNumber', post_response, config.RESULTS_HTML).strip()
+
+    payload_1 = {'ConnectionName': conn_name, 'ApplicationNumber': app_num_val}
+    details_headers = {'Referer': config.SEARCH_POST_URL}
+
+    details_response = session.post(
+        details_action_url, data=payload_1, headers=details_headers, verify=False
+    )
+    _check_session(details_response)
+    log("  ✓ SUCCESS (Stage 2): Reached 'application_details.html'.")
+
+    # ------ STAGE 5: "CLICK" VIEW APPLICATION STATUS ------
+    log("  Parsing details page for 'View Application Status' button...")
+    status_form = _find_form(
+        details_response, config.DETAILS_HTML, "Could not find 'View Application Status'.",
+        action='/PublicSearch/PublicationSearch/GetApplicationStatus'
+    )
+    status_action_url = urljoin(config.SEARCH_BASE_URL, status_form.action)
+    app_num_for_status = _field(status_form, 'ApplicationNumber', details_response, config.DETAILS_HTML)
+
+    payload_2 = {'ApplicationNumber': app_num_for_status, 'submit': 'View Application Status'}
+    status_headers = {'Referer': details_action_url}
+
+    status_response = session.post(
+        status_action_url, data=payload_2, headers=status_headers, verify=False
+    )
+    _check_session(status_response)
+    log("  ✓ SUCCESS (Stage 3): Reached 'application_status.html' (redirect page).")
+
+    # ------ STAGE 6: BYPASS JAVASCRIPT REDIRECT ------
+    log("  Parsing redirect page to bypass JavaScript...")
+    redirect_form = _find_form(
+        status_response, config.STATUS_HTML, "Expected JS redirect, got something else.", name='form'
+    )
+
+    redirect_action_url = redirect_form.action
+    redirect_payload = {
+        'AppNumber': _field(redirect_form, 'AppNumber', status_response, config.STATUS_HTML),
+        'OTP': _field(redirect_form, 'OTP', status_response, config.STATUS_HTML)
+    }
+
+    log("  Manually submitting redirect to get *real* status page...")
+    real_status_response = session.post(
+        redirect_action_url, data=redirect_payload, headers={'Referer': status_action_url}, verify=False
+    )
+    log("  ✓ SUCCESS (Stage 4): Reached *real* status page.")
+
+    # ------ STAGE 7: "CLICK" VIEW DOCUMENTS ------
+    log("  Parsing real status page for 'View Documents' button...")
+    docs_form = _find_form(
+        real_status_response, config.REAL_STATUS_HTML, "Could not find 'ViewDocuments' form.",
+        action='/PatentSearch/PatentSearch/ViewDocuments'
+    )
+
+    docs_action_url = urljoin(config.SEARCH_BASE_URL, docs_form.action)
+    docs_app_num = _field(docs_form, 'APPLICATION_NUMBER', real_status_response, config.REAL_STATUS_HTML)
+
+    docs_payload = {
+        'APPLICATION_NUMBER': docs_app_num,
+        'SubmitAction': 'View Documents'
+    }
+
+    log("  Navigating to View Documents page...")
+    docs_response = session.post(
+        docs_action_url, data=docs_payload, headers={'Referer': redirect_action_url}, verify=False
+    )
+    return docs_response.text
+
+# -----------------------------------------------------------------
+# 'search' COMMAND (main.py): INTERACTIVE
+# -----------------------------------------------------------------
+# Searches for the given patents one after another on ONE session, so
+# a CAPTCHA is only asked for at the start and when the portal expires
+# the session. Patents are looked up in the database; 'search' doesn't
+# change their status ('retrieve' is the status-driven worker).
+# -----------------------------------------------------------------
+
+# Used when 'search' is run without application numbers or filters
+TEST_PATENT = Patent(
+    application_no="202511087359 A",
+    date_of_filing="15/09/2025",
+    title="(test data)",
+)
+
+def _find_patents(patent_app_nos, status, patent_type, ipc, limit):
+    """
+    Returns the patents to search for, printing any that weren't found.
+    """
+    patents = []
+    if patent_app_nos:
+        for app_no, row in database.get_patents_by_application_no(patent_app_nos):
+            if row is None:
+                print(f"Error: Could not find patent {app_no} in the database.")
+            else:
+                patents.append(row)
+    if status or patent_type or ipc:
+        patents += database.find_patents(status, patent_type, ipc, limit)
+
+    # A patent given by number and matched by a filter is searched once
+    seen = set()
+    return [p for p in patents if not (p.application_no in seen or seen.add(p.application_no))]
+
+def _solve_captcha(session):
+    """
+    Fetches a CAPTCHA and asks for its text at the prompt.
+    """
+    image = fetch_captcha(session, log=print)
+    print(f"Downloading CAPTCHA image to {config.CAPTCHA_IMAGE_FILE}...")
+    with open(config.CAPTCHA_IMAGE_FILE, 'wb') as f:
+        f.write(image)
+
+    print("\n" + "="*40)
+    print("   !!! ACTION REQUIRED !!!")
+    print(f"Please open the file '{config.CAPTCHA_IMAGE_FILE}'.")
+    print("Solve the CAPTCHA, then type the text below.")
+    print("="*40)
+    return input("Enter CAPTCHA text here: ")
+
+def _save_debug_page(error):
+    if error.page is not None and error.debug_file:
+        with open(error.debug_file, "w", encoding="utf-8") as f:
+            f.write(error.page)
+        print(f"Response saved to {error.debug_file} for debugging.")
+
+def run_searcher(patent_app_nos=None, status=None, patent_type=None, ipc=None, limit=None):
+    """
+    Performs the 5-stage "human-in-the-loop" search to retrieve the
+    'View Documents' page of each patent: the given application numbers
+    and/or every patent matching the filters (status, patent type,
+    IPC subclass or prefix; at most 'limit' of them).
+
+    With one patent, the page is saved to DOCUMENTS_HTML; with several,
+    to DOCUMENTS_DIR/<application number>.html.
     """
     print("--- Running Searcher ---")
-    
-    # 1. Get the patent to search for
-    if patent_app_no:
-        # Load the classified patents list
-        patents = utils.load_json_history(config.CLASSIFIED_PATENTS_JSON)
+
+    # 1. Get the patents to search for
+    if patent_app_nos or status or patent_type or ipc:
+        patents = _find_patents(patent_app_nos, status, patent_type, ipc, limit)
         if not patents:
-            print("Error: `classified_patents.json` is empty. Run filter first.")
-            return
-        
-        # Find the patent by app number
-        patent_data = next((p for p in patents if p['application_no'] == patent_app_no), None)
-        if not patent_data:
-            print(f"Error: Could not find patent {patent_app_no} in classified list.")
+            print("No patents to search for.")
             return
-        print(f"Found patent to search: {patent_data['title']}")
     else:
-        # Fallback to default test data if no number is provided
+        # Fallback to default test data if nothing is provided
         print("No application number provided. Using default test data.")
-        patent_data = {
-            "application_no": "202511087359 A",
-            "date_of_filing": "15/09/2025",
-        }
-
-    # 2. Clean data for the form
-    app_number_clean = patent_data["application_no"].split(' ')[0]
-    app_date_formatted = utils.reformat_search_date(patent_data["date_of_filing"])
-    
-    if not app_date_formatted:
-        return # Error already printed by utils
+        patents = [TEST_PATENT]
 
-    print(f"Date: {app_date_formatted} (MM/DD/YYYY)")
-    print(f"App No: {app_number_clean}")
-
-    # 3. Start a session to handle cookies
-    session = requests.Session()
-    session.headers.update(config.REQUESTS_HEADER)
+    if len(patents) > 1:
+        config.DOCUMENTS_DIR.mkdir(parents=True, exist_ok=True)
+    print(f"Searching for {len(patents)} patent(s).")
 
+    search_session = None
+    captchas = 0
+    retrieved = 0
     try:
-        # ------ STAGE 1: GET CAPTCHA ------
-        print(f"\nConnecting to {config.SEARCH_BASE_URL} to get session...")
-        response = session.get(config.SEARCH_BASE_URL, verify=False)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        print("Session started.")
-
-        captcha_img_tag = soup.find('img', {'id': 'Captcha'})
-        if not captcha_img_tag:
-            print("Error: Could not find CAPTCHA image tag.")
-            return
+        for number, patent_data in enumerate(patents, start=1):
+            # 2. Clean data for the form
+            fields = search_fields(patent_data)
+            if not fields:
+                continue
+            app_number_clean, app_date_formatted = fields
 
-        captcha_url = urljoin(config.SEARCH_BASE_URL, captcha_img_tag['src'])
-        print(f"Downloading CAPTCHA image to {config.CAPTCHA_IMAGE_FILE}...")
-        image_response = session.get(captcha_url, verify=False)
-        with open(config.CAPTCHA_IMAGE_FILE, 'wb') as f:
-            f.write(image_response.content)
-
-        # ------ STAGE 2: HUMAN-IN-THE-LOOP ------
-        print("\n" + "="*40)
-        print("   !!! ACTION REQUIRED !!!")
-        print(f"Please open the file '{config.CAPTCHA_IMAGE_FILE}'.")
-        print("Solve the CAPTCHA, then type the text below.")
-        print("="*40)
-        captcha_text = input("Enter CAPTCHA text here: ")
-
-        # ------ STAGE 3: POST SEARCH FORM ------
-        form_payload = [
-            ('Published', 'true'), ('Published', 'false'), ('Granted', 'false'),
-            ('DateField', 'APD'), 
-            ('FromDate', app_date_formatted), ('ToDate', app_date_formatted),
-            ('LogicField', 'AND'), 
-            ('ItemField1', 'AP'), ('TextField1', app_number_clean), 
-            ('LogicField1', 'AND'), 
-            ('CaptchaText', captcha_text),
-            ('submit', 'Search')
-        ]
-        print("\nPayload constructed. Submitting search...")
-        
-        post_headers = {'Referer': config.SEARCH_BASE_URL}
-        post_response = session.post(
-            config.SEARCH_POST_URL, 
-            data=form_payload, 
-            headers=post_headers,
-            verify=False
-        )
-        post_response.raise_for_status()
-
-        if "Invalid Captcha" in post_response.text:
-            print("\n--- FAILED: Invalid CAPTCHA. Please run the script again. ---")
-            return
-        if "Total Document(s): 1" not in post_response.text:
-            print("\n--- FAILED: Search was not successful. ---")
-            with open(config.ERROR_HTML, "w", encoding="utf-8") as f:
-                f.write(post_response.text)
-            print(f"Response saved to {config.ERROR_HTML} for debugging.")
-            return
+            print(f"\n[{number}/{len(patents)}] {patent_data.title or ''}")
+            print(f"Date: {app_date_formatted} (MM/DD/YYYY)")
+            print(f"App No: {app_number_clean}")
 
-        print("\n--- SUCCESS! (Stage 1) ---")
-        print("Successfully reached results page.")
-        
-        # ------ STAGE 4: "CLICK" APPLICATION NUMBER ------
-        print("Parsing results to find 'Application Number' link...")
-        results_soup = BeautifulSoup(post_response.text, 'html.parser')
-        details_form = results_soup.find('form', {'action': '/PublicSearch/PublicationSearch/PatentDetails'})
-        details_action_url = urljoin(config.SEARCH_BASE_URL, details_form['action'])
-        
-        conn_name = details_form.find('input', {'name': 'ConnectionName'})['value']
-        app_num_val = details_form.find('button', {'name': 'ApplicationNumber'})['value'].strip()
-
-        payload_1 = {'ConnectionName': conn_name, 'ApplicationNumber': app_num_val}
-        details_headers = {'Referer': config.SEARCH_POST_URL}
-        
-        details_response = session.post(
-            details_action_url, data=payload_1, headers=details_headers, verify=False
-        )
-        print("  ✓ SUCCESS (Stage 2): Reached 'application_details.html'.")
-
-        # ------ STAGE 5: "CLICK" VIEW APPLICATION STATUS ------
-        print("  Parsing details page for 'View Application Status' button...")
-        details_page_soup = BeautifulSoup(details_response.text, 'html.parser')
-        status_form = details_page_soup.find('form', {'action': '/PublicSearch/PublicationSearch/GetApplicationStatus'})
-        status_action_url = urljoin(config.SEARCH_BASE_URL, status_form['action'])
-        app_num_for_status = status_form.find('input', {'name': 'ApplicationNumber'})['value']
-        
-        payload_2 = {'ApplicationNumber': app_num_for_status, 'submit': 'View Application Status'}
-        status_headers = {'Referer': details_action_url}
-        
-        status_response = session.post(
-            status_action_url, data=payload_2, headers=status_headers, verify=False
-        )
-        print("  ✓ SUCCESS (Stage 3): Reached 'application_status.html' (redirect page).")
-        
-        # ------ STAGE 6: BYPASS JAVASCRIPT REDIRECT ------
-        print("  Parsing redirect page to bypass JavaScript...")
-        redirect_soup = BeautifulSoup(status_response.text, 'html.parser')
-        redirect_form = redirect_soup.find('form', {'name': 'form'})
-        
-        if not redirect_form:
-            with open(config.STATUS_HTML, "w", encoding="utf-8") as f:
-                f.write(status_response.text)
-            print(f"  ERROR: Expected JS redirect, got something else. Saved to {config.STATUS_HTML}")
-            return
-            
-        redirect_action_url = redirect_form['action']
-        redirect_payload = {
-            'AppNumber': redirect_form.find('input', {'name': 'AppNumber'})['value'],
-            'OTP': redirect_form.find('input', {'name': 'OTP'})['value']
-        }
-        
-        print("  Manually submitting redirect to get *real* status page...")
-        real_status_response = session.post(
-            redirect_action_url, data=redirect_payload, headers={'Referer': status_action_url}, verify=False
-        )
-        print("  ✓ SUCCESS (Stage 4): Reached *real* status page.")
-        
-        # ------ STAGE 7: "CLICK" VIEW DOCUMENTS ------
-        print("  Parsing real status page for 'View Documents' button...")
-        real_status_soup = BeautifulSoup(real_status_response.text, 'html.parser')
-        docs_form = real_status_soup.find('form', {'action': '/PatentSearch/PatentSearch/ViewDocuments'})
-        
-        if not docs_form:
-            with open(config.REAL_STATUS_HTML, "w", encoding="utf-8") as f:
-                f.write(real_status_response.text)
-            print(f"  ERROR: Could not find 'ViewDocuments' form. Saved page to {config.REAL_STATUS_HTML}")
-            return
-            
-        docs_action_url = urljoin(config.SEARCH_BASE_URL, docs_form['action'])
-        docs_app_num = docs_form.find('input', {'name': 'APPLICATION_NUMBER'})['value']
-        
-        docs_payload = {
-            'APPLICATION_NUMBER': docs_app_num,
-            'SubmitAction': 'View Documents'
-        }
-        
-        print("  Navigating to View Documents page...")
-        docs_response = session.post(
-            docs_action_url, data=docs_payload, headers={'Referer': redirect_action_url}, verify=False
-        )
-        
-        with open(config.DOCUMENTS_HTML, "w", encoding="utf-8") as f:
-            f.write(docs_response.text)
-        print(f"\n--- SUCCESS! (FINAL) ---")
-        print(f"Saved final page to {config.DOCUMENTS_HTML}.")
-
-    except requests.exceptions.RequestException as e:
-        print(f"\nAn error occurred: {e}")
-    except Exception as e:
-        print(f"\nA general error occurred: {e}")
-        import traceback
-        traceback.print_exc()
+            try:
+                # A session that expires after the search (in stages 4-7)
+                # costs one more CAPTCHA and a second search for this patent
+                for attempt in range(2):
+                    while True:
+                        # 3. Start a session (and solve its CAPTCHA) only when needed
+                        if search_session is not None and search_session.is_worn_out():
+                            search_session.close()
+                            search_session = None
+                        if search_session is None:
+                            session = new_session()
+                            search_session = SearchSession(session, _solve_captcha(session))
+                            captchas += 1
+
+                        # ------ STAGE 3: POST SEARCH FORM ------
+                        try:
+                            post_response = submit_search(
+                                search_session.session, patent_data, search_session.captcha_text, log=print
+                            )
+                            search_session.searches += 1
+                            break
+                        except CaptchaError:
+                            fresh = search_session.is_fresh()
+                            search_session.close()
+                            search_session = None
+                            if fresh:
+                                raise
+                            print("Session expired. A new CAPTCHA is needed.")
+
+                    # ------ STAGES 4-7 ------
+                    try:
+                        documents_html = open_documents(
+                            search_session.session, post_response, log=print, search_session=search_session
+                        )
+                        break
+                    except SessionExpired:
+                        search_session.close()
+                        search_session = None
+                        if attempt:
+                            raise
+                        print("Session expired. A new CAPTCHA is needed.")
+                if len(patents) == 1:
+                    documents_path = config.DOCUMENTS_HTML
+                else:
+                    documents_path = config.DOCUMENTS_DIR / f"{app_number_clean}.html"
+                with open(documents_path, "w", encoding="utf-8") as f:
+                    f.write(documents_html)
+                retrieved += 1
+                print(f"\n--- SUCCESS! (FINAL) ---")
+                print(f"Saved final page to {documents_path}.")
+
+            except SessionExpired:
+                print("\n--- FAILED: Session expired. ---")
+            except CaptchaError:
+                print("\n--- FAILED: Invalid CAPTCHA. ---")
+            except RetrievalError as e:
+                print(f"\n--- FAILED: {e} ---")
+                _save_debug_page(e)
+            except requests.exceptions.RequestException as e:
+                print(f"\nAn error occurred: {e}")
+            except Exception as e:
+                print(f"\nA general error occurred: {e}")
+                import traceback
+                traceback.print_exc()
+    except KeyboardInterrupt:
+        print("\nSearch stopped.")
+    finally:
+        if search_session is not None:
+            search_session.close()
+
+    if len(patents) > 1:
+        print(f"\n--- Searcher Finished: {retrieved} of {len(patents)} retrieved "
+              f"with {captchas} CAPTCHA(s) ---")
 
 if __name__ == '__main__':
     # This allows you to run: python src/searcher.py
-    run_searcher()
\ No newline at end of file
+    run_searcher()
@@ -0,0 +1,123 @@
+# src/sessionpool.py
+# -----------------------------------------------------------------
+# SEARCH SESSION POOL
+# -----------------------------------------------------------------
+# The search portal keeps a solved CAPTCHA valid for the whole session,
+# so one 'requests.Session' can search for many application numbers.
+# The pool keeps those authenticated sessions and hands each one to a
+# single caller at a time, so a new CAPTCHA is only needed when a
+# session expires.
+#
+#   pool = SessionPool()
+#   search_session = pool.acquire()     # None: solve a new CAPTCHA
+#   if search_session is None:
+#       search_session = pool.add(session, captcha_text)
+#   ... searcher.submit_search(..., search_session=search_session) ...
+#   pool.release(search_session)        # or pool.discard() if it expired
+#
+# Expiry is detected by searcher.submit_search(), which raises
+# SessionExpired when the portal answers "Invalid Captcha" or sends us
+# back to the search page. Sessions are also retired after
+# SEARCH_SESSION_MAX_AGE seconds or SEARCH_SESSION_MAX_SEARCHES
+# searches, before the portal can drop them mid-search.
+# -----------------------------------------------------------------
+import threading
+import time
+
+import config
+
+class SearchSession:
+    """
+    One authenticated session and what the portal handed back with it.
+    """
+
+    def __init__(self, session, captcha_text):
+        self.session = session
+        # The portal checks this again on every search
+        self.captcha_text = captcha_text
+        # Taken from the first results page (see searcher.open_documents)
+        self.connection_name = None
+        self.searches = 0
+        self.solved_at = time.monotonic()
+
+    def is_fresh(self):
+        """
+        True until the CAPTCHA answer has been accepted once.
+        """
+        return self.searches == 0
+
+    def is_worn_out(self):
+        age = time.monotonic() - self.solved_at
+        return (age > config.SEARCH_SESSION_MAX_AGE
+                or self.searches >= config.SEARCH_SESSION_MAX_SEARCHES)
+
+    def close(self):
+        self.session.close()
+
+
+class SessionPool:
+    """
+    Thread-safe pool of SearchSessions. 'size' counts every session
+    that is still alive, idle or handed out.
+    """
+
+    def __init__(self):
+        self._idle = []
+        self._lock = threading.Lock()
+        self.size = 0
+        # Counters for the end-of-run report
+        self.solved = 0
+        self.reused = 0
+        self.expired = 0
+
+    def add(self, session, captcha_text):
+        """
+        Registers a session whose CAPTCHA was just solved and hands it
+        straight to the caller.
+        """
+        with self._lock:
+            self.size += 1
+            self.solved += 1
+        return SearchSession(session, captcha_text)
+
+    def acquire(self):
+        """
+        Returns an idle authenticated session, or None if there is none
+        (or all of them were too old to trust).
+        """
+        with self._lock:
+            while self._idle:
+                search_session = self._idle.pop()
+                if not search_session.is_worn_out():
+                    self.reused += 1
+                    return search_session
+                self.size -= 1
+                search_session.close()
+            return None
+
+    def release(self, search_session):
+        """
+        Puts a session that is still valid back in the pool.
+        """
+        if search_session.is_worn_out():
+            self.discard(search_session)
+            return
+        with self._lock:
+            self._idle.append(search_session)
+
+    def discard(self, search_session, expired=False):
+        """
+        Closes a session that must not be used again.
+        """
+        search_session.close()
+        with self._lock:
+            self.size -= 1
+            if expired:
+                self.expired += 1
+
+    def close(self):
+        with self._lock:
+            for search_session in self._idle:
+                search_session.close()
+            self.size -= len(self._idle)
+            self._idle = []
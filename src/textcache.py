@@ -0,0 +1,282 @@
+# src/textcache.py
+# -----------------------------------------------------------------
+# PAGE-TEXT CACHE
+# -----------------------------------------------------------------
+# PyMuPDF's page.get_text() is the most expensive step of extraction.
+# This module keeps the text of every page we've rendered, keyed by
+# (PDF SHA-256, page index), so re-extracting a journal after a parser
+# change (via 'reset' or 'clear') only re-runs the parsing.
+#
+# The cache is its own SQLite file (TEXT_CACHE_FILE), separate from the
+# main database, with zlib-compressed text blobs. When it grows past
+# TEXT_CACHE_MAX_MB, whole PDFs are evicted, least recently used first.
+# -----------------------------------------------------------------
+import sqlite3
+import zlib
+
+import config
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS cached_pdfs (
+    pdf_sha256 TEXT PRIMARY KEY,
+    page_count INTEGER,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS page_text (
+    pdf_sha256 TEXT NOT NULL,
+    page_index INTEGER NOT NULL,
+    text BLOB NOT NULL,
+    stored_bytes INTEGER NOT NULL,
+    text_bytes INTEGER NOT NULL,
+    PRIMARY KEY (pdf_sha256, page_index)
+) WITHOUT ROWID;
+"""
+
+# Pages buffered in memory before they are written to the cache
+FLUSH_EVERY = 50
+
+
+def _connect():
+    """
+    Opens the cache database, creating it if needed.
+
+    WAL mode and a generous busy timeout let several extractor worker
+    processes read and write the cache at the same time.
+    """
+    config.TEXT_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(config.TEXT_CACHE_FILE, timeout=30)
+    # Must be set before the first table exists to take effect
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA_SQL)
+    return conn
+
+
+class PageTextCache:
+    """
+    Cached page texts of ONE PDF, identified by its SHA-256.
+
+    Usage:
+        cache = PageTextCache(sha256)
+        text = cache.get(page_index)
+        if text is None:
+            text = page.get_text()
+            cache.put(page_index, text)
+        ...
+        cache.close()   # writes anything still buffered
+    """
+
+    def __init__(self, pdf_sha256):
+        self.pdf_sha256 = pdf_sha256
+        self.page_count = None
+        self.hits = 0
+        self.misses = 0
+        # page_index -> row waiting to be written
+        self._pending = {}
+        try:
+            self.conn = _connect()
+            row = self.conn.execute(
+                "SELECT page_count FROM cached_pdfs WHERE pdf_sha256 = ?", (pdf_sha256,)
+            ).fetchone()
+            if row:
+                self.page_count = row[0]
+        except sqlite3.Error as e:
+            # A broken cache must never stop extraction: run without it
+            print(f"  Warning: page-text cache unavailable ({e}).")
+            self.conn = None
+
+    def get(self, page_index):
+        """
+        Returns the cached text of a page, or None on a miss.
+        """
+        if self.conn is None:
+            return None
+        if page_index in self._pending:
+            self.hits += 1
+            return zlib.decompress(self._pending[page_index][2]).decode('utf-8')
+        try:
+            row = self.conn.execute(
+                "SELECT text FROM page_text WHERE pdf_sha256 = ? AND page_index = ?",
+                (self.pdf_sha256, page_index)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, page_index, text):
+        """
+        Queues a freshly rendered page for the cache.
+        """
+        if self.conn is None:
+            return
+        raw = text.encode('utf-8')
+        blob = zlib.compress(raw)
+        self._pending[page_index] = (self.pdf_sha256, page_index, blob, len(blob), len(raw))
+        if len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes queued pages and this PDF's hit/miss counters.
+        """
+        if self.conn is None:
+            return
+        rows = list(self._pending.values())
+        self._pending = {}
+        try:
+            if rows:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO page_text VALUES (?, ?, ?, ?, ?)", rows
+                )
+            self.conn.execute(
+                """
+                INSERT INTO cached_pdfs (pdf_sha256, page_count, hits, misses, last_used)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(pdf_sha256) DO UPDATE SET
+                    page_count = COALESCE(excluded.page_count, page_count),
+                    hits = hits + excluded.hits,
+                    misses = misses + excluded.misses,
+                    last_used = CURRENT_TIMESTAMP
+                """,
+                (self.pdf_sha256, self.page_count, self.hits, self.misses)
+            )
+            self.conn.commit()
+            self.hits = 0
+            self.misses = 0
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"  Warning: could not write {len(rows)} pages to the page-text cache ({e}).")
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+
+# -----------------------------------------------------------------
+# EVICTION AND 'cache' COMMAND (main.py)
+# -----------------------------------------------------------------
+
+def evict(max_bytes=None):
+    """
+    Deletes whole PDFs from the cache, least recently used first, until
+    the stored (compressed) text fits in 'max_bytes'
+    (default: TEXT_CACHE_MAX_MB). Returns the number of PDFs evicted.
+    """
+    if max_bytes is None:
+        max_bytes = config.TEXT_CACHE_MAX_MB * 1024 * 1024
+    if not config.TEXT_CACHE_FILE.exists():
+        return 0
+
+    conn = None
+    try:
+        conn = _connect()
+        sizes = conn.execute(
+            """
+            SELECT p.pdf_sha256, SUM(p.stored_bytes)
+            FROM page_text p LEFT JOIN cached_pdfs c ON c.pdf_sha256 = p.pdf_sha256
+            GROUP BY p.pdf_sha256
+            ORDER BY MAX(c.last_used) ASC
+            """
+        ).fetchall()
+        total = sum(size for _, size in sizes)
+
+        evicted = 0
+        for pdf_sha256, size in sizes:
+            if total <= max_bytes:
+                break
+            conn.execute("DELETE FROM page_text WHERE pdf_sha256 = ?", (pdf_sha256,))
+            conn.execute("DELETE FROM cached_pdfs WHERE pdf_sha256 = ?", (pdf_sha256,))
+            total -= size
+            evicted += 1
+        conn.commit()
+
+        if evicted:
+            # Hand the freed pages back to the filesystem
+            conn.execute("PRAGMA incremental_vacuum")
+            print(f"  Page-text cache: evicted {evicted} PDFs to stay under {max_bytes // (1024 * 1024)} MB.")
+        return evicted
+    except sqlite3.Error as e:
+        print(f"  Warning: page-text cache eviction failed ({e}).")
+        return 0
+    finally:
+        if conn:
+            conn.close()
+
+
+def get_stats():
+    """
+    Returns a dict describing the cache contents.
+    """
+    stats = {
+        "pdfs": 0, "pages": 0, "stored_bytes": 0, "text_bytes": 0,
+        "hits": 0, "misses": 0, "file_bytes": 0,
+    }
+    if not config.TEXT_CACHE_FILE.exists():
+        return stats
+
+    conn = _connect()
+    try:
+        pages, stored, text = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(stored_bytes), 0), COALESCE(SUM(text_bytes), 0) FROM page_text"
+        ).fetchone()
+        pdfs, hits, misses = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(misses), 0) FROM cached_pdfs"
+        ).fetchone()
+    finally:
+        conn.close()
+
+    stats.update(pdfs=pdfs, pages=pages, stored_bytes=stored, text_bytes=text, hits=hits, misses=misses)
+    stats["file_bytes"] = sum(
+        path.stat().st_size
+        for path in config.TEXT_CACHE_FILE.parent.glob(config.TEXT_CACHE_FILE.name + "*")
+    )
+    return stats
+
+
+def print_stats():
+    """
+    Prints the 'cache stats' report.
+    """
+    stats = get_stats()
+    mb = 1024 * 1024
+    lookups = stats["hits"] + stats["misses"]
+    ratio = stats["text_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0
+
+    print("--- Page-Text Cache ---")
+    print(f"  File:         {config.TEXT_CACHE_FILE}")
+    print(f"  PDFs:         {stats['pdfs']}")
+    print(f"  Pages:        {stats['pages']}")
+    print(f"  Text size:    {stats['text_bytes'] / mb:.1f} MB "
+          f"({stats['stored_bytes'] / mb:.1f} MB compressed, {ratio:.1f}x)")
+    print(f"  On disk:      {stats['file_bytes'] / mb:.1f} MB (limit {config.TEXT_CACHE_MAX_MB} MB)")
+    if lookups:
+        print(f"  Hit rate:     {stats['hits'] / lookups:.1%} ({stats['hits']} hits, {stats['misses']} misses)")
+    else:
+        print("  Hit rate:     n/a (no lookups yet)")
+
+
+def clear():
+    """
+    Deletes every cached page.
+    """
+    if not config.TEXT_CACHE_FILE.exists():
+        print("Page-text cache is already empty.")
+        return
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM page_text")
+        conn.execute("DELETE FROM cached_pdfs")
+        conn.commit()
+        conn.execute("PRAGMA incremental_vacuum")
+    finally:
+        conn.close()
+    print("✓ Page-text cache cleared.")
@@ -2,8 +2,14 @@
 # UTILITY FUNCTIONS
 # Helper functions used by multiple scripts.
 # -----------------------------------------------------------------
+import functools
 import json
-from datetime import datetime
+import hashlib
+import re
+from datetime import date
+
+# "DD/MM/YYYY" as printed in the journals (tolerating '.', '-' and spaces)
+DATE_REGEX = re.compile(r"\s*(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\s*$")
 
 def load_json_history(filepath):
     """
@@ -28,17 +34,55 @@ def save_json_history(filepath, data):
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
+def update_hash_from_file(hasher, filepath, chunk_size=1024 * 1024):
+    """
+    Feeds a file's bytes into 'hasher' in chunks (never the whole file
+    in memory). Returns the number of bytes read.
+    """
+    byte_count = 0
+    with open(filepath, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            byte_count += len(chunk)
+    return byte_count
+
+def file_sha256(filepath):
+    """
+    Returns a (sha256_hexdigest, byte_count) tuple for a file.
+    """
+    hasher = hashlib.sha256()
+    byte_count = update_hash_from_file(hasher, filepath)
+    return hasher.hexdigest(), byte_count
+
+@functools.lru_cache(maxsize=4096)
+def iso_date(date_str_ddmmyyyy):
+    """
+    Converts a "DD/MM/YYYY" date string to "YYYY-MM-DD", or returns
+    None if it isn't a valid date. Cached: a journal's patents share a
+    few hundred distinct dates.
+    """
+    match = DATE_REGEX.match(date_str_ddmmyyyy or "")
+    if not match:
+        return None
+    day, month, year = (int(part) for part in match.groups())
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
 def reformat_search_date(date_str_ddmmyyyy):
     """
     Converts a "DD/MM/YYYY" date string to the "MM/DD/YYYY"
     format required by the search form.
     """
-    try:
-        date_obj = datetime.strptime(date_str_ddmmyyyy, "%d/%m/%Y")
-        return date_obj.strftime("%m/%d/%Y")
-    except ValueError:
+    iso = iso_date(date_str_ddmmyyyy)
+    if iso is None:
         print(f"Error: Invalid date format '{date_str_ddmmyyyy}'. Expected DD/MM/YYYY.")
         return None
+    return f"{iso[5:7]}/{iso[8:10]}/{iso[:4]}"
 
 def parse_serial(serial_str):
     """Parse serial number in format 'week/year' and return (week, year) tuple."""
@@ -0,0 +1,98 @@
+# src/verifier.py
+# -----------------------------------------------------------------
+# 'verify' COMMAND (main.py)
+# -----------------------------------------------------------------
+# Re-hashes every PDF in RAW_PDF_DIR and compares it against the
+# SHA-256 / byte count the downloader recorded in the 'journals' table.
+# Files are hashed in parallel threads (hashlib and file reads release
+# the GIL, so this scales with the disk, not the CPU).
+# -----------------------------------------------------------------
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from . import utils
+from . import database
+
+def _hash_file(pdf_path):
+    """
+    Returns (pdf_path, (sha256_hex, byte_count)) or (pdf_path, error).
+    """
+    try:
+        return pdf_path, utils.file_sha256(pdf_path)
+    except OSError as e:
+        return pdf_path, e
+
+def run_verifier(workers=None):
+    """
+    Checks the integrity of every downloaded journal PDF.
+
+    Returns:
+        True if every tracked file matches its recorded checksum.
+    """
+    print("--- Running Verifier ---")
+    workers = workers or config.VERIFY_WORKERS
+
+    # Resolved path -> (journal_id, sha256, byte_count) from the database
+    expected = {}
+    for journal in database.get_all_journals():
+        for part_key in ("part1", "part2"):
+            path = journal[f"{part_key}_pdf_path"]
+            if not path:
+                continue
+            sha_column = f"{part_key}_sha256"
+            recorded = journal[sha_column] if sha_column in journal.keys() else None
+            recorded_bytes = journal[f"{part_key}_bytes"] if recorded else None
+            expected[(config.BASE_DIR / path).resolve()] = (journal['journal_id'], recorded, recorded_bytes)
+
+    pdf_files = sorted(config.RAW_PDF_DIR.glob("*.pdf")) if config.RAW_PDF_DIR.exists() else []
+    print(f"Hashing {len(pdf_files)} PDFs in {config.RAW_PDF_DIR} with {workers} threads...")
+
+    counts = {"ok": 0, "mismatch": 0, "unverified": 0, "untracked": 0, "missing": 0}
+    seen_hashes = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for pdf_path, result in executor.map(_hash_file, pdf_files):
+            if isinstance(result, OSError):
+                print(f"  ✗ ERROR     {pdf_path.name}: {result}")
+                counts["mismatch"] += 1
+                continue
+
+            actual_sha, actual_bytes = result
+            seen_hashes.setdefault(actual_sha, []).append(pdf_path.name)
+            journal_id, recorded_sha, recorded_bytes = expected.pop(pdf_path.resolve(), (None, None, None))
+
+            if journal_id is None:
+                print(f"  ? UNTRACKED {pdf_path.name}: not in the 'journals' table.")
+                counts["untracked"] += 1
+            elif recorded_sha is None:
+                print(f"  ? UNVERIFIED {pdf_path.name}: no checksum recorded (downloaded before checksums).")
+                counts["unverified"] += 1
+            elif actual_sha != recorded_sha or actual_bytes != recorded_bytes:
+                print(f"  ✗ MISMATCH  {pdf_path.name}: {actual_bytes} bytes on disk, "
+                      f"expected {recorded_bytes} (journal {journal_id}).")
+                counts["mismatch"] += 1
+            else:
+                counts["ok"] += 1
+
+    # Anything left in 'expected' is in the database but not on disk
+    for pdf_path, (journal_id, _, _) in sorted(expected.items()):
+        print(f"  ✗ MISSING   {pdf_path.name} (journal {journal_id}).")
+        counts["missing"] += 1
+
+    for names in seen_hashes.values():
+        if len(names) > 1:
+            print(f"  = DUPLICATE content: {', '.join(names)}")
+
+    for part_path in sorted(config.RAW_PDF_DIR.glob("*.pdf.part")) if config.RAW_PDF_DIR.exists() else []:
+        print(f"  … PARTIAL   {part_path.name}: interrupted download, resumed on the next 'download'.")
+
+    print("\n--- Verification complete ---")
+    print(f"  ✓ {counts['ok']} OK")
+    print(f"  ✗ {counts['mismatch']} corrupt or truncated")
+    print(f"  ✗ {counts['missing']} missing")
+    print(f"  ? {counts['unverified']} without a recorded checksum")
+    print(f"  ? {counts['untracked']} not tracked in the database")
+    return counts["mismatch"] == 0 and counts["missing"] == 0
+
+if __name__ == '__main__':
+    run_verifier()
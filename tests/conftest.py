@@ -0,0 +1,45 @@
+import pytest
+
+import config
+from src import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    A fresh, initialized database in a temporary directory. Everything
+    else the pipeline writes (text cache, exports...) goes there too.
+    """
+    monkeypatch.setattr(config, 'DATABASE_FILE', tmp_path / "patents.db")
+    monkeypatch.setattr(config, 'TEXT_CACHE_FILE', tmp_path / "page_text_cache.db")
+    monkeypatch.setattr(config, 'EXPORT_DIR', tmp_path / "exports")
+    database.create_tables()
+    yield database.get_db_connection()
+    database.close_db_connection()
+
+
+@pytest.fixture
+def journal_pdf(tmp_path):
+    """
+    Returns make(pages, name): writes a PDF with one page per text in
+    'pages' (each under the journal's running header) and returns its
+    path.
+    """
+    fitz = pytest.importorskip("fitz")
+
+    def make(pages, name="journal.pdf"):
+        doc = fitz.open()
+        for number, text in enumerate(pages, start=1):
+            page = doc.new_page()
+            page.insert_text(
+                (40, 40),
+                f"The Patent Office Journal No. 43/2025 Dated 24/10/2025 {number}\n{text}",
+                fontsize=8,
+            )
+        path = tmp_path / name
+        doc.save(path)
+        doc.close()
+        return path
+
+    return make
+
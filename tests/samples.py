@@ -0,0 +1,38 @@
+# -----------------------------------------------------------------
+# SAMPLE JOURNAL TEXT FOR THE TESTS
+# -----------------------------------------------------------------
+# One patent record laid out the way page.get_text() returns it from
+# the journal PDFs (see the field layout in src/inid.py).
+# -----------------------------------------------------------------
+
+def record_text(app_no, abstract, terminated=True, title="Smart widget",
+                ipc="G06Q0010000000, A61B0005000000",
+                date_of_filing="15/09/2025", publication_date="24/10/2025"):
+    """
+    Returns the text of one patent record. If 'terminated' is False,
+    the "No. of Pages" line after the abstract is left out (the record
+    continues on the next page).
+    """
+    text = (
+        "(12) PATENT APPLICATION PUBLICATION\n"
+        f"(21) Application No.{app_no}\n"
+        "(19) INDIA\n"
+        f"(22) Date of filing of Application :{date_of_filing}\n"
+        f"(43) Publication Date : {publication_date}\n"
+        f"(54) Title of the invention : {title}\n"
+        f"(51) International classification :{ipc}\n"
+        "(71)Name of Applicant :\n   1)ACME LABS\n"
+        "(72)Name of Inventor :\n   1)Jane Doe\n"
+        f"(57) Abstract :\n{abstract}\n"
+    )
+    if terminated:
+        text += "No. of Pages : 11 No. of Claims : 2\n"
+    return text
+
+
+def one_record_per_page(count):
+    """
+    Page texts holding one complete record each (application numbers
+    202511000000, 202511000001, ...).
+    """
+    return [record_text(f"2025110{index:05d}", f"abstract {index}") for index in range(count)]
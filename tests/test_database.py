@@ -0,0 +1,158 @@
+import sqlite3
+
+import pytest
+
+from src import database
+from src.records import Patent
+
+
+def _patent(app_no, **fields):
+    fields.setdefault('title', f"Patent {app_no}")
+    fields.setdefault('date_of_filing', "15/09/2025")
+    fields.setdefault('publication_date', "24/10/2025")
+    return Patent(application_no=app_no, **fields)
+
+
+def _search(terms):
+    return [result['application_no'] for result in database.search_patents(terms)]
+
+
+# --- Upserts and the full-text index ---
+
+def test_reinserting_a_patent_updates_it_in_place(db):
+    database.insert_patents([_patent("1", title="Drone delivery system")])
+    database.insert_patents([_patent("1", title="Blockchain payment ledger")])
+
+    assert db.execute("SELECT COUNT(*) FROM patents").fetchone()[0] == 1
+    assert db.execute("SELECT title FROM patents").fetchone()[0] == "Blockchain payment ledger"
+    # The index follows the update: no stale entry for the old title
+    assert _search("blockchain") == ["1"]
+    assert _search("drone") == []
+
+
+def test_writer_counts_updated_patents_apart_from_new_ones(db):
+    database.insert_patents([_patent("1")])
+    with database.PatentWriter(chunk_size=2) as writer:
+        for app_no in ("1", "2", "2", "3"):
+            writer.add(_patent(app_no))
+    assert (writer.written, writer.updated) == (4, 2)
+
+
+def test_full_text_index_follows_updates_and_deletes(db):
+    database.insert_patents([_patent("1", abstract="A neural network for drones"), _patent("2")])
+    assert _search("drones") == ["1"]
+    assert _search("drone") == ["1"]  # Porter stemming
+
+    db.execute("UPDATE patents SET abstract = 'A rotor blade' WHERE application_no = '1'")
+    assert _search("drone") == []
+    assert _search("rotor") == ["1"]
+
+    db.execute("DELETE FROM patents WHERE application_no = '1'")
+    assert _search("rotor") == []
+
+
+def test_search_falls_back_to_literal_words_for_invalid_syntax(db):
+    database.insert_patents([_patent("1", title="Self-driving car")])
+    assert _search('self-driving "car') == ["1"]
+
+
+def test_patent_ipc_rows_follow_classification(db):
+    database.insert_patents([_patent("1"), _patent("2")])
+    database.update_patent_classifications([
+        ("1", "Software", ["G06Q0010000000", "G06F0016000000"]),
+        ("2", "Non-Software", ["A61B0005000000"]),
+    ])
+    assert [row["application_no"] for row in database.get_patents_by_ipc("G06Q")] == ["1"]
+    assert [row["application_no"] for row in database.get_patents_by_ipc("A61B0005")] == ["2"]
+
+    database.reset_patents_to_newly_extracted()
+    assert db.execute("SELECT COUNT(*) FROM patent_ipc").fetchone()[0] == 0
+
+
+def test_writer_failure_raises_and_saves_nothing_of_the_chunk(db):
+    db.execute("DROP TABLE patents_fts")  # The insert trigger now fails
+    with pytest.raises(sqlite3.Error):
+        database.insert_patents([_patent("1"), _patent("2")])
+    assert db.execute("SELECT COUNT(*) FROM patents").fetchone()[0] == 0
+
+
+def test_has_patents_to_classify(db):
+    assert not database.has_patents_to_classify()
+    database.insert_patents([_patent("1", status='newly_extracted')])
+    assert database.has_patents_to_classify()
+    database.update_patent_classifications([("1", "Software", [])])
+    assert not database.has_patents_to_classify()
+
+
+# --- Transactions ---
+
+def test_nested_transactions_commit_or_roll_back_together(db):
+    with pytest.raises(RuntimeError):
+        with database.transaction() as conn:
+            conn.execute("INSERT INTO journals (journal_id) VALUES ('j1')")
+            with database.transaction() as inner:
+                inner.execute("INSERT INTO journals (journal_id) VALUES ('j2')")
+            raise RuntimeError
+    assert db.execute("SELECT COUNT(*) FROM journals").fetchone()[0] == 0
+
+
+def test_schema_scripts_roll_back_with_the_transaction(db):
+    with pytest.raises(RuntimeError):
+        with database.transaction() as conn:
+            conn.execute("INSERT INTO journals (journal_id) VALUES ('j1')")
+            database._execute_script(conn, database.CREATE_PATENT_IPC_SQL.replace("patent_ipc", "scratch_ipc"))
+            raise RuntimeError
+    assert db.execute("SELECT COUNT(*) FROM journals").fetchone()[0] == 0
+    assert db.execute("SELECT COUNT(*) FROM sqlite_master WHERE name LIKE 'scratch_ipc%'").fetchone()[0] == 0
+
+
+# --- ISO dates ---
+
+def test_iso_date_backfill_on_an_old_database(db, capsys):
+    # A database from before the ISO columns
+    db.executescript("""
+        DROP INDEX idx_patents_publication_date_iso;
+        DROP INDEX idx_patents_filing_date_iso;
+        ALTER TABLE patents DROP COLUMN date_of_filing_iso;
+        ALTER TABLE patents DROP COLUMN publication_date_iso;
+    """)
+    db.executemany(
+        "INSERT INTO patents (application_no, date_of_filing, publication_date) VALUES (?, ?, ?)",
+        [(str(index), f"{index + 1:02d}/01/2024", "24/10/2025") for index in range(5)]
+        + [("bad", "not a date", None)]
+    )
+    db.commit()
+
+    database.add_iso_date_columns(chunk_size=2)
+
+    rows = dict(db.execute("SELECT application_no, date_of_filing_iso FROM patents").fetchall())
+    assert rows == {"0": "2024-01-01", "1": "2024-01-02", "2": "2024-01-03",
+                    "3": "2024-01-04", "4": "2024-01-05", "bad": None}
+    assert db.execute("SELECT COUNT(*) FROM patents WHERE publication_date_iso = '2025-10-24'").fetchone()[0] == 5
+    indexes = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_patents_publication_date_iso", "idx_patents_filing_date_iso"} <= indexes
+    # A second run has nothing left to do
+    capsys.readouterr()
+    database.add_iso_date_columns(chunk_size=2)
+    assert "(0 patents backfilled)" in capsys.readouterr().out
+
+
+def test_date_ranges_are_inclusive_and_ordered_by_date(db):
+    database.insert_patents([
+        _patent("a", date_of_filing="31/12/2023"),
+        _patent("b", date_of_filing="01/01/2024"),
+        _patent("c", date_of_filing="30/06/2024"),
+        _patent("d", date_of_filing="01/07/2024"),
+        _patent("e", date_of_filing="15/03/2024"),
+    ])
+    batches = database.iter_patent_batches(filed_from="2024-01-01", filed_to="2024-06-30", batch_size=2)
+    assert [[patent.application_no for patent in batch] for batch in batches] == [["b", "e"], ["c"]]
+
+
+def test_date_range_uses_the_iso_index(db):
+    plan = " ".join(row[3] for row in db.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM patents WHERE publication_date_iso >= ? "
+        "ORDER BY publication_date_iso, application_no", ("2025-01-01",)
+    ))
+    assert "idx_patents_publication_date_iso" in plan
+    assert "TEMP B-TREE" not in plan
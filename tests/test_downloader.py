@@ -0,0 +1,151 @@
+from pathlib import Path
+
+import pytest
+
+import config
+from src import database, downloader
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class _ListingSession:
+    """
+    Serves one page for the journal listing GET.
+    """
+
+    def __init__(self, page):
+        self.page = page
+
+    def get(self, url, timeout=None):
+        return _Response(self.page)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def listing(db, tmp_path, monkeypatch):
+    """
+    Returns run(page): runs the downloader against a listing page and
+    returns the (journal_id, part, FileName) of every PDF it fetched.
+    """
+    monkeypatch.setattr(config, 'RAW_PDF_DIR', tmp_path / "raw_pdfs")
+    fetched = []
+
+    def fake_download(session, journal_db_id, part_name, form_filename):
+        fetched.append((journal_db_id, part_name, form_filename))
+        path = config.RAW_PDF_DIR / f"{journal_db_id}_{part_name}.pdf"
+        return path, ("0" * 64, 1)
+
+    monkeypatch.setattr(downloader, '_download_pdf', fake_download)
+
+    def run(page):
+        monkeypatch.setattr(downloader, '_make_session', lambda: _ListingSession(page))
+        downloader.run_downloader()
+        return sorted(fetched)
+
+    return run
+
+
+def test_downloads_every_part_listed_down_to_the_baseline(listing, monkeypatch):
+    monkeypatch.setattr(config, 'DOWNLOADER_BASELINE_SERIAL', '44/2025')
+    page = (FIXTURES / "journal_listing.html").read_text(encoding='utf-8')
+    assert listing(page) == [
+        ('44_2025', 'Part_I', "EfGh_Part1.pdf"),
+        ('45_2025', 'Part_I', "AbCd_Part1.pdf"),
+        ('45_2025', 'Part_II', "AbCd_Part2.pdf"),
+    ]
+    assert database.get_downloaded_journal_ids() == {'44_2025', '45_2025'}
+
+
+def test_listing_without_a_table_downloads_nothing(listing, capsys):
+    assert listing((FIXTURES / "application_status.html").read_text(encoding='utf-8')) == []
+    assert "Could not find table" in capsys.readouterr().out
+
+
+class _PdfResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise downloader.requests.HTTPError(self.status_code)
+
+    def iter_content(self, chunk_size=None):
+        yield self.body
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class _PdfSession:
+    """
+    Answers each POST with the next response, recording its Range header.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.ranges = []
+
+    def post(self, url, data=None, headers=None, timeout=None, stream=False):
+        self.ranges.append(headers.get('Range'))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def pdf_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'RAW_PDF_DIR', tmp_path)
+    return tmp_path
+
+
+def _download(session):
+    return downloader._download_pdf(session, '44_2025', 'Part_I', "EfGh_Part1.pdf")
+
+
+def test_a_pdf_left_by_an_earlier_run_is_kept_when_the_server_has_that_size(pdf_dir):
+    (pdf_dir / "44_2025_Part_I.pdf").write_bytes(b"complete")
+    session = _PdfSession(_PdfResponse(416, headers={'Content-Range': "bytes */8"}))
+    path, (sha256, size) = _download(session)
+    assert session.ranges == ["bytes=8-"]
+    assert path.read_bytes() == b"complete" and size == 8
+    assert not (pdf_dir / "44_2025_Part_I.pdf.part").exists()
+
+
+def test_a_pdf_left_by_an_earlier_run_is_replaced_when_it_does_not_match(pdf_dir):
+    (pdf_dir / "44_2025_Part_I.pdf").write_bytes(b"truncat")
+    session = _PdfSession(_PdfResponse(416, headers={'Content-Range': "bytes */9"}),
+                          _PdfResponse(200, b"new whole", {'Content-Length': "9"}))
+    path, (sha256, size) = _download(session)
+    assert session.ranges == ["bytes=7-", None]
+    assert path.read_bytes() == b"new whole" and size == 9
+
+
+def test_a_short_transfer_is_kept_for_resume(pdf_dir):
+    assert _download(_PdfSession(_PdfResponse(200, b"half", {'Content-Length': "8"}))) is None
+    assert (pdf_dir / "44_2025_Part_I.pdf.part").read_bytes() == b"half"
+
+
+@pytest.mark.parametrize("headers", [
+    {'Content-Length': "eight"},
+    {'Content-Length': "8", 'Content-Encoding': "gzip"},
+    {},
+])
+def test_an_unusable_content_length_is_not_checked(pdf_dir, headers):
+    path, (sha256, size) = _download(_PdfSession(_PdfResponse(200, b"half", headers)))
+    assert path.read_bytes() == b"half" and size == 4
@@ -0,0 +1,114 @@
+import pytest
+
+import config
+from src import database, extractor
+from tests.samples import one_record_per_page, record_text
+
+
+@pytest.fixture
+def shards_of_two(monkeypatch):
+    # A checkpoint after every two pages
+    monkeypatch.setattr(config, 'EXTRACTOR_PAGES_PER_SHARD', 2)
+
+
+def _saved_app_nos(conn):
+    return [row[0] for row in conn.execute("SELECT application_no FROM patents ORDER BY application_no")]
+
+
+def test_iter_patents_streams_every_record_in_page_order(db, journal_pdf, shards_of_two):
+    path = journal_pdf(one_record_per_page(5))
+    patents = list(extractor.iter_patents(path, 'PART_I_EARLY'))
+    assert [patent.abstract for patent in patents] == [f"abstract {index}" for index in range(5)]
+    assert {patent.publication_type for patent in patents} == {'PART_I_EARLY'}
+    assert patents[0].publication_date_iso == '2025-10-24'
+
+
+def test_iter_patents_can_be_closed_early(db, journal_pdf, shards_of_two):
+    patents = extractor.iter_patents(journal_pdf(one_record_per_page(5)), 'PART_I_EARLY')
+    assert next(patents).abstract == "abstract 0"
+    patents.close()
+
+
+def test_iter_patents_stitches_a_record_across_a_shard_boundary(db, journal_pdf, shards_of_two):
+    pages = [
+        record_text("202511000000", "first"),
+        record_text("202511000001", "spills over", terminated=False),
+        "onto the next shard\nNo. of Pages : 2\n",
+    ]
+    patents = list(extractor.iter_patents(journal_pdf(pages), 'PART_I_EARLY'))
+    # Pages are joined on a newline, which becomes a space
+    assert [" ".join(patent.abstract.split()) for patent in patents] == ["first", "spills over onto the next shard"]
+
+
+def test_process_pdf_checkpoints_every_shard(db, journal_pdf, shards_of_two):
+    path = journal_pdf(one_record_per_page(5))
+    with database.PatentWriter() as writer:
+        found, stitched = extractor._process_pdf(path, 'PART_I_EARLY', writer, 'j1')
+    assert (found, stitched) == (5, 0)
+    assert database.get_extraction_progress('j1') == {'PART_I_EARLY': 4}
+    assert len(_saved_app_nos(db)) == 5
+
+
+def test_process_pdf_resumes_after_the_checkpoint(db, journal_pdf, shards_of_two):
+    path = journal_pdf(one_record_per_page(5))
+    with database.PatentWriter() as writer:
+        found, _ = extractor._process_pdf(path, 'PART_I_EARLY', writer, 'j1', start_page=3)
+    assert found == 2
+    assert _saved_app_nos(db) == ["202511000003", "202511000004"]
+
+
+def test_interrupted_journal_resumes_from_its_last_committed_checkpoint(db, journal_pdf, shards_of_two, monkeypatch):
+    path = journal_pdf(one_record_per_page(6))
+    database.log_journal('j1', path, None)
+
+    checkpoint = database.PatentWriter.checkpoint
+    calls = []
+
+    def crash_on_second_shard(writer, journal_id, part, last_page):
+        calls.append(last_page)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        checkpoint(writer, journal_id, part, last_page)
+
+    monkeypatch.setattr(database.PatentWriter, 'checkpoint', crash_on_second_shard)
+    assert extractor._process_journal(database.get_journal('j1')) == 0
+    assert database.get_journal('j1')['status'] == 'error_extracting'
+    assert database.get_extraction_progress('j1') == {'PART_I_EARLY': 1}
+
+    monkeypatch.setattr(database.PatentWriter, 'checkpoint', checkpoint)
+    # Only the pages after the checkpoint are extracted again
+    assert extractor._process_journal(database.get_journal('j1')) == 4
+    assert database.get_journal('j1')['status'] == 'extracted'
+    assert database.get_extraction_progress('j1') == {'PART_I_EARLY': 5}
+    assert len(_saved_app_nos(db)) == 6
+
+
+def test_failed_write_marks_the_journal_for_retry(db, journal_pdf):
+    path = journal_pdf(one_record_per_page(2))
+    database.log_journal('j1', path, None)
+    db.execute("DROP TABLE patents_fts")  # The insert trigger now fails
+
+    assert extractor._process_journal(database.get_journal('j1')) == 0
+    assert database.get_journal('j1')['status'] == 'error_extracting'
+    assert database.get_extraction_progress('j1') == {}
+
+
+def test_reset_from_page_moves_the_checkpoint(db):
+    database.reset_journal_status('j1', from_page=10, part='I')
+    # Checkpoints hold the last DONE page (0-based): page 10 is next
+    assert database.get_extraction_progress('j1') == {'PART_I_EARLY': 8}
+    database.reset_journal_status('j1')
+    assert database.get_extraction_progress('j1') == {}
+
+
+def test_re_extraction_reports_updated_patents_apart_from_new_ones(db, journal_pdf, capsys):
+    path = journal_pdf(one_record_per_page(3))
+    database.log_journal('j1', path, None)
+    extractor.run_extractor(workers=1)
+    assert "Saved to database: 3 new, 0 updated" in capsys.readouterr().out
+
+    database.reset_journal_status('j1')
+    extractor.run_extractor(workers=1)
+    out = capsys.readouterr().out
+    assert "Total patents found: 3" in out
+    assert "Saved to database: 0 new, 3 updated" in out
@@ -0,0 +1,113 @@
+from pathlib import Path
+
+import pytest
+
+import config
+from src import forms, searcher
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _page(name):
+    return (FIXTURES / name).read_text(encoding='utf-8')
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+# --- find_form() over each search stage's page ---
+
+def test_results_page_application_number_link():
+    form = forms.find_form(_page("results.html"), action='/PublicSearch/PublicationSearch/PatentDetails')
+    assert form.action == '/PublicSearch/PublicationSearch/PatentDetails'
+    assert form.get('ConnectionName') == "PubSearchConn"
+    assert form.get('ApplicationNumber') == " 202511087359 "
+    assert form.buttons == [('ApplicationNumber', " 202511087359 ", "202511087359")]
+
+
+def test_details_page_view_status_form():
+    form = forms.find_form(_page("application_details.html"),
+                           action='/PublicSearch/PublicationSearch/GetApplicationStatus')
+    assert form.get('ApplicationNumber') == "202511087359"
+    assert form.find_input('submit', 'submit') == "View Application Status"
+    assert form.find_input('ApplicationNumber', 'submit') is None
+
+
+def test_status_page_js_redirect_form_by_name():
+    form = forms.find_form(_page("application_status.html"), name='form')
+    assert form.action == "https://iprsearch.ipindia.gov.in/RQStatus/PatentCertificate"
+    assert (form.get('AppNumber'), form.get('OTP')) == ("202511087359", "a1b2c3d4")
+
+
+def test_real_status_page_view_documents_form():
+    form = forms.find_form(_page("real_status_page.html"), action='/PatentSearch/PatentSearch/ViewDocuments')
+    assert form.get('APPLICATION_NUMBER') == "202511087359"
+
+
+def test_form_fields_selects_and_default_values():
+    form = forms.find_form(_page("search_page.html"), action='/PublicSearch/PublicationSearch/Search')
+    assert form.get('__RequestVerificationToken') == "tok123"
+    assert form.get('FieldName') == "TITLE"  # The 'selected' option
+    assert form.get('CaptchaText') == ""
+    assert form.get('Missing', 'default') == 'default'
+
+
+def test_missing_form_returns_none():
+    assert forms.find_form(_page("results.html"), action='/PublicSearch/PublicationSearch/Nope') is None
+    assert forms.find_form(_page("application_details.html"), name='form') is None
+    assert forms.find_form("") is None
+
+
+def test_missing_form_raises_retrieval_error_with_the_page():
+    page = _page("application_details.html")
+    with pytest.raises(searcher.RetrievalError) as error:
+        searcher._find_form(_Response(page), config.RESULTS_HTML, "Could not find the link.",
+                            action='/PublicSearch/PublicationSearch/PatentDetails')
+    assert error.value.page == page
+    assert error.value.debug_file == config.RESULTS_HTML
+
+
+def test_missing_field_raises_retrieval_error():
+    response = _Response(_page("application_status.html"))
+    form = forms.find_form(response.text, name='form')
+    with pytest.raises(searcher.RetrievalError, match="no 'Nope' field"):
+        searcher._field(form, 'Nope', response, config.STATUS_HTML)
+
+
+# --- find_image_src() ---
+
+def test_captcha_image_src():
+    # Not the one quoted inside the <script>
+    assert forms.find_image_src(_page("search_page.html"), 'Captcha') == "/PublicSearch/Captcha/CaptchaImage?t=638712"
+
+
+def test_missing_image_returns_none():
+    assert forms.find_image_src(_page("results.html"), 'Captcha') is None
+
+
+# --- parse_table() over the journal listing ---
+
+def test_journal_listing_rows_cells_and_forms():
+    rows = forms.parse_table(_page("journal_listing.html"))
+    assert rows[0] == []  # The <th> header row
+    assert [cells[1].text.strip() for cells in rows[1:]] == ["45/2025", "44/2025"]
+
+    first_downloads = rows[1][-1].forms
+    assert [(form.buttons[0][2], form.find_input('FileName', 'hidden')) for form in first_downloads] == [
+        ("Part I", "AbCd_Part1.pdf"),
+        ("Part II", "AbCd_Part2.pdf"),
+    ]
+
+
+def test_nested_tables_do_not_add_rows():
+    rows = forms.parse_table(_page("journal_listing.html"))
+    assert len(rows) == 3
+    assert len(rows[2]) == 4
+    assert [form.find_input('FileName', 'hidden') for form in rows[2][-1].forms] == ["EfGh_Part1.pdf"]
+
+
+def test_missing_table_returns_no_rows():
+    assert forms.parse_table(_page("application_status.html")) == []
+    assert forms.parse_table("") == []
@@ -0,0 +1,86 @@
+from src import inid
+from tests.samples import record_text
+
+
+def _abstracts(pages, stop=None):
+    return [(page, record['abstract'], stitched)
+            for page, record, stitched in inid.iter_records(enumerate(pages), stop)]
+
+
+def test_stitches_a_record_that_also_starts_a_new_one_on_its_last_page():
+    pages = [
+        record_text("202511000001", "first start", terminated=False),
+        "continued abstract one\nNo. of Pages : 1\n"
+        + record_text("202511000002", "second start", terminated=False),
+        "second continued\nNo. of Pages : 3\n",
+    ]
+    assert _abstracts(pages) == [
+        (0, "first start continued abstract one", True),
+        (1, "second start second continued", True),
+    ]
+
+
+def test_parse_record_extracts_every_field():
+    record = inid.parse_record(record_text("202511087359", "A drone\nthat flies."))
+    assert record == {
+        'application_no': "202511087359",
+        'date_of_filing': "15/09/2025",
+        'publication_date': "24/10/2025",
+        'title': "Smart widget",
+        'international_classification': "G06Q0010000000, A61B0005000000",
+        'applicant': "1)ACME LABS",
+        'inventor': "1)Jane Doe",
+        'abstract': "A drone that flies.",
+    }
+
+
+def test_parse_record_without_the_optional_classification():
+    text = record_text("1", "x").replace("(51) International classification :G06Q0010000000, A61B0005000000\n", "")
+    record = inid.parse_record(text)
+    assert record['international_classification'] == ''
+    assert record['title'] == "Smart widget"
+
+
+def test_parse_record_needs_the_terminator_unless_told_otherwise():
+    text = record_text("1", "cut short", terminated=False)
+    assert inid.parse_record(text) is None
+    assert inid.parse_record(text, terminated=False)['abstract'] == "cut short"
+
+
+def test_parse_record_rejects_pages_without_a_complete_record():
+    assert inid.parse_record("Index of applicants\n(21) something") is None
+    assert inid.parse_record(record_text("1", "x").replace("(72)", "(99)")) is None
+
+
+def test_the_next_header_closes_an_unterminated_record():
+    page = record_text("1", "first", terminated=False) + record_text("2", "second")
+    assert _abstracts([page]) == [(0, "first", False), (0, "second", False)]
+
+
+def test_running_page_header_is_not_stitched_into_the_abstract():
+    pages = [
+        record_text("1", "first part", terminated=False),
+        "The Patent Office Journal No. 43/2025 Dated  24/10/2025    104599\nsecond part\nNo. of Pages : 2\n",
+    ]
+    assert _abstracts(pages) == [(0, "first part second part", True)]
+
+
+def test_a_record_is_only_stitched_onto_one_more_page():
+    pages = [
+        record_text("1", "one", terminated=False),
+        "two\n",
+        "three\nNo. of Pages : 3\n",
+    ]
+    # The spill-over is cut after MAX_CONTINUATION_PAGES and emitted as is
+    assert _abstracts(pages) == [(0, "one two", True)]
+
+
+def test_stop_keeps_records_starting_before_it_and_finishes_them():
+    pages = [
+        record_text("1", "first"),
+        record_text("2", "second", terminated=False),
+        "end of second\nNo. of Pages : 2\n" + record_text("3", "third"),
+    ]
+    assert _abstracts(pages, stop=2) == [(0, "first", False), (1, "second end of second", True)]
+    # The next shard starts at page 2 and skips the tail it doesn't own
+    assert [(page, record['abstract']) for page, record, _ in inid.iter_records(list(enumerate(pages))[2:])] == [(2, "third")]
@@ -0,0 +1,62 @@
+import pickle
+
+from src import utils
+from src.records import FIELDS, Patent
+
+
+def _patent(**fields):
+    fields.setdefault('application_no', "202511000001")
+    return Patent(date_of_filing="15/09/2025", publication_date="24/10/2025",
+                  status="classified", **fields)
+
+
+def test_iso_dates_are_derived_from_the_printed_ones():
+    patent = _patent()
+    assert (patent.date_of_filing_iso, patent.publication_date_iso) == ("2025-09-15", "2025-10-24")
+    assert Patent(date_of_filing="n/a").date_of_filing_iso is None
+    assert Patent(publication_date="01/01/2024", publication_date_iso="2024-01-02").publication_date_iso == "2024-01-02"
+
+
+def test_iso_date():
+    assert utils.iso_date("05/11/2025") == "2025-11-05"
+    assert utils.iso_date(" 05/11/2025 ") == "2025-11-05"
+    assert utils.iso_date("31/02/2025") is None
+    assert utils.iso_date("2025-11-05") is None
+    assert utils.iso_date(None) is None
+    assert utils.reformat_search_date("05/11/2025") == "11/05/2025"
+
+
+def test_repeated_strings_are_shared():
+    first, second = _patent(), _patent(application_no="202511000002")
+    assert first.status is second.status
+    assert first.publication_date_iso is second.publication_date_iso
+
+
+def test_pickles_as_an_equal_record():
+    patent = _patent(title="Smart widget", ipc_codes="G06Q0010000000")
+    copy = pickle.loads(pickle.dumps(patent))
+    assert copy == patent
+    assert copy.to_dict() == patent.to_dict()
+    assert list(copy.to_dict()) == list(FIELDS)
+
+
+def test_equal_records_hash_alike_and_deduplicate():
+    first, same = _patent(title="A"), _patent(title="A")
+    changed = _patent(title="B")
+    assert first == same and hash(first) == hash(same)
+    assert first != changed
+    assert len({first, same, changed}) == 2
+    assert {first: 1}[same] == 1
+
+
+def test_from_dict_accepts_extractor_dicts():
+    patent = Patent.from_dict({'application_no': "1", 'international_classification': "G06Q", 'unknown': "x"})
+    assert patent.ipc_codes == "G06Q"
+    assert Patent.from_dict({'application_no': "1", 'ipc_codes': "A61B",
+                             'international_classification': "G06Q"}).ipc_codes == "A61B"
+
+
+def test_from_row_ignores_columns_that_are_not_fields(db):
+    row = db.execute("SELECT '1' AS application_no, 'x' AS created_at, '15/09/2025' AS date_of_filing").fetchone()
+    patent = Patent.from_row(row)
+    assert (patent.application_no, patent.date_of_filing_iso, patent.title) == ("1", "2025-09-15", None)
@@ -0,0 +1,59 @@
+import pytest
+
+import config
+from src import database, retriever, searcher
+from src.records import Patent
+
+
+class _Session:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def retrieve(db, tmp_path, monkeypatch):
+    """
+    Returns run(outcome): retrieves one classified Software patent with
+    _retrieve() answering outcome(call number). Returns the calls made.
+    """
+    monkeypatch.setattr(config, 'CAPTCHA_DIR', tmp_path / "captchas")
+    monkeypatch.setattr(config, 'DOCUMENTS_DIR', tmp_path / "documents")
+    monkeypatch.setattr(searcher, 'new_session', _Session)
+    monkeypatch.setattr(searcher, 'fetch_captcha', lambda session: b"image")
+    monkeypatch.setattr(retriever, '_load_solver', lambda: lambda image: "abcd")
+    database.insert_patents([Patent(application_no="202511000001", date_of_filing="15/09/2025")])
+    database.update_patent_classifications([("202511000001", "Software", ["G06Q0010000000"])])
+
+    def run(outcome):
+        calls = []
+
+        def fake_retrieve(search_session, patent):
+            calls.append(patent.application_no)
+            return outcome(len(calls))
+
+        monkeypatch.setattr(retriever, '_retrieve', fake_retrieve)
+        retriever.run_retriever()
+        return calls
+
+    return run
+
+
+def _status(db):
+    return db.execute("SELECT status FROM patents").fetchone()[0]
+
+
+def test_a_patent_whose_session_keeps_expiring_is_given_up(retrieve, db):
+    calls = retrieve(lambda call: retriever.SESSION_EXPIRED)
+    assert len(calls) == retriever.MAX_SESSION_EXPIRED_RETRIES + 1
+    assert _status(db) == 'error_retrieval'
+
+
+def test_an_expired_session_requeues_the_patent(retrieve, db):
+    def outcome(call):
+        if call == 1:
+            return retriever.SESSION_EXPIRED
+        database.update_patent_status("202511000001", 'documents_retrieved')
+        return 'documents_retrieved'
+
+    assert len(retrieve(outcome)) == 2
+    assert _status(db) == 'documents_retrieved'
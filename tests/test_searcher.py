@@ -0,0 +1,60 @@
+import pytest
+
+import config
+from src import searcher
+
+
+class _Session:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def search(tmp_path, monkeypatch):
+    """
+    Returns run(expiries): runs the searcher for the test patent with
+    open_documents() raising SessionExpired for the first 'expiries'
+    calls. Returns (CAPTCHAs solved, searches submitted, page saved).
+    """
+    monkeypatch.setattr(config, 'DOCUMENTS_HTML', tmp_path / "documents.html")
+    calls = {'captchas': 0, 'searches': 0, 'documents': 0}
+
+    def solve(session):
+        calls['captchas'] += 1
+        return "abcd"
+
+    def submit(session, patent_data, captcha_text, log=None):
+        calls['searches'] += 1
+        return "results"
+
+    monkeypatch.setattr(searcher, 'new_session', _Session)
+    monkeypatch.setattr(searcher, '_solve_captcha', solve)
+    monkeypatch.setattr(searcher, 'submit_search', submit)
+
+    def run(expiries):
+        def documents(session, post_response, log=None, search_session=None):
+            calls['documents'] += 1
+            if calls['documents'] <= expiries:
+                raise searcher.SessionExpired("Session expired.")
+            return "<html>documents</html>"
+
+        monkeypatch.setattr(searcher, 'open_documents', documents)
+        searcher.run_searcher()
+        saved = config.DOCUMENTS_HTML.exists()
+        return calls['captchas'], calls['searches'], saved
+
+    return run
+
+
+def test_session_expiring_after_the_search_retries_with_a_new_captcha(search, capsys):
+    assert search(1) == (2, 2, True)
+    out = capsys.readouterr().out
+    assert "Session expired. A new CAPTCHA is needed." in out
+    assert "Invalid CAPTCHA" not in out
+
+
+def test_the_retry_happens_only_once(search, capsys):
+    assert search(2) == (2, 2, False)
+    out = capsys.readouterr().out
+    assert "FAILED: Session expired." in out
+    assert "Invalid CAPTCHA" not in out